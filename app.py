@@ -2,6 +2,7 @@ import streamlit as st
 import os
 import sys
 import json
+import time
 from pathlib import Path
 
 # SETUP PATH
@@ -9,25 +10,291 @@ current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
 # IMPORT MODUL
-from src.audio_processing import (
-    extract_audio,
-    get_audio_duration,
-    fix_video_for_streaming,
-)
-from src.transcription import load_whisper_model, transcribe_audio
-from src.nlp_analysis import calculate_metrics
-from src.agent_engine import run_grading_agent, generate_overall_summary
+from src.audio_processing import prepare_media
+from src.cache import get_result_cache, hash_file
+from src.workspace import get_workspace_manager
+from src.job_queue import JOB_DONE, JOB_FAILED, JOB_QUEUED, get_job_queue
+from src.worker import start_worker_pool
+from src.llm_cache import get_llm_cache
+from src.agent_engine import generate_overall_summary, show_missing_keys_error
 from src.grading_engine import generate_final_json
-from src.rubric_data import RUBRIC_CONFIG
+from src.prescoring import PRESCORE_REASON_PREFIX
+from src.question_bank import get_question_bank
+from src.telemetry import (
+    get_telemetry,
+    merge_snapshots,
+    span_summary,
+    start_metrics_server,
+    to_json,
+    to_prometheus,
+)
 
 st.set_page_config(page_title="Re:View", layout="wide")
 
-TEMP_DIR = current_dir / "temp"
-os.makedirs(TEMP_DIR, exist_ok=True)
+RERUN_LOG_SIZE = 20
+JOB_POLL_SECONDS = 1.0
+WORKER_STATUS_POLL_SECONDS = 2.0
+TELEMETRY_POLL_SECONDS = 5.0
+# Worker lokal yang dijalankan app; 0 jika worker dijalankan terpisah
+# (python -m src.worker --workers N)
+APP_JOB_WORKERS = int(os.environ.get("REVIEW_JOB_WORKERS", "1"))
+# Port endpoint /metrics (Prometheus) & /metrics.json; 0 = nonaktif
+METRICS_PORT = int(os.environ.get("REVIEW_METRICS_PORT", "0"))
+
+
+# INSTRUMENTASI BIAYA RERUN
+# Setiap run (full app atau fragment) mencatat durasi & kerja berat yang
+# dilakukan: tulis disk, inferensi model, dan panggilan LLM.
+def start_run_cost(scope):
+    cost = st.session_state.get("current_run_cost")
+    if cost is not None and not cost["finished"]:
+        # Fragment yang dieksekusi sebagai bagian dari full run
+        return None
+    cost = {
+        "scope": scope,
+        "start": time.perf_counter(),
+        "diskWrites": 0,
+        "modelRuns": 0,
+        "llmRuns": 0,
+        "finished": False,
+    }
+    st.session_state["current_run_cost"] = cost
+    return cost
+
+
+def count_cost(field):
+    cost = st.session_state.get("current_run_cost")
+    if cost is not None:
+        cost[field] += 1
+
+
+def finish_run_cost(cost):
+    if cost is None:
+        return
+    cost["finished"] = True
+    log = st.session_state.setdefault("rerun_log", [])
+    log.append(
+        {
+            "scope": cost["scope"],
+            "ms": round((time.perf_counter() - cost["start"]) * 1000, 1),
+            "diskWrites": cost["diskWrites"],
+            "modelRuns": cost["modelRuns"],
+            "llmRuns": cost["llmRuns"],
+        }
+    )
+    del log[:-RERUN_LOG_SIZE]
+
+
+# KOMPUTASI BERAT TER-CACHE (tidak diulang saat rerun)
+@st.cache_resource(show_spinner=False)
+def start_local_workers(workers):
+    """Worker process milik app (model Whisper dimuat & tetap hangat di sana)."""
+    return start_worker_pool(workers) if workers > 0 else []
+
+
+def collect_telemetry():
+    """Telemetri gabungan proses app + semua worker yang masih aktif."""
+    worker_snapshots = [
+        w["stats"].get("telemetry")
+        for w in get_job_queue().worker_states()
+        if w.get("stats")
+    ]
+    return merge_snapshots([get_telemetry().snapshot(), *worker_snapshots])
+
+
+@st.cache_resource(show_spinner=False)
+def start_telemetry_server(port):
+    """Endpoint scrape Prometheus (sekali per proses app)."""
+    return start_metrics_server(port, collect_telemetry) if port else None
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def load_job_result(job_id):
+    """
+    Hasil job yang sudah selesai (tidak berubah lagi, aman di-cache).
+    Raise KeyError jika belum selesai (exception tidak di-cache).
+    """
+    job = get_job_queue().get(job_id)
+    if job is None or job["status"] != JOB_DONE:
+        raise KeyError(job_id)
+    return job["payload"]["upload_hash"], job["result"]
+
+
+def summarize_results(results, placeholder=None, role_id=None):
+    """
+    Kesimpulan akhir, di-stream ke `placeholder` selagi ditulis LLM.
+    Hasil identik dilayani cache respons LLM (kegagalan tidak di-cache).
+    Bukan st.cache_data: elemen yang di-update dari dalam fungsi ter-cache
+    tidak bisa di-replay.
+    """
+    streamed = []
+
+    def on_partial(partial):
+        if not streamed:
+            count_cost("llmRuns")
+        streamed.append(True)
+        if placeholder is not None and partial.get("overall_summary"):
+            placeholder.info(partial["overall_summary"] + " ▌")
+
+    return generate_overall_summary(results, on_partial=on_partial, role_id=role_id)
+
+
+# STATUS WORKER (model dimuat & di-warm-up di background oleh worker)
+@st.fragment(run_every=WORKER_STATUS_POLL_SECONDS)
+def worker_status_panel(worker_processes):
+    states = get_job_queue().worker_states()
+    ready = [w for w in states if w["state"] in ("ready", "busy")]
+    loading = [w for w in states if w["state"] == "loading"]
+    config_errors = [w for w in states if w["state"] == "config_error"]
+    errors = [w for w in states if w["state"] == "error"]
+
+    if ready:
+        st.success(
+            f"🟢 Model siap: {ready[0]['detail']} · {len(ready)} worker"
+            f" (warm-up {ready[0]['load_seconds'] or 0:.1f} detik)"
+        )
+    elif loading:
+        st.info("🟡 Memuat model di background... (halaman sudah bisa dipakai)")
+    elif config_errors:
+        show_missing_keys_error(config_errors[0]["detail"])
+    elif errors:
+        st.error(f"❌ Model Error: {errors[0]['detail']}")
+    elif worker_processes and not any(p.is_alive() for p in worker_processes):
+        st.error("❌ Worker Error (cek log worker)")
+    else:
+        st.warning("⚪ Belum ada worker aktif (python -m src.worker)")
+
+    queue_stats = get_job_queue().stats()
+    st.caption(
+        f"Antrian: {queue_stats[JOB_QUEUED]} antri / {queue_stats['running']} berjalan"
+    )
+
+    worker_stats = [w for w in states if w.get("stats")]
+    if worker_stats:
+        with st.expander("Model Stats"):
+            for worker in worker_stats:
+                stats = worker["stats"]
+                rss = stats.get("rssBytes")
+                rss_text = f" · RSS {rss / 1e6:.0f} MB" if rss else ""
+                lines = [f"**{worker['id']}**{rss_text}"]
+                if "models" in stats:
+                    lines.append(
+                        f"{stats['cpuThreads']} thread x {stats['numWorkers']} worker · "
+                        f"budget {stats['loadedBytes'] / 1e6:.0f}/"
+                        f"{stats['memoryBudgetBytes'] / 1e6:.0f} MB"
+                    )
+                    for name, model in stats["models"].items():
+                        status = "dimuat" if model["loaded"] else "tidak dimuat"
+                        load = model["loadSeconds"]
+                        rtf = model["rtf"]
+                        lines.append(
+                            f"{name}: {status}"
+                            + (f" · muat {load:.1f} detik" if load is not None else "")
+                            + (f" · RTF {rtf:.2f}" if rtf is not None else "")
+                            + f" · {model['inferences']} transkripsi"
+                        )
+                st.caption("  \n".join(lines))
+
+
+# LATENCY PER TAHAP (span telemetri app + worker, hot path di atas)
+@st.fragment(run_every=TELEMETRY_POLL_SECONDS)
+def telemetry_panel():
+    snapshot = collect_telemetry()
+    rows = span_summary(snapshot)
+    if not rows:
+        st.caption("Belum ada data latency.")
+        return
+    st.dataframe(
+        [
+            {
+                "tahap": r["span"],
+                "n": r["count"],
+                "p50 ms": r["p50Ms"],
+                "p95 ms": r["p95Ms"],
+                "total s": r["totalSeconds"],
+                "porsi": f"{r['share']:.0%}",
+            }
+            for r in rows
+        ],
+        hide_index=True,
+    )
+
+    counters = {}
+    for counter in snapshot["counters"]:
+        labels = counter["labels"]
+        counters.setdefault(counter["name"], []).append((labels, counter["value"]))
+    tokens = {labels.get("kind"): v for labels, v in counters.get("llm_tokens", [])}
+    attempts = sum(v for _, v in counters.get("llm_key_attempts", []))
+    failures = sum(v for _, v in counters.get("llm_key_failures", []))
+    st.caption(
+        f"Token LLM: {tokens.get('prompt', 0)} prompt / "
+        f"{tokens.get('completion', 0)} completion · "
+        f"{attempts} percobaan key, {failures} gagal"
+    )
+
+    d1, d2 = st.columns(2)
+    d1.download_button(
+        "Prometheus",
+        data=to_prometheus(snapshot),
+        file_name="review_metrics.prom",
+        mime="text/plain",
+        on_click="ignore",
+    )
+    d2.download_button(
+        "JSON",
+        data=to_json(snapshot),
+        file_name="review_metrics.json",
+        mime="application/json",
+        on_click="ignore",
+    )
+
+
+run_cost = start_run_cost("app")
+start_telemetry_server(METRICS_PORT)
+
+# Workspace terisolasi per sesi (upload & artefak), dengan kuota disk global
+workspace = get_workspace_manager()
 
 # SESSION STATE
+question_bank = get_question_bank()
+role_ids = question_bank.role_ids()
+if "role_id" not in st.session_state:
+    # Pulihkan role dari URL (browser di-refresh)
+    url_role = st.query_params.get("role")
+    st.session_state["role_id"] = (
+        url_role if url_role in role_ids else question_bank.default_role
+    )
+role = question_bank.get_role(st.session_state["role_id"])
 if "assessment_results" not in st.session_state:
     st.session_state["assessment_results"] = []
+if "workspace_id" not in st.session_state:
+    st.session_state["workspace_id"] = workspace.new_session_id()
+workspace_id = st.session_state["workspace_id"]
+if "active_jobs" not in st.session_state:
+    # Pulihkan job dari URL (browser di-refresh di tengah/ setelah job)
+    st.session_state["active_jobs"] = {
+        q: st.query_params[f"job{q}"]
+        for q in role.question_ids
+        if f"job{q}" in st.query_params
+    }
+    st.session_state["job_errors"] = {}
+
+
+def reset_assessment():
+    """Kosongkan hasil & job sesi ini (tombol Reset Data / ganti role)."""
+    st.session_state["assessment_results"] = []
+    st.session_state.pop("last_analysis", None)
+    st.session_state.pop("final_report", None)
+    st.session_state["active_jobs"] = {}
+    st.session_state["job_errors"] = {}
+    # File upload & preview sesi ini dilepas (input job yang masih berjalan
+    # tetap disimpan); upload yang masih dipilih ditulis ulang saat rerun
+    st.session_state.pop("media_prep", None)
+    workspace.cleanup_session(st.session_state["workspace_id"])
+    st.query_params.clear()
+    if st.session_state["role_id"] != question_bank.default_role:
+        st.query_params["role"] = st.session_state["role_id"]
+
 
 # UI HEADER
 st.title("Re:View")
@@ -36,33 +303,232 @@ st.caption("Reinforced Interview")
 # SIDEBAR
 with st.sidebar:
     st.header("System Status")
-    with st.spinner("Initializing Model..."):
-        model, device_name = load_whisper_model()
+    worker_status_panel(start_local_workers(APP_JOB_WORKERS))
 
-    if not model:
-        st.error("❌ Model Error")
-        st.stop()
+    cache_stats = get_result_cache().stats()
+    st.caption(
+        f"Cache: {cache_stats['hits']} hit / {cache_stats['misses']} miss"
+    )
+    llm_stats = get_llm_cache().stats()
+    st.caption(
+        f"LLM Cache: {llm_stats['hits']} hit / {llm_stats['misses']} miss"
+        f" · {llm_stats['coalesced']} digabung"
+    )
+    workspace_stats = workspace.stats()
+    st.caption(
+        f"Workspace: {workspace_stats['usedBytes'] / 1e6:.0f}"
+        f" / {workspace_stats['quotaBytes'] / 1e6:.0f} MB"
+        f" · {workspace_stats['sessions']} sesi"
+    )
 
     st.divider()
+    if len(role_ids) > 1:
+        # Ganti role = sesi penilaian baru (hasil role lain tidak tercampur)
+        st.selectbox("Role", role_ids, key="role_id", on_change=reset_assessment)
+    st.caption(f"Role: {role.title} · {len(role.questions)} soal")
     st.subheader("Progress")
     completed_ids = [r["id"] for r in st.session_state["assessment_results"]]
-    for i in range(1, 6):
+    for i in role.question_ids:
         status = "✅" if i in completed_ids else "⬜"
         st.write(f"{status} Soal {i}")
+    prescored = sum(
+        r["reason"].startswith(PRESCORE_REASON_PREFIX)
+        for r in st.session_state["assessment_results"]
+    )
+    if completed_ids:
+        st.caption(
+            f"Pre-scoring lokal: {prescored}/{len(completed_ids)} jawaban "
+            f"tanpa panggilan LLM"
+        )
 
     if st.button("Reset Data"):
-        st.session_state["assessment_results"] = []
+        reset_assessment()
         st.rerun()
 
+    with st.expander("Latency per Tahap"):
+        telemetry_panel()
+    rerun_panel = st.expander("Rerun Cost")
+
+# PANEL ANALISIS
+def apply_job_result(q_id, upload_hash, result):
+    """Simpan hasil job yang selesai ke session state."""
+    st.session_state["assessment_results"] = [
+        r for r in st.session_state["assessment_results"] if r["id"] != q_id
+    ]
+    st.session_state["assessment_results"].append(
+        {
+            "id": q_id,
+            "score": result["score"],
+            "reason": result["reason"],
+            "transcript": result["transcript"],
+            "metrics": result["metrics"],
+        }
+    )
+    st.session_state["assessment_results"].sort(key=lambda x: x["id"])
+    st.session_state["last_analysis"] = {
+        "id": q_id,
+        "hash": upload_hash,
+        "upload_stats": result.get("upload_stats") or {},
+    }
+    st.session_state.pop("final_report", None)
+
+
+def render_partial_grade(partial_text):
+    """Skor & alasan yang sedang di-stream LLM (partial_text tahap grade)."""
+    try:
+        partial = json.loads(partial_text)
+    except json.JSONDecodeError:
+        # Job dari worker versi lama: partial_text masih berisi transkrip
+        return
+    if partial["score"] is None and not partial["reason"]:
+        return
+    if partial["score"] is not None:
+        st.metric("AI Score", f"{partial['score']}/{role.max_score}")
+    with st.tabs(["🧠 AI Reasoning"])[0]:
+        st.markdown("**Alasan Penilaian:**")
+        st.info(partial["reason"] + " ▌")
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress_panel():
+    """Poll status job aktif; hasil yang selesai dipindah ke session state."""
+    active_jobs = st.session_state["active_jobs"]
+    if not active_jobs:
+        return
+    fragment_cost = start_run_cost("jobs")
+    queue = get_job_queue()
+    finished = False
+    for q_id, job_id in sorted(active_jobs.items()):
+        try:
+            upload_hash, result = load_job_result(job_id)
+        except KeyError:
+            job = queue.get(job_id)
+        else:
+            apply_job_result(q_id, upload_hash, result)
+            del active_jobs[q_id]
+            finished = True
+            continue
+
+        if job is None or job["status"] == JOB_FAILED:
+            st.session_state["job_errors"][q_id] = (
+                job["error"] if job else "Job tidak ditemukan"
+            )
+            del active_jobs[q_id]
+            st.query_params.pop(f"job{q_id}", None)
+            finished = True
+        elif job["status"] == JOB_QUEUED:
+            st.caption(
+                f"Soal {q_id}: menunggu di antrian "
+                f"(posisi {queue.queue_position(job_id) + 1})"
+            )
+        else:
+            stage = {
+                "extract": "1/3 Mengekstrak Audio...",
+                "transcribe": "2/3 Mendengarkan & Transkripsi...",
+                "grade": "3/3 Agentic AI sedang menilai (Reasoning)...",
+            }.get(job["stage"], "Memulai...")
+            st.progress(job["progress"], text=f"Soal {q_id}: {stage}")
+            if job["partial_text"] and job["stage"] == "transcribe":
+                st.caption(job["partial_text"][-500:])
+            elif job["partial_text"] and job["stage"] == "grade":
+                render_partial_grade(job["partial_text"])
+    finish_run_cost(fragment_cost)
+    if finished:
+        # Full rerun agar progress di sidebar & hasil ikut ter-update
+        st.rerun(scope="app")
+
+
+def render_analysis_result(q_id):
+    """Tampilkan hasil yang tersimpan di session state (tanpa hitung ulang)."""
+    result = next(
+        (r for r in st.session_state["assessment_results"] if r["id"] == q_id), None
+    )
+    if result is None:
+        return
+    score, nlp_metrics = result["score"], result["metrics"]
+
+    upload_stats = st.session_state["last_analysis"]["upload_stats"]
+    if upload_stats:
+        st.caption(
+            f"Upload {upload_stats['format'].upper()}: "
+            f"{upload_stats['upload_bytes'] / 1e6:.2f} MB "
+            f"(WAV {upload_stats['wav_bytes'] / 1e6:.2f} MB), "
+            f"{upload_stats['upload_seconds']:.1f} detik"
+        )
+
+    # VISUALISASI HASIL
+    st.divider()
+    st.subheader(f"📊 Hasil Analisis (Soal {q_id})")
+
+    # Metrics Row
+    m1, m2, m3 = st.columns(3)
+    m1.metric(
+        "AI Score",
+        f"{score}/{role.max_score}",
+        delta="Pass" if score >= role.pass_score else "Low",
+    )
+    m2.metric("Kecepatan (WPM)", f"{nlp_metrics['wpm']}")
+    m3.metric("Jeda Panjang", f"{nlp_metrics['long_pauses']}x")
+    if nlp_metrics.get("timing_source") == "words":
+        # Dari timestamp per kata (hasil lama tidak memiliki field ini)
+        st.caption(
+            f"Articulation rate: {nlp_metrics['articulation_rate']} WPM · "
+            f"jeda median {nlp_metrics['median_pause']} detik · "
+            f"filler {nlp_metrics['filler_rate']} per 100 kata"
+        )
+
+    # Analysis & Transcript Tabs
+    tab1, tab2 = st.tabs(["📝 Transkrip", "🧠 AI Reasoning"])
+
+    with tab1:
+        st.text_area("Hasil Transkripsi:", value=result["transcript"], height=200)
+
+    with tab2:
+        st.markdown(f"**Alasan Penilaian:**")
+        st.info(result["reason"])
+
+
+@st.fragment
+def analysis_panel(q_id, upload_hash, input_path):
+    fragment_cost = start_run_cost("analysis")
+    if st.button("Analysis Video", type="primary"):
+        # Pipeline berjalan di worker process; app hanya submit & poll.
+        # Job identik (file & soal sama) yang sudah ada dipakai ulang.
+        job_id = get_job_queue().submit(
+            {
+                "input_path": input_path,
+                "question_id": q_id,
+                "upload_hash": upload_hash,
+                "role": role.role_id,
+            },
+            dedupe_key=f"{upload_hash}:{role.role_id}:{q_id}",
+        )
+        count_cost("diskWrites")
+        workspace.touch(input_path)
+        st.session_state["active_jobs"][q_id] = job_id
+        st.session_state["job_errors"].pop(q_id, None)
+        st.query_params[f"job{q_id}"] = job_id
+        st.toast(f"Soal {q_id} masuk antrian analisis")
+
+    job_error = st.session_state["job_errors"].get(q_id)
+    if job_error:
+        st.error(f"System Error: {job_error}")
+
+    last_analysis = st.session_state.get("last_analysis")
+    if last_analysis and last_analysis["id"] == q_id and last_analysis["hash"] == upload_hash:
+        render_analysis_result(q_id)
+    finish_run_cost(fragment_cost)
+
+
 # MAIN FLOW
 
 # Pilih Soal
 q_id = st.selectbox(
     "Pilih Soal Wawancara:",
-    options=[1, 2, 3, 4, 5],
-    format_func=lambda x: f"Q{x}: {RUBRIC_CONFIG[x]['question'][:80]}...",
+    options=role.question_ids,
+    format_func=lambda x: f"Q{x}: {role.question(x)['question'][:80]}...",
 )
-st.info(f"**Soal Lengkap:** {RUBRIC_CONFIG[q_id]['question']}")
+st.info(f"**Soal Lengkap:** {role.question(q_id)['question']}")
 
 # Upload
 uploaded_file = st.file_uploader(
@@ -70,159 +536,142 @@ uploaded_file = st.file_uploader(
 )
 
 if uploaded_file:
-    # Save & Process Files
-    input_path = TEMP_DIR / uploaded_file.name
-    audio_path = TEMP_DIR / "temp_audio.wav"
-    with open(input_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+    # Save & Process Files (sekali per upload; persiapan media di background)
+    upload_name = f"{uploaded_file.file_id[:8]}_{uploaded_file.name}"
+    is_video = Path(uploaded_file.name).suffix.lower() in [".mp4", ".mkv", ".mov"]
+    media_prep = st.session_state.get("media_prep")
+    if (
+        media_prep is None
+        or media_prep["file_id"] != uploaded_file.file_id
+        or not os.path.exists(media_prep["preparation"].input_path)
+    ):
+        input_path = workspace.save_upload(workspace_id, uploaded_file, upload_name)
+        count_cost("diskWrites")
+        preview_path = (
+            workspace.artifact_path(workspace_id, f"fixed_{upload_name}")
+            if is_video
+            else None
+        )
+        media_prep = {
+            "file_id": uploaded_file.file_id,
+            "hash": hash_file(input_path),
+            # Audio dianalisis di worker; di sini cukup preview faststart
+            "preparation": prepare_media(input_path, preview_path),
+        }
+        st.session_state["media_prep"] = media_prep
+    preparation = media_prep["preparation"]
+    input_path = preparation.input_path
+    workspace.touch(input_path, preparation.preview_path)
 
     # Preview
     col_media, col_res = st.columns([1, 2])
     with col_media:
-        if input_path.suffix.lower() in [".mp4", ".mkv", ".mov"]:
-            fixed_path = TEMP_DIR / f"fixed_{uploaded_file.name}"
-            if not fixed_path.exists():
-                fix_video_for_streaming(str(input_path), str(fixed_path))
-            st.video(str(fixed_path))
+        if is_video:
+            if preparation.done():
+                st.video(preparation.preview_path)
+            else:
+                st.video(input_path)
+                if preparation.remux:
+                    st.caption("Menyiapkan versi video yang bisa di-seek...")
         else:
-            st.audio(str(input_path))
+            st.audio(input_path)
 
-    # Action Button
+    # Action Button (fragment: klik hanya me-rerun panel ini)
     with col_res:
-        if st.button("Analysis Video", type="primary"):
-            progress = st.progress(0)
-            status = st.empty()
-
-            try:
-                # Ekstraksi Audio
-                status.text("1/3 Mengekstrak Audio...")
-                if not extract_audio(str(input_path), str(audio_path)):
-                    st.error("Gagal ekstrak audio")
-                    st.stop()
-                progress.progress(30)
-
-                # Transkripsi
-                status.text("2/3 Mendengarkan & Transkripsi...")
-                transcript = transcribe_audio(model, str(audio_path))
-                duration = get_audio_duration(str(audio_path))
-                nlp_metrics = calculate_metrics(transcript, str(audio_path), duration)
-                progress.progress(60)
-
-                # Agentic Reasoning (LLM)
-                status.text("3/3 Agentic AI sedang menilai (Reasoning)...")
-                score, deep_analysis = run_grading_agent(
-                    q_id, transcript, nlp_metrics["wpm"]
-                )
-                progress.progress(100)
-                status.success("Selesai!")
-
-                # Simpan Hasil ke Session State
-                st.session_state["assessment_results"] = [
-                    r for r in st.session_state["assessment_results"] if r["id"] != q_id
-                ]
-
-                # Masukkan data lengkap untuk ditampilkan nanti
-                result_data = {
-                    "id": q_id,
-                    "score": score,
-                    "reason": deep_analysis,
-                    "transcript": transcript,
-                    "metrics": nlp_metrics,
-                }
-                st.session_state["assessment_results"].append(result_data)
-                st.session_state["assessment_results"].sort(key=lambda x: x["id"])
-
-                # VISUALISASI HASIL LANGSUNG
-                st.divider()
-                st.subheader(f"📊 Hasil Analisis (Soal {q_id})")
-
-                # Metrics Row
-                m1, m2, m3 = st.columns(3)
-                m1.metric(
-                    "AI Score", f"{score}/4", delta="Pass" if score >= 3 else "Low"
-                )
-                m2.metric("Kecepatan (WPM)", f"{nlp_metrics['wpm']}")
-                m3.metric("Jeda Panjang", f"{nlp_metrics['long_pauses']}x")
-
-                # Analysis & Transcript Tabs
-                tab1, tab2 = st.tabs(["📝 Transkrip", "🧠 AI Reasoning"])
-
-                with tab1:
-                    st.text_area("Hasil Transkripsi:", value=transcript, height=200)
+        analysis_panel(q_id, media_prep["hash"], input_path)
 
-                with tab2:
-                    st.markdown(f"**Alasan Penilaian:**")
-                    st.info(deep_analysis)
-
-            except Exception as e:
-                st.error(f"System Error: {e}")
-
-# BAGIAN REPORT VIEW-
-# Menampilkan hasil terakhir yang tersimpan di session state (agar tidak hilang saat refresh)
-if st.session_state["assessment_results"] and not uploaded_file:
-    # Hanya tampilkan jika user tidak sedang upload file baru
-    pass
+# Progress job (juga job yang dipulihkan setelah refresh)
+job_progress_panel()
 
 # BAGIAN GENERATE JSON
-st.divider()
-st.subheader("📥 Final Output")
-
-# Cek Kelengkapan Data
-graded_ids = [res["id"] for res in st.session_state["assessment_results"]]
-missing_ids = [i for i in range(1, 6) if i not in graded_ids]
-is_complete = len(missing_ids) == 0
-
-# Logika Tampilan Proteksi
-if not is_complete:
-    st.error(f"⛔ AKSES DITOLAK: Anda baru menilai {len(graded_ids)} dari 5 soal.")
-
-    missing_str = ", ".join([f"Soal {i}" for i in missing_ids])
-    st.markdown(
-        f"""
-    **Laporan lengkap tidak dapat dibuat sebelum semua soal dinilai.**
-    
-    Target yang belum selesai:
-    <div style="background-color: #ffcccc; padding: 10px; border-radius: 5px; color: #990000; font-weight: bold;">
-        ❌ {missing_str}
-    </div>
-    """,
-        unsafe_allow_html=True,
-    )
+@st.fragment
+def final_report_section():
+    fragment_cost = start_run_cost("report")
+    st.divider()
+    st.subheader("📥 Final Output")
+
+    # Cek Kelengkapan Data
+    graded_ids = [res["id"] for res in st.session_state["assessment_results"]]
+    missing_ids = [i for i in role.question_ids if i not in graded_ids]
+    is_complete = len(missing_ids) == 0
+
+    # Logika Tampilan Proteksi
+    if not is_complete:
+        st.error(
+            f"⛔ AKSES DITOLAK: Anda baru menilai {len(graded_ids)} "
+            f"dari {len(role.questions)} soal."
+        )
 
-    st.button(
-        "📥 Generate Final Report (JSON)",
-        disabled=True,
-        help="Selesaikan semua soal dulu!",
-    )
+        missing_str = ", ".join([f"Soal {i}" for i in missing_ids])
+        st.markdown(
+            f"""
+        **Laporan lengkap tidak dapat dibuat sebelum semua soal dinilai.**
+        
+        Target yang belum selesai:
+        <div style="background-color: #ffcccc; padding: 10px; border-radius: 5px; color: #990000; font-weight: bold;">
+            ❌ {missing_str}
+        </div>
+        """,
+            unsafe_allow_html=True,
+        )
 
-else:
-    st.success("✅ Semua 5 soal telah dinilai. Siap generate laporan.")
+        st.button(
+            "📥 Generate Final Report (JSON)",
+            disabled=True,
+            help="Selesaikan semua soal dulu!",
+        )
 
-    if st.button("📥 Generate Final Report (JSON)", type="primary"):
+    else:
+        st.success(
+            f"✅ Semua {len(role.questions)} soal telah dinilai. "
+            "Siap generate laporan."
+        )
 
-        with st.spinner("Membuat kesimpulan akhir..."):
-            from src.agent_engine import generate_overall_summary
+        if st.button("📥 Generate Final Report (JSON)", type="primary"):
 
-            # Generate Overall Summary
-            overall_summary = generate_overall_summary(
-                st.session_state["assessment_results"]
-            )
+            with st.spinner("Membuat kesimpulan akhir..."):
+                # Generate Overall Summary (di-stream; ter-cache per isi hasil)
+                summary_placeholder = st.empty()
+                overall_summary = summarize_results(
+                    st.session_state["assessment_results"],
+                    summary_placeholder,
+                    role_id=role.role_id,
+                )
+                summary_placeholder.empty()
+
+                # Generate Payload
+                st.session_state["final_report"] = generate_final_json(
+                    {},
+                    st.session_state["assessment_results"],
+                    ai_overall_notes=overall_summary,
+                    role_id=role.role_id,
+                )
 
-            # Generate Payload
-            payload = generate_final_json(
-                {},
-                st.session_state["assessment_results"],
-                ai_overall_notes=overall_summary,
+            st.balloons()
+
+        # Payload disimpan di session state: download tidak memicu generate ulang
+        payload = st.session_state.get("final_report")
+        if payload:
+            st.subheader("Preview Hasil JSON:")
+            st.json(payload)
+
+            json_str = json.dumps(payload, indent=2)
+            st.download_button(
+                label="💾 Download File JSON",
+                data=json_str,
+                file_name="final_assessment_result.json",
+                mime="application/json",
+                on_click="ignore",
             )
+    finish_run_cost(fragment_cost)
 
-        st.balloons()
-        st.subheader("Preview Hasil JSON:")
-        st.json(payload)
 
-        json_str = json.dumps(payload, indent=2)
-        st.download_button(
-            label="💾 Download File JSON",
-            data=json_str,
-            file_name="final_assessment_result.json",
-            mime="application/json",
-        )
+final_report_section()
+finish_run_cost(run_cost)
+
+# Panel biaya rerun: durasi & kerja berat per run (terbaru di atas)
+with rerun_panel:
+    st.dataframe(
+        list(reversed(st.session_state.get("rerun_log", []))),
+        hide_index=True,
+    )
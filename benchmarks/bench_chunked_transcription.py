@@ -0,0 +1,104 @@
+"""
+Benchmark transkripsi Groq ber-chunk: wall-clock vs jumlah potongan.
+
+Groq disimulasikan oleh server lokal OpenAI-compatible yang waktu responsnya
+sebanding dengan panjang audio yang di-upload (latency dasar + RTF), jadi
+benchmark ini mengukur efek chunking & paralelisme, bukan kualitas model.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_chunked_transcription
+    python -m benchmarks.bench_chunked_transcription --minutes 10 --workers 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import soundfile as sf
+from openai import OpenAI
+
+import src.transcription as transcription
+from benchmarks.bench_pause_detection import write_synthetic_speech
+from src.audio_processing import AudioBuffer
+
+WAV_BYTES_PER_SECOND = 16000 * 2
+
+
+def make_handler(base_latency, rtf):
+    class FakeTranscriptionHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("content-length", 0))
+            self.rfile.read(length)
+            seconds = length / WAV_BYTES_PER_SECOND
+            time.sleep(base_latency + seconds * rtf)
+            body = json.dumps(
+                {
+                    "text": "chunk",
+                    "duration": seconds,
+                    "segments": [{"start": 0.0, "end": seconds, "text": "chunk"}],
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FakeTranscriptionHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=transcription.CLOUD_CHUNK_WORKERS)
+    parser.add_argument("--base-latency", type=float, default=0.3)
+    parser.add_argument(
+        "--rtf", type=float, default=0.02, help="Detik proses per detik audio (server)."
+    )
+    parser.add_argument(
+        "--chunk-seconds", type=float, nargs="+", default=[1e9, 300, 120, 60, 30]
+    )
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_handler(args.base_latency, args.rtf)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = OpenAI(
+        base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="bench"
+    )
+    transcription.CLOUD_CHUNK_WORKERS = args.workers
+    # Server menghitung durasi dari ukuran upload, jadi pakai WAV apa adanya
+    transcription.CLOUD_UPLOAD_FORMAT = "wav"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "speech.wav")
+        write_synthetic_speech(path, args.minutes)
+        samples, sr = sf.read(path, dtype="float32")
+    audio = AudioBuffer(samples, sr)
+
+    print(f"Audio {args.minutes:g} menit, {args.workers} worker paralel")
+    print(f"{'max chunk':>10} | {'chunks':>6} | {'wall (s)':>8} | {'speedup':>7}")
+    baseline = None
+    for chunk_seconds in args.chunk_seconds:
+        n_chunks = len(transcription.plan_chunks(audio, chunk_seconds))
+        t0 = time.perf_counter()
+        list(transcription._stream_cloud_chunks(client, audio, chunk_seconds))
+        elapsed = time.perf_counter() - t0
+        baseline = baseline or elapsed
+        label = "tanpa" if chunk_seconds >= audio.duration else f"{chunk_seconds:g}s"
+        print(
+            f"{label:>10} | {n_chunks:>6} | {elapsed:>8.2f} | {baseline / elapsed:>6.1f}x"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark ingestion audio per format: decode_audio (fast path soundfile /
+TranscodeWorker PyAV) vs subprocess FFmpeg per file (jalur lama), semua dengan
+normalize_gain yang sama.
+
+Input dibuat dari audio sintetis lalu dikonversi FFmpeg ke beberapa format.
+Waktu yang dilaporkan adalah median dari beberapa pengulangan (setelah
+warm-up), termasuk normalisasi gain.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_ingestion
+    python -m benchmarks.bench_ingestion --seconds 10 60 --repeats 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from src.audio_processing import (
+    _decode_audio_ffmpeg,
+    decode_audio,
+    get_ffmpeg_path,
+    is_conformant_audio,
+)
+from benchmarks.bench_pause_detection import write_synthetic_speech
+
+# nama -> (ekstensi, argumen FFmpeg untuk membuat input)
+FORMATS = {
+    "wav16k-mono": ("wav", ["-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le"]),
+    "wav44k-stereo": ("wav", ["-ar", "44100", "-ac", "2", "-c:a", "pcm_s16le"]),
+    "flac16k-mono": ("flac", ["-ar", "16000", "-ac", "1", "-c:a", "flac"]),
+    "mp4-aac": ("mp4", ["-ar", "44100", "-ac", "2", "-c:a", "aac", "-b:a", "128k"]),
+    "mkv-opus": ("mkv", ["-ar", "48000", "-ac", "2", "-c:a", "libopus", "-b:a", "64k"]),
+}
+
+
+def make_inputs(tmp, seconds):
+    source = os.path.join(tmp, f"source_{seconds}.wav")
+    write_synthetic_speech(source, seconds / 60)
+    paths = {}
+    for name, (extension, ffmpeg_args) in FORMATS.items():
+        path = os.path.join(tmp, f"{name}_{seconds}.{extension}")
+        subprocess.run(
+            [get_ffmpeg_path(), "-y", "-loglevel", "error", "-i", source, *ffmpeg_args, path],
+            check=True,
+        )
+        paths[name] = path
+    return paths
+
+
+def median_ms(func, path, repeats):
+    func(path)
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func(path)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[10, 60])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'format':>14} | {'detik':>5} | {'jalur':>9} | "
+        f"{'ffmpeg ms':>9} | {'baru ms':>8} | {'speedup':>7}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for seconds in args.seconds:
+            for name, path in make_inputs(tmp, seconds).items():
+                route = "langsung" if is_conformant_audio(path) else "transcode"
+                legacy = median_ms(_decode_audio_ffmpeg, path, args.repeats)
+                new = median_ms(decode_audio, path, args.repeats)
+                print(
+                    f"{name:>14} | {seconds:>5g} | {route:>9} | "
+                    f"{legacy:>9.1f} | {new:>8.1f} | {legacy / new:>6.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark deteksi jeda: detect_pauses (vectorized, per blok) vs implementasi
+lama (librosa.load + librosa.effects.split + loop Python).
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_pause_detection
+    python -m benchmarks.bench_pause_detection --minutes 1 10
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from src.nlp_analysis import detect_pauses
+
+SR = 16000
+
+
+def legacy_long_pauses(audio_path, pause_threshold=2.0):
+    """Implementasi calculate_metrics sebelum detect_pauses."""
+    long_pauses = 0
+    y, sr = librosa.load(audio_path, sr=16000)
+    non_silent_intervals = librosa.effects.split(y, top_db=25)
+    if len(non_silent_intervals) > 1:
+        for i in range(len(non_silent_intervals) - 1):
+            end_prev = non_silent_intervals[i][1]
+            start_next = non_silent_intervals[i + 1][0]
+            silence_seconds = (start_next - end_prev) / sr
+            if silence_seconds > pause_threshold:
+                long_pauses += 1
+    return long_pauses
+
+
+def write_synthetic_speech(path, minutes, seed=0):
+    """
+    Tulis WAV sintetis: burst nada termodulasi (mirip suku kata) diselingi
+    jeda acak 0.1-3.5 detik. Ditulis per blok agar hemat memori.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SR)
+    written = 0
+    with sf.SoundFile(path, "w", samplerate=SR, channels=1, subtype="PCM_16") as f:
+        while written < total:
+            speech_len = int(rng.uniform(0.5, 4.0) * SR)
+            t = np.arange(speech_len) / SR
+            envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4.0 * t)
+            burst = 0.3 * envelope * np.sin(2 * np.pi * rng.uniform(120, 250) * t)
+            pause = np.zeros(int(rng.uniform(0.1, 3.5) * SR))
+            noise = 0.001 * rng.standard_normal(speech_len + len(pause))
+            chunk = (np.concatenate([burst, pause]) + noise)[: total - written]
+            f.write(chunk.astype(np.float32))
+            written += len(chunk)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 10, 60])
+    args = parser.parse_args()
+
+    print(
+        f"{'durasi':>8} | {'legacy (s)':>10} {'peak MB':>8} {'jeda':>5} | "
+        f"{'baru (s)':>9} {'peak MB':>8} {'jeda':>5} | {'speedup':>7}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        # Warm-up (JIT numba di librosa) agar tidak masuk ke pengukuran
+        warmup_path = os.path.join(tmp, "warmup.wav")
+        write_synthetic_speech(warmup_path, 0.1)
+        legacy_long_pauses(warmup_path)
+        detect_pauses(warmup_path)
+
+        for minutes in args.minutes:
+            path = os.path.join(tmp, f"speech_{minutes}m.wav")
+            write_synthetic_speech(path, minutes)
+
+            old_count, old_t, old_mem = measure(legacy_long_pauses, path)
+            stats, new_t, new_mem = measure(detect_pauses, path)
+            print(
+                f"{minutes:>6g}m | {old_t:>10.2f} {old_mem:>8.1f} {old_count:>5} | "
+                f"{new_t:>9.2f} {new_mem:>8.1f} {stats['long_pauses']:>5} | "
+                f"{old_t / new_t:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
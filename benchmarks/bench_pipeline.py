@@ -0,0 +1,429 @@
+"""
+Benchmark per tahap pipeline assessment dengan media sintetis & stub LLM.
+
+Input dibuat deterministik (seed tetap): burst nada mirip suku kata dengan
+jeda terkontrol (write_synthetic_speech), lalu dikonversi ke WAV, MP4
+(H.264 + AAC, moov di akhir file) dan MKV (H.264 + Opus) untuk beberapa
+durasi. Tahap yang diukur per input:
+    fix_video_for_streaming, extract_audio, decode_audio, get_audio_duration,
+    transcribe_audio, calculate_metrics, run_grading_agent
+
+transcribe_audio memakai model lokal CPU (ModelManager) jika ada di
+LOCAL_MODEL_PATH; jika tidak, memakai stub Groq. run_grading_agent selalu
+memanggil stub OpenAI-compatible in-process (tanpa jaringan & API key).
+
+Per tahap dilaporkan p50/p95 latency, RSS puncak proses (di-sampling selama
+tahap berjalan; memori subprocess FFmpeg tidak termasuk) dan real-time factor
+(detik proses per detik audio). Hasil disimpan sebagai JSON agar bisa
+dibandingkan antar commit:
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --seconds 10 60 --repeats 5
+    python -m benchmarks.bench_pipeline --compare temp/benchmarks/pipeline-abc1234.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from benchmarks.bench_pause_detection import write_synthetic_speech
+from src.model_manager import get_process_rss
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "temp", "benchmarks")
+
+WAV_BYTES_PER_SECOND = 16000 * 2
+RSS_SAMPLE_SECONDS = 0.005
+STUB_WORD_SECONDS = 0.4
+
+# nama -> (ekstensi, argumen FFmpeg). Video kecil dari lavfi agar fokus ke audio.
+FORMATS = {
+    "wav": ("wav", None),
+    "mp4": ("mp4", ["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac"]),
+    "mkv": ("mkv", ["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "libopus"]),
+}
+STAGES = [
+    "fix_video_for_streaming",
+    "extract_audio",
+    "decode_audio",
+    "get_audio_duration",
+    "transcribe_audio",
+    "calculate_metrics",
+    "run_grading_agent",
+]
+
+# Jawaban tetap untuk tahap grading (lolos pre-scoring, jadi LLM stub dipanggil)
+GRADING_QUESTION_ID = 4
+GRADING_TRANSCRIPT = (
+    "In TensorFlow I add a Dropout layer after the dense layers, for example "
+    "tf.keras.layers.Dropout(0.5). During training it randomly sets half of the "
+    "activations to zero, which prevents co-adaptation and reduces overfitting, "
+    "and at inference time dropout is disabled automatically."
+)
+STUB_WORDS = GRADING_TRANSCRIPT.split()
+
+
+def make_stub_handler(llm_latency):
+    """Stub OpenAI-compatible: transkripsi (durasi dari ukuran WAV) & chat."""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _transcription(self, length):
+            seconds = length / WAV_BYTES_PER_SECOND
+            last_start = max(seconds - STUB_WORD_SECONDS, 0.0)
+            starts = np.arange(0.0, last_start, STUB_WORD_SECONDS)
+            words = [
+                {
+                    "word": STUB_WORDS[i % len(STUB_WORDS)],
+                    "start": round(float(start), 2),
+                    "end": round(float(start) + STUB_WORD_SECONDS * 0.8, 2),
+                }
+                for i, start in enumerate(starts)
+            ]
+            text = " ".join(w["word"] for w in words)
+            return {
+                "text": text,
+                "duration": seconds,
+                "segments": [
+                    {
+                        "start": 0.0,
+                        "end": seconds,
+                        "text": text,
+                        "no_speech_prob": 0.01,
+                        "avg_logprob": -0.2,
+                    }
+                ],
+                "words": words,
+            }
+
+        def _chat(self):
+            time.sleep(llm_latency)
+            content = json.dumps(
+                {"score": 3, "reason": "Stub grading: explains implementation and effect."}
+            )
+            return {
+                "id": "stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 400,
+                    "completion_tokens": 40,
+                    "total_tokens": 440,
+                },
+            }
+
+        def do_POST(self):
+            length = int(self.headers.get("content-length", 0))
+            self.rfile.read(length)
+            if self.path.endswith("/audio/transcriptions"):
+                self._send_json(self._transcription(length))
+            else:
+                self._send_json(self._chat())
+
+    return StubHandler
+
+
+class RssSampler:
+    """Sampling RSS proses di background thread selama sebuah tahap berjalan."""
+
+    def __init__(self):
+        self.peak = get_process_rss() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, get_process_rss() or 0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, get_process_rss() or 0)
+
+
+def make_inputs(tmp, seconds):
+    """Media sintetis deterministik per format untuk satu durasi."""
+    from src.audio_processing import get_ffmpeg_path
+
+    source = os.path.join(tmp, f"source_{seconds:g}.wav")
+    write_synthetic_speech(source, seconds / 60, seed=0)
+    paths = {}
+    for name, (extension, codec_args) in FORMATS.items():
+        if codec_args is None:
+            paths[name] = source
+            continue
+        path = os.path.join(tmp, f"input_{seconds:g}.{extension}")
+        subprocess.run(
+            [
+                get_ffmpeg_path(), "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"color=c=gray:s=320x240:r=15:d={seconds}",
+                "-i", source,
+                *codec_args,
+                "-shortest",
+                path,
+            ],
+            check=True,
+        )
+        paths[name] = path
+    return paths
+
+
+def setup_stubs(tmp, llm_latency):
+    """Jalankan stub server & arahkan client Groq/LLM + cache ke sandbox."""
+    from openai import OpenAI
+
+    import src.agent_engine as agent_engine
+    import src.transcription as transcription
+    from src.cache import ResultCache
+    from src.llm_cache import LLMResponseCache
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_handler(llm_latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+    agent_engine._groq_api_keys = ["bench-key"]
+    agent_engine._key_pool = None
+    agent_engine.get_groq_client = lambda api_key: OpenAI(
+        base_url=base_url, api_key=api_key, max_retries=0
+    )
+    bench_cache = ResultCache(os.path.join(tmp, "cache", "bench.sqlite"))
+    agent_engine.get_result_cache = lambda: bench_cache
+    agent_engine.get_llm_cache = lambda: LLMResponseCache(persistent=None)
+    # Stub menghitung durasi dari ukuran upload, jadi kirim WAV apa adanya
+    transcription.CLOUD_UPLOAD_FORMAT = "wav"
+    return server, OpenAI(base_url=base_url, api_key="bench-key")
+
+
+def get_transcriber(stub_client):
+    """(model_or_client, label): model lokal CPU jika tersedia, selain itu stub."""
+    from src.model_manager import LOCAL_MODEL_PATH, get_model_manager
+
+    if os.path.exists(LOCAL_MODEL_PATH):
+        manager = get_model_manager()
+        manager.warm_up()
+        return manager, f"local:{LOCAL_MODEL_PATH}"
+    return stub_client, "stub-groq"
+
+
+def run_stage(func, repeats):
+    """Jalankan `func(i)` sekali (warm-up) lalu `repeats` kali; kembalikan statistik."""
+    result = func(-1)
+    timings = []
+    with RssSampler() as sampler:
+        for i in range(repeats):
+            t0 = time.perf_counter()
+            result = func(i)
+            timings.append(time.perf_counter() - t0)
+    return result, np.array(timings), sampler.peak
+
+
+def summarize(stage, fmt, seconds, timings, peak_rss, audio_seconds):
+    p50 = float(np.percentile(timings, 50))
+    return {
+        "format": fmt,
+        "seconds": seconds,
+        "stage": stage,
+        "repeats": int(timings.size),
+        "p50Ms": round(p50 * 1000, 2),
+        "p95Ms": round(float(np.percentile(timings, 95)) * 1000, 2),
+        "meanMs": round(float(timings.mean()) * 1000, 2),
+        "peakRssMB": round(peak_rss / 1e6, 1),
+        "rtf": round(p50 / audio_seconds, 4) if audio_seconds else None,
+    }
+
+
+def bench_input(fmt, path, seconds, tmp, transcriber, repeats, stages):
+    from src.agent_engine import run_grading_agent
+    from src.audio_processing import (
+        decode_audio,
+        extract_audio,
+        fix_video_for_streaming,
+        get_audio_duration,
+    )
+    from src.nlp_analysis import calculate_metrics
+    from src.transcription import transcribe_with_words
+
+    rows = []
+
+    def record(stage, func):
+        if stage not in stages:
+            return None
+        result, timings, peak = run_stage(func, repeats)
+        rows.append(summarize(stage, fmt, seconds, timings, peak, seconds))
+        return result
+
+    if fmt != "wav":
+        record(
+            "fix_video_for_streaming",
+            lambda i: fix_video_for_streaming(
+                path, os.path.join(tmp, f"faststart_{seconds:g}.{fmt}")
+            ),
+        )
+    record(
+        "extract_audio",
+        lambda i: extract_audio(path, os.path.join(tmp, f"extract_{fmt}_{seconds:g}.wav")),
+    )
+    audio = decode_audio(path)
+    record("decode_audio", lambda i: decode_audio(path))
+    duration = get_audio_duration(audio)
+    record("get_audio_duration", lambda i: get_audio_duration(audio))
+
+    transcript, words, signals = GRADING_TRANSCRIPT, [], {}
+    transcribed = record(
+        "transcribe_audio", lambda i: transcribe_with_words(transcriber, audio)
+    )
+    if transcribed is not None:
+        transcript, words, signals = transcribed
+    record(
+        "calculate_metrics",
+        lambda i: calculate_metrics(transcript, words, duration, signals),
+    )
+    # Transkrip dibedakan per ulangan agar cache hasil/LLM tidak pernah hit
+    record(
+        "run_grading_agent",
+        lambda i: run_grading_agent(
+            GRADING_QUESTION_ID, f"{GRADING_TRANSCRIPT} (take {seconds:g}-{fmt}-{i})", 120
+        ),
+    )
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path):
+    """Cetak perubahan p50 per tahap dibanding file JSON baseline."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {
+        (r["format"], r["seconds"], r["stage"]): r for r in baseline["results"]
+    }
+    print(f"\nPerbandingan p50 vs {baseline.get('commit') or baseline_path}:")
+    print(
+        f"{'format':>6} | {'detik':>5} | {'tahap':<24} | "
+        f"{'lama ms':>9} | {'baru ms':>9} | {'delta':>7}"
+    )
+    for row in results:
+        old = previous.get((row["format"], row["seconds"], row["stage"]))
+        if old is None:
+            continue
+        delta = (
+            (row["p50Ms"] - old["p50Ms"]) / old["p50Ms"] * 100 if old["p50Ms"] else 0.0
+        )
+        print(
+            f"{row['format']:>6} | {row['seconds']:>5g} | {row['stage']:<24} | "
+            f"{old['p50Ms']:>9.1f} | {row['p50Ms']:>9.1f} | {delta:>+6.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[10, 30, 60])
+    parser.add_argument(
+        "--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS)
+    )
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.0, help="Latency stub LLM (detik)."
+    )
+    parser.add_argument("--output", default=None, help="Path file JSON hasil.")
+    parser.add_argument("--compare", default=None, help="JSON baseline pembanding.")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        server, stub_client = setup_stubs(tmp, args.llm_latency)
+        transcriber, transcriber_label = get_transcriber(stub_client)
+        print(f"Transcriber: {transcriber_label}")
+        print(
+            f"{'format':>6} | {'detik':>5} | {'tahap':<24} | {'p50 ms':>9} | "
+            f"{'p95 ms':>9} | {'RSS MB':>7} | {'RTF':>7}"
+        )
+        for seconds in args.seconds:
+            inputs = make_inputs(tmp, seconds)
+            for fmt in args.formats:
+                rows = bench_input(
+                    fmt, inputs[fmt], seconds, tmp, transcriber, args.repeats, args.stages
+                )
+                for row in rows:
+                    print(
+                        f"{fmt:>6} | {seconds:>5g} | {row['stage']:<24} | "
+                        f"{row['p50Ms']:>9.1f} | {row['p95Ms']:>9.1f} | "
+                        f"{row['peakRssMB']:>7.0f} | {row['rtf']:>7.4f}"
+                    )
+                results.extend(rows)
+        server.shutdown()
+
+    report = {
+        "commit": commit,
+        "createdAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "transcriber": transcriber_label,
+        "config": {
+            "seconds": args.seconds,
+            "formats": args.formats,
+            "repeats": args.repeats,
+            "llmLatency": args.llm_latency,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"pipeline-{commit or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nHasil tersimpan di: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
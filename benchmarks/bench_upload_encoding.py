@@ -0,0 +1,105 @@
+"""
+Benchmark format upload untuk transkripsi cloud: ukuran, waktu encode,
+estimasi waktu upload, dan (opsional) akurasi relatif terhadap WAV.
+
+Akurasi diukur dengan mentranskripsi ulang audio hasil decode tiap format
+memakai model faster-whisper lokal, lalu menghitung WER terhadap transkrip
+WAV. Tanpa --model, hanya ukuran & waktu yang diukur. Audio sintetis
+(default) berisi noise sehingga rasio FLAC-nya pesimistis; gunakan --input
+dengan rekaman jawaban asli untuk angka yang representatif.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_upload_encoding --input jawaban.mp4
+    python -m benchmarks.bench_upload_encoding --input jawaban.mp4 \\
+        --model models/whisper-large-v3-turbo-ct2-int8
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from src.audio_processing import decode_audio
+from benchmarks.bench_pause_detection import write_synthetic_speech
+
+FORMATS = ["wav", "flac", "opus"]
+
+
+def word_error_rate(reference, hypothesis):
+    """WER sederhana (Levenshtein tingkat kata)."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ref_word != hyp_word),
+                )
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", help="File audio/video (default: audio sintetis).")
+    parser.add_argument("--model", help="Path model faster-whisper untuk uji akurasi.")
+    parser.add_argument(
+        "--mbps", type=float, default=10.0, help="Bandwidth upload (Mbit/s)."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = args.input
+        if not input_path:
+            input_path = os.path.join(tmp, "speech.wav")
+            write_synthetic_speech(input_path, 2)
+        audio = decode_audio(input_path)
+    if audio is None:
+        raise SystemExit("Gagal decode input.")
+
+    model = None
+    if args.model:
+        from faster_whisper import WhisperModel, decode_audio as fw_decode
+
+        model = WhisperModel(args.model, device="cpu", compute_type="int8")
+
+    print(f"Audio {audio.duration:.1f} detik")
+    print(
+        f"{'format':>6} | {'KB':>8} | {'rasio':>5} | {'KB/menit':>8} | "
+        f"{'encode ms':>9} | {'upload s':>8} | {'WER vs WAV':>10}"
+    )
+    reference = None
+    wav_size = None
+    for fmt in FORMATS:
+        t0 = time.perf_counter()
+        payload, _ = audio.encode(fmt)
+        encode_ms = (time.perf_counter() - t0) * 1000
+        wav_size = wav_size or len(payload)
+        upload_seconds = len(payload) * 8 / (args.mbps * 1e6)
+
+        wer = "-"
+        if model is not None:
+            samples = fw_decode(io.BytesIO(payload), sampling_rate=16000)
+            segments, _ = model.transcribe(samples, language="en", beam_size=5)
+            text = " ".join(s.text.strip() for s in segments)
+            if reference is None:
+                reference = text
+            wer = f"{word_error_rate(reference, text):.3f}"
+
+        print(
+            f"{fmt:>6} | {len(payload) / 1024:>8.0f} | "
+            f"{len(payload) / wav_size:>5.2f} | "
+            f"{len(payload) / 1024 / (audio.duration / 60):>8.0f} | "
+            f"{encode_ms:>9.0f} | {upload_seconds:>8.2f} | {wer:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,554 @@
+"""
+Load test multi-sesi terhadap fake server Groq lokal (OpenAI-compatible).
+
+Setiap sesi mensimulasikan satu assessor: jawaban semua soal role default
+(bank soal) diproses berurutan lewat pipeline worker (src.worker.run_job:
+decode -> transkripsi Groq -> metrik -> grading LLM), lalu ringkasan akhir.
+Sesi dijalankan konkuren (thread) pada beberapa level konkurensi untuk
+mencari titik saturasi node.
+
+Fake server (in-process, tanpa jaringan/API key asli) bisa diatur:
+- latency & jitter respons chat, latency transkripsi sebanding durasi audio
+- rate limit per key (request per jendela waktu) -> 429 + header
+  x-ratelimit-* / retry-after, plus 429 acak
+- injeksi JSON rusak pada respons chat
+
+Aplikasi diarahkan ke fake server lewat env GROQ_BASE_URL; cache hasil &
+LLM di-sandbox agar setiap panggilan benar-benar sampai ke server.
+
+Laporan per level: throughput (jawaban/menit), latency p50/p95/p99 per
+jawaban & per sesi, error rate, fallback rate (percobaan key tambahan per
+panggilan LLM), statistik per key, dan titik saturasi. Hasil disimpan JSON.
+
+Jalankan dari root repo:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --concurrency 1 4 16 32 --keys 3 --key-rate-limit 20
+    python -m benchmarks.load_test --p429 0.05 --p-malformed 0.05 --jitter 0.5
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from benchmarks.bench_pause_detection import write_synthetic_speech
+from benchmarks.bench_pipeline import GRADING_TRANSCRIPT, RESULTS_DIR, git_commit
+
+WAV_BYTES_PER_SECOND = 16000 * 2
+# Level berikutnya dianggap tidak lagi menambah throughput jika naiknya < 10%
+SATURATION_MIN_GAIN = 0.10
+# ... atau jika error rate naik lebih dari 5 poin persen
+SATURATION_MAX_ERROR_RISE = 0.05
+SERVER_COUNTERS = ("requests", "ok", "rateLimited", "malformed")
+TRANSCRIPT_WORDS = GRADING_TRANSCRIPT.split()
+FAKE_CONTENT = json.dumps(
+    {
+        "score": 3,
+        "reason": (
+            "Fake grading: the candidate explains how dropout is implemented and "
+            "why it reduces overfitting. The answer names the key mechanism but "
+            "does not quantify the effect on validation accuracy. Overall it meets "
+            "the rubric for a solid but not exemplary answer."
+        ),
+        "overall_summary": "Fake summary of the candidate.",
+    }
+)
+FAKE_USAGE = {"prompt_tokens": 400, "completion_tokens": 60, "total_tokens": 460}
+# Kira-kira 4 karakter per token
+FAKE_TOKEN_CHARS = 4
+
+
+def _tokens(content):
+    step = FAKE_TOKEN_CHARS
+    return [content[i : i + step] for i in range(0, len(content), step)]
+
+
+class FakeGroq:
+    """State fake server: jendela rate limit & counter per key (thread-safe)."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.windows = {}
+            self.counters = {}
+            self.request_seq = 0
+
+    def _count(self, key, field):
+        counters = self.counters.setdefault(key, dict.fromkeys(SERVER_COUNTERS, 0))
+        counters[field] += 1
+
+    def admit(self, key):
+        """
+        Cek rate limit key. Mengembalikan (status, headers, malformed) dengan
+        status 200 atau 429.
+        """
+        args = self.args
+        now = time.monotonic()
+        with self._lock:
+            self._count(key, "requests")
+            self.request_seq += 1
+            window = self.windows.setdefault(key, deque())
+            while window and window[0] <= now - args.rate_window:
+                window.popleft()
+            limit = args.key_rate_limit
+            if limit and len(window) >= limit:
+                retry_after = window[0] + args.rate_window - now
+                self._count(key, "rateLimited")
+                return 429, self._limit_headers(0, retry_after, retry_after), False
+            if self.rng.random() < args.p429:
+                self._count(key, "rateLimited")
+                return 429, {"retry-after": "1"}, False
+            window.append(now)
+            malformed = self.rng.random() < args.p_malformed
+            self._count(key, "malformed" if malformed else "ok")
+            reset = window[0] + args.rate_window - now
+            remaining = limit - len(window) if limit else None
+            return 200, self._limit_headers(remaining, reset), malformed
+
+    def _limit_headers(self, remaining, reset_seconds, retry_after=None):
+        headers = {}
+        if self.args.key_rate_limit:
+            headers["x-ratelimit-limit-requests"] = str(self.args.key_rate_limit)
+            headers["x-ratelimit-remaining-requests"] = str(remaining)
+            headers["x-ratelimit-reset-requests"] = f"{max(reset_seconds, 0):.2f}s"
+        if retry_after is not None:
+            headers["retry-after"] = f"{max(retry_after, 0.01):.2f}"
+        return headers
+
+    def chat_delay(self):
+        with self._lock:
+            jitter = self.rng.uniform(0, self.args.jitter)
+        return self.args.latency + jitter
+
+    def next_seq(self):
+        with self._lock:
+            self.request_seq += 1
+            return self.request_seq
+
+
+def make_handler(fake):
+    args = fake.args
+
+    class FakeGroqHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def _send(self, status, payload, headers=None, raw=None):
+            body = raw if raw is not None else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _transcription(self, length):
+            seconds = length / WAV_BYTES_PER_SECOND
+            time.sleep(args.transcription_latency + seconds * args.transcription_rtf)
+            # Nomor urut membuat transkrip unik -> cache LLM tidak pernah hit
+            texts = [f"{GRADING_TRANSCRIPT} Reference {fake.next_seq()}."]
+            words = texts[0].split()
+            step = seconds / max(len(words), 1)
+            self._send(
+                200,
+                {
+                    "text": texts[0],
+                    "duration": seconds,
+                    "segments": [
+                        {
+                            "start": 0.0,
+                            "end": seconds,
+                            "text": texts[0],
+                            "no_speech_prob": 0.01,
+                            "avg_logprob": -0.2,
+                        }
+                    ],
+                    "words": [
+                        {"word": w, "start": i * step, "end": (i + 0.8) * step}
+                        for i, w in enumerate(words)
+                    ],
+                },
+            )
+
+        def _stream(self, content, headers):
+            """Kirim content sebagai SSE chat.completion.chunk per token."""
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("connection", "close")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.close_connection = True
+            base = {
+                "id": uuid.uuid4().hex,
+                "created": int(time.time()),
+                "model": "fake",
+            }
+            for token in _tokens(content):
+                chunk = dict(
+                    base,
+                    object="chat.completion.chunk",
+                    choices=[
+                        {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                    ],
+                )
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(args.token_seconds)
+            usage_chunk = dict(
+                base, object="chat.completion.chunk", choices=[], usage=FAKE_USAGE
+            )
+            self.wfile.write(f"data: {json.dumps(usage_chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def _chat(self, key, request):
+            status, headers, malformed = fake.admit(key)
+            time.sleep(fake.chat_delay())
+            if status == 429:
+                self._send(
+                    429,
+                    {
+                        "error": {
+                            "message": "Rate limit reached (fake server)",
+                            "type": "requests",
+                            "code": "rate_limit_exceeded",
+                        }
+                    },
+                    headers,
+                )
+                return
+            content = '{"score": 3, "reason": "truncated' if malformed else FAKE_CONTENT
+            if request.get("stream"):
+                self._stream(content, headers)
+                return
+            # Tanpa streaming: seluruh token dibuat dulu sebelum respons dikirim
+            time.sleep(len(_tokens(content)) * args.token_seconds)
+            self._send(
+                200,
+                {
+                    "id": uuid.uuid4().hex,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "fake",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": FAKE_USAGE,
+                },
+                headers,
+            )
+
+        def do_POST(self):
+            length = int(self.headers.get("content-length", 0))
+            body = self.rfile.read(length)
+            key = self.headers.get("authorization", "").replace("Bearer ", "")
+            if self.path.endswith("/audio/transcriptions"):
+                self._transcription(length)
+            else:
+                self._chat(key, json.loads(body or b"{}"))
+
+    return FakeGroqHandler
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    values = np.asarray(values)
+    return {
+        f"p{q}": round(float(np.percentile(values, q)), 3) for q in (50, 95, 99)
+    }
+
+
+class LlmCallCounter:
+    """Hitung panggilan LLM logis (sebelum fallback antar key) & yang gagal."""
+
+    def __init__(self, agent_engine):
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        original = agent_engine._call_llm_uncached
+
+        def counted(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+            try:
+                return original(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                raise
+
+        agent_engine._call_llm_uncached = counted
+
+    def reset(self):
+        with self._lock:
+            self.calls = self.failures = 0
+
+
+def run_session(level, session, inputs, client):
+    """Satu assessor: semua soal role default berurutan + ringkasan (metrik sesi)."""
+    from src.agent_engine import SUMMARY_ERROR_PREFIX, generate_overall_summary
+    from src.worker import run_job
+
+    answers, errors, results, first_outputs = [], [], [], []
+    t_session = time.perf_counter()
+    for question_id, path in inputs:
+        t0 = time.perf_counter()
+        payload = {
+            "input_path": path,
+            "question_id": question_id,
+            "upload_hash": f"load-{level}-{session}-{question_id}-{uuid.uuid4().hex}",
+        }
+        try:
+            result = run_job(client, payload, lambda *a, **k: None)
+            results.append(result)
+            first_outputs.append(result["timings"]["grade_first_output"])
+        except Exception as e:
+            errors.append(str(e)[:200])
+        answers.append(time.perf_counter() - t0)
+    summary_error = False
+    if results:
+        summary = generate_overall_summary(results)
+        summary_error = summary.startswith(SUMMARY_ERROR_PREFIX)
+    return {
+        "answerSeconds": answers,
+        "gradeFirstOutputSeconds": first_outputs,
+        "answersOk": len(results),
+        "errors": errors,
+        "summaryError": summary_error,
+        "sessionSeconds": time.perf_counter() - t_session,
+    }
+
+
+def run_level(concurrency, sessions, inputs, client, fake, counter):
+    import src.agent_engine as agent_engine
+    import src.llm_cache as llm_cache
+
+    fake.reset()
+    counter.reset()
+    agent_engine._key_pool = None
+    llm_cache._llm_cache = llm_cache.LLMResponseCache(persistent=None)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(
+            pool.map(
+                lambda s: run_session(concurrency, s, inputs, client), range(sessions)
+            )
+        )
+    wall = time.perf_counter() - t0
+
+    answer_seconds = [s for o in outcomes for s in o["answerSeconds"]]
+    answers_ok = sum(o["answersOk"] for o in outcomes)
+    answers_total = len(answer_seconds)
+    errors = [e for o in outcomes for e in o["errors"]]
+    chat_requests = sum(c["requests"] for c in fake.counters.values())
+    pool_stats = {k["key"]: k for k in agent_engine.get_key_pool().stats()}
+    keys = []
+    for key_state in agent_engine.get_key_pool()._keys:
+        server = fake.counters.get(key_state.api_key, {})
+        requests = server.get("requests", 0)
+        failed = server.get("rateLimited", 0) + server.get("malformed", 0)
+        keys.append(
+            {
+                "key": key_state.label,
+                **{k: server.get(k, 0) for k in SERVER_COUNTERS},
+                "errorRate": round(failed / requests, 3) if requests else 0.0,
+                "poolFailures": pool_stats[key_state.label]["failures"],
+            }
+        )
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "wallSeconds": round(wall, 2),
+        "answers": answers_total,
+        "answersOk": answers_ok,
+        "throughputAnswersPerMinute": round(answers_ok / wall * 60, 2) if wall else 0.0,
+        "answerLatencySeconds": percentiles(answer_seconds),
+        # Time-to-first-useful-output tahap grade (skor/alasan pertama tampil)
+        "gradeFirstOutputSeconds": percentiles(
+            [s for o in outcomes for s in o["gradeFirstOutputSeconds"]]
+        ),
+        "sessionLatencySeconds": percentiles([o["sessionSeconds"] for o in outcomes]),
+        "errorRate": round(len(errors) / answers_total, 3) if answers_total else 0.0,
+        "summaryErrors": sum(o["summaryError"] for o in outcomes),
+        "llmCalls": counter.calls,
+        "llmCallFailures": counter.failures,
+        "chatRequests": chat_requests,
+        # Percobaan key tambahan per panggilan LLM (429/JSON rusak -> key lain)
+        "fallbackRate": (
+            round((chat_requests - counter.calls) / counter.calls, 3)
+            if counter.calls
+            else 0.0
+        ),
+        "keys": keys,
+        "sampleErrors": sorted(set(errors))[:3],
+    }
+
+
+def _seconds(value):
+    return f"{value:>6.2f}" if value is not None else f"{'-':>6}"
+
+
+def find_saturation(levels):
+    """
+    Konkurensi terakhir yang masih menaikkan throughput >= SATURATION_MIN_GAIN
+    (None jika throughput masih naik sampai level tertinggi).
+    """
+    for previous, current in zip(levels, levels[1:]):
+        before = previous["throughputAnswersPerMinute"]
+        gain = current["throughputAnswersPerMinute"] / before - 1 if before else 0.0
+        error_rise = current["errorRate"] - previous["errorRate"]
+        error_jump = error_rise > SATURATION_MAX_ERROR_RISE
+        if gain < SATURATION_MIN_GAIN or error_jump:
+            return previous["concurrency"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument(
+        "--sessions-per-slot",
+        type=int,
+        default=2,
+        help="Jumlah sesi per level = konkurensi x nilai ini.",
+    )
+    parser.add_argument("--keys", type=int, default=3, help="Jumlah API key palsu.")
+    parser.add_argument("--answer-seconds", type=float, default=20)
+    parser.add_argument("--latency", type=float, default=0.4, help="Latency chat (s).")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Jitter maks (s).")
+    parser.add_argument(
+        "--token-seconds", type=float, default=0.01, help="Waktu generate per token."
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Matikan streaming LLM (pembanding time-to-first-output).",
+    )
+    parser.add_argument("--transcription-latency", type=float, default=0.2)
+    parser.add_argument(
+        "--transcription-rtf", type=float, default=0.01, help="Detik per detik audio."
+    )
+    parser.add_argument(
+        "--key-rate-limit",
+        type=int,
+        default=30,
+        help="Request chat per key per jendela (0 = tanpa batas).",
+    )
+    parser.add_argument("--rate-window", type=float, default=10.0)
+    parser.add_argument("--p429", type=float, default=0.0, help="Peluang 429 acak.")
+    parser.add_argument("--p-malformed", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Path file JSON hasil.")
+    args = parser.parse_args()
+
+    fake = FakeGroq(args)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Harus diset sebelum modul aplikasi di-import
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+
+    from openai import OpenAI
+
+    import src.agent_engine as agent_engine
+    import src.cache as cache
+    import src.transcription as transcription
+    from src.question_bank import get_role
+
+    commit = git_commit()
+    levels = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "cache", "load.sqlite")
+        cache._result_cache = cache.ResultCache(cache_path)
+        agent_engine._groq_api_keys = [f"fake-key-{i:04d}" for i in range(args.keys)]
+        agent_engine.LLM_STREAMING = not args.no_stream
+        counter = LlmCallCounter(agent_engine)
+        # Fake server menghitung durasi dari ukuran upload, jadi kirim WAV
+        transcription.CLOUD_UPLOAD_FORMAT = "wav"
+        client = OpenAI(
+            base_url=os.environ["GROQ_BASE_URL"],
+            api_key="fake-transcribe",
+            max_retries=0,
+        )
+
+        inputs = []
+        for question_id in get_role().question_ids:
+            path = os.path.join(tmp, f"answer_{question_id}.wav")
+            write_synthetic_speech(path, args.answer_seconds / 60, seed=question_id)
+            inputs.append((question_id, path))
+
+        print(
+            f"{'konk':>4} | {'sesi':>4} | {'jwb/menit':>9} | {'p50 s':>6} | "
+            f"{'p95 s':>6} | {'p99 s':>6} | {'ttfo s':>6} | {'error':>6} | "
+            f"{'fallback':>8}"
+        )
+        for concurrency in sorted(args.concurrency):
+            level = run_level(
+                concurrency,
+                concurrency * args.sessions_per_slot,
+                inputs,
+                client,
+                fake,
+                counter,
+            )
+            levels.append(level)
+            latency = level["answerLatencySeconds"]
+            print(
+                f"{concurrency:>4} | {level['sessions']:>4} | "
+                f"{level['throughputAnswersPerMinute']:>9.1f} | "
+                f"{_seconds(latency['p50'])} | {_seconds(latency['p95'])} | "
+                f"{_seconds(latency['p99'])} | "
+                f"{_seconds(level['gradeFirstOutputSeconds']['p50'])} | "
+                f"{level['errorRate']:>6.1%} | {level['fallbackRate']:>8.2f}"
+            )
+    server.shutdown()
+
+    saturation = find_saturation(levels)
+    print(
+        f"\nTitik saturasi: konkurensi {saturation}"
+        if saturation is not None
+        else "\nThroughput masih naik sampai level tertinggi (belum saturasi)"
+    )
+    report = {
+        "commit": commit,
+        "createdAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "cpuCount": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "saturationConcurrency": saturation,
+        "levels": levels,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil tersimpan di: {output}")
+
+
+if __name__ == "__main__":
+    main()
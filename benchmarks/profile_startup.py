@@ -0,0 +1,118 @@
+"""
+Profil waktu startup: rincian waktu import (python -X importtime) per modul
+top-level, plus waktu cold start app.py sampai halaman pertama selesai
+dirender (Streamlit AppTest). Setiap pengukuran memakai interpreter baru.
+
+Jalankan dari root repo:
+    python -m benchmarks.profile_startup
+    python -m benchmarks.profile_startup --top 15 --repeats 3 --no-app
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modul yang di-import app.py (cold start halaman) & yang dipakai pipeline worker
+TARGETS = {
+    "app": [
+        "streamlit",
+        "src.audio_processing",
+        "src.cache",
+        "src.workspace",
+        "src.job_queue",
+        "src.worker",
+        "src.llm_cache",
+        "src.agent_engine",
+        "src.grading_engine",
+        "src.question_bank",
+    ],
+    "pipeline": [
+        "src.transcription",
+        "src.nlp_analysis",
+        "src.agent_engine",
+    ],
+}
+
+APP_COLD_START = """
+import time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("app.py", default_timeout=300).run()
+print(time.perf_counter() - t0)
+"""
+
+
+def parse_importtime(stderr):
+    """List (modul, self detik, kumulatif detik) untuk import top-level."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        # Indentasi nama = kedalaman import; ambil yang langsung di-import skrip
+        if name.startswith("  "):
+            continue
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return rows
+
+
+def profile_imports(modules):
+    env = dict(os.environ, REVIEW_JOB_WORKERS="0")
+    t0 = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return time.perf_counter() - t0, parse_importtime(result.stderr)
+
+
+def app_cold_start():
+    env = dict(os.environ, REVIEW_JOB_WORKERS="0")
+    result = subprocess.run(
+        [sys.executable, "-c", APP_COLD_START],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-app", action="store_true", help="Lewati cold start AppTest.")
+    args = parser.parse_args()
+
+    for target, modules in TARGETS.items():
+        runs = [profile_imports(modules) for _ in range(args.repeats)]
+        wall = statistics.median(wall for wall, _ in runs)
+        rows = runs[-1][1]
+        print(f"\n== import {target}: {wall:.2f} detik (median proses baru) ==")
+        print(f"{'modul':<40} | {'kumulatif s':>11} | {'self s':>7}")
+        for name, self_s, cumulative_s in sorted(rows, key=lambda r: -r[2])[: args.top]:
+            print(f"{name:<40} | {cumulative_s:>11.3f} | {self_s:>7.3f}")
+
+    if not args.no_app:
+        timings = [app_cold_start() for _ in range(args.repeats)]
+        print(
+            f"\n== cold start app.py (import + render halaman pertama): "
+            f"{statistics.median(timings):.2f} detik (median) =="
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,163 +1,756 @@
+import asyncio
+import copy
+import functools
 import json
-from openai import OpenAI
-from src.rubric_data import RUBRIC_CONFIG
+import os
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.cache import get_result_cache
+from src.key_pool import GroqKeyPool
+from src.llm_cache import get_llm_cache
+from src.llm_stream import parse_json_content, read_stream
+from src.prescoring import prescore_answer
+from src.question_bank import get_role
+from src.telemetry import get_telemetry, increment, span
 import streamlit as st
 from streamlit.runtime.secrets import StreamlitSecretNotFoundError
 
-try:
-    if "GROQ_API_KEYS" in st.secrets:
-        GROQ_API_KEYS = st.secrets["GROQ_API_KEYS"]
-    else:
-        raise ValueError("Konfigurasi 'GROQ_API_KEYS' tidak ditemukan di secrets.")
-    if not GROQ_API_KEYS:
-        raise ValueError("List GROQ_API_KEYS kosong.")
+MISSING_KEYS_HELP = """
+Sistem tidak dapat menemukan API Key Groq. 
 
-except (FileNotFoundError, StreamlitSecretNotFoundError, ValueError, KeyError) as e:
-    st.error("⛔ **Konfigurasi Fatal: API Key Tidak Ditemukan**")
-    st.markdown(
-        f"""
-    Sistem tidak dapat menemukan API Key Groq. 
-    
-    **Jika di Lokal:**
-    Pastikan file `.streamlit/secrets.toml` ada dan berisi:
-    ```toml
-    GROQ_API_KEYS = ["gsk_key_baru_anda_disini"]
-    ```
-    
-    **Jika di Streamlit Cloud:**
-    Masukkan konfigurasi di menu **Advanced Settings > Secrets**.
-    
-    *Error Detail: {str(e)}*
+**Jika di Lokal:**
+Pastikan file `.streamlit/secrets.toml` ada dan berisi:
+```toml
+GROQ_API_KEYS = ["gsk_key_baru_anda_disini"]
+```
+
+**Jika di Streamlit Cloud:**
+Masukkan konfigurasi di menu **Advanced Settings > Secrets**.
+"""
+
+_groq_api_keys = None
+
+
+def get_groq_api_keys():
     """
-    )
-    st.stop()
+    GROQ_API_KEYS dari st.secrets, dibaca saat pertama dipakai (bukan saat
+    import modul). Raise ValueError jika konfigurasi tidak ada/kosong.
+    """
+    global _groq_api_keys
+    if _groq_api_keys is None:
+        try:
+            if "GROQ_API_KEYS" not in st.secrets:
+                raise ValueError("Konfigurasi 'GROQ_API_KEYS' tidak ditemukan di secrets.")
+            keys = list(st.secrets["GROQ_API_KEYS"])
+        except (FileNotFoundError, StreamlitSecretNotFoundError, KeyError) as e:
+            raise ValueError(str(e)) from e
+        if not keys:
+            raise ValueError("List GROQ_API_KEYS kosong.")
+        _groq_api_keys = keys
+    return _groq_api_keys
+
+
+def show_missing_keys_error(error):
+    """Pesan konfigurasi fatal di UI saat API key tidak ditemukan."""
+    st.error("⛔ **Konfigurasi Fatal: API Key Tidak Ditemukan**")
+    st.markdown(MISSING_KEYS_HELP + f"\n*Error Detail: {error}*")
+
 
 MODEL_NAME = "llama-3.3-70b-versatile"
+# Endpoint OpenAI-compatible Groq; bisa diarahkan ke server lain (mis. fake
+# server load test di benchmarks/load_test.py)
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+# Streaming token untuk pemanggil yang memberi on_partial (0 = nonaktif)
+LLM_STREAMING = os.environ.get("REVIEW_LLM_STREAMING", "1") != "0"
+
+# Prefix pesan fallback saat LLM gagal (hasil ini tidak boleh di-cache)
+GRADING_ERROR_PREFIX = "System Error:"
+SUMMARY_ERROR_PREFIX = "Failed to generate summary:"
 
 
 def get_groq_client(api_key):
-    return OpenAI(base_url="https://api.groq.com/openai/v1", api_key=api_key)
+    from openai import OpenAI
+
+    # Retry & backoff diatur oleh GroqKeyPool, bukan oleh client
+    return OpenAI(base_url=GROQ_BASE_URL, api_key=api_key, max_retries=0)
+
+
+_key_pool = None
+_key_pool_lock = threading.Lock()
+
 
+def get_key_pool():
+    """Pool key Groq bersama (satu client persisten per key)."""
+    global _key_pool
+    with _key_pool_lock:
+        if _key_pool is None:
+            _key_pool = GroqKeyPool(get_groq_api_keys(), get_groq_client)
+        return _key_pool
 
-def call_llm_with_fallback(system_prompt, user_prompt):
+
+def call_llm_with_fallback(
+    system_prompt,
+    user_prompt,
+    timeout=None,
+    return_usage=False,
+    temperature=0.1,
+    use_cache=True,
+    on_partial=None,
+    validate=None,
+):
     """
     Memanggil LLM dengan mekanisme fallback key dan error handling JSON.
+    Key dipilih berdasarkan sisa rate limit (headroom terbesar lebih dulu).
+    `timeout` (detik) berlaku per percobaan key.
+    Panggilan identik (prompt, model, temperature) dilayani dari cache dan
+    panggilan identik yang bersamaan hanya dikirim sekali; hanya hasil yang
+    `validate(result)`-nya True (atau semua jika None) yang di-cache.
+    Hasil dari cache / panggilan yang digabung dikirim sekali ke `on_partial`.
+    Jika `on_partial` diberikan (dan LLM_STREAMING aktif), respons dibaca
+    secara streaming dan `on_partial(dict)` dipanggil dengan field JSON
+    parsial setiap kali bertambah; hasil akhir tetap divalidasi utuh.
+    Jika `return_usage=True`, mengembalikan (result, usage) dengan usage berisi
+    prompt_tokens, completion_tokens, seconds, dan cached.
     """
+    if use_cache:
+        computed = []
+
+        def compute():
+            computed.append(True)
+            return _call_llm_uncached(
+                system_prompt, user_prompt, temperature, timeout, on_partial
+            )
+
+        result, usage = get_llm_cache().get_or_call(
+            (system_prompt, user_prompt, MODEL_NAME, temperature),
+            compute,
+            timeout=timeout,
+            validate=(lambda value: validate(value[0])) if validate else None,
+        )
+        # Salinan agar pemanggil tidak mengubah isi cache
+        result = copy.deepcopy(result)
+        usage = dict(usage, cached=not computed)
+        if not computed:
+            usage["seconds"] = 0.0
+            if on_partial is not None and isinstance(result, dict):
+                # Tanpa streaming: UI langsung menerima hasil utuh
+                on_partial(dict(result))
+    else:
+        result, usage = _call_llm_uncached(
+            system_prompt, user_prompt, temperature, timeout, on_partial
+        )
+        usage = dict(usage, cached=False)
+
+    return (result, usage) if return_usage else result
+
+
+def _completion_request(system_prompt, user_prompt, temperature, timeout, stream):
+    request = {
+        "model": MODEL_NAME,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "temperature": temperature,
+        "timeout": timeout,
+    }
+    if stream:
+        # JSON mode Groq tidak bisa digabung dengan streaming: format JSON
+        # dijaga oleh prompt dan divalidasi saat stream selesai
+        request["stream"] = True
+        request["stream_options"] = {"include_usage": True}
+    else:
+        request["response_format"] = {"type": "json_object"}
+    return request
+
+
+def _call_llm_uncached(
+    system_prompt, user_prompt, temperature, timeout, on_partial=None
+):
+    """Satu panggilan LLM lewat key pool. Mengembalikan (result, usage)."""
+    from openai import RateLimitError
+
+    pool = get_key_pool()
     last_error = None
+    stream = on_partial is not None and LLM_STREAMING
+    request = _completion_request(
+        system_prompt, user_prompt, temperature, timeout, stream
+    )
+    started_at = time.perf_counter()
 
-    for i, api_key in enumerate(GROQ_API_KEYS):
+    for key_state in pool.candidates():
+        pool.acquire(key_state)
+        increment("llm_key_attempts", key=key_state.label)
+        t0 = time.perf_counter()
         try:
-            client = get_groq_client(api_key)
-
-            response = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"},
-            )
+            with span("llm.request"):
+                raw_response = (
+                    key_state.client.chat.completions.with_raw_response.create(
+                        **request
+                    )
+                )
+            pool.record_success(key_state, raw_response.headers)
+            if stream:
+                with span("llm.stream"):
+                    content, usage, stream_timings = read_stream(
+                        raw_response.parse(), on_partial, started_at
+                    )
+            else:
+                response = raw_response.parse()
+                content = response.choices[0].message.content
+                usage = {
+                    "prompt_tokens": getattr(response.usage, "prompt_tokens", 0) or 0,
+                    "completion_tokens": (
+                        getattr(response.usage, "completion_tokens", 0) or 0
+                    ),
+                }
+            # Token tetap terpakai walau JSON-nya nanti tidak valid
+            increment("llm_tokens", usage["prompt_tokens"], kind="prompt")
+            increment("llm_tokens", usage["completion_tokens"], kind="completion")
 
             # Validasi JSON Parsing
-            content = response.choices[0].message.content
-            return json.loads(content)
+            result = parse_json_content(content) if stream else json.loads(content)
+            usage["seconds"] = time.perf_counter() - t0
+            if stream:
+                _record_stream_timings(usage, stream_timings)
+            return result, usage
 
         except json.JSONDecodeError:
             last_error = "Output LLM bukan JSON valid."
+            pool.record_failure(key_state)
+            increment("llm_key_failures", key=key_state.label, reason="invalid_json")
+            continue
+        except RateLimitError as e:
+            last_error = str(e)
+            pool.record_rate_limited(key_state, e.response.headers)
+            increment("llm_key_failures", key=key_state.label, reason="rate_limited")
+            print(f"⚠️ {key_state.label} kena rate limit (429), circuit dibuka.")
             continue
         except Exception as e:
             last_error = str(e)
-            print(f"⚠️ Key ke-{i} gagal: {last_error}")
+            pool.record_failure(key_state)
+            increment("llm_key_failures", key=key_state.label, reason="error")
+            print(f"⚠️ {key_state.label} gagal: {last_error}")
             continue
+        finally:
+            pool.release(key_state)
 
+    if last_error is None:
+        # Tidak ada key yang dicoba: semua circuit-open terlalu lama
+        last_error = (
+            f"semua key sedang istirahat, pulih dalam "
+            f"{pool.seconds_until_ready():.0f} detik"
+        )
+    increment("llm_calls_exhausted")
     raise RuntimeError(
         f"Semua API Key Groq gagal / Limit Habis. Error terakhir: {last_error}"
     )
 
 
-def run_grading_agent(question_id, transcript, wpm):
+def _record_stream_timings(usage, stream_timings):
     """
-    Agent penilai per soal.
+    Time-to-first-useful-output (sejak percobaan key pertama, termasuk
+    fallback) ke telemetri & usage.
     """
-    if question_id not in RUBRIC_CONFIG:
-        return 0, "Question ID not found"
+    telemetry = get_telemetry()
+    first_token = stream_timings["firstTokenSeconds"]
+    first_output = stream_timings["firstOutputSeconds"]
+    if first_token is not None:
+        telemetry.record_span("llm.first_token", first_token)
+    if first_output is not None:
+        telemetry.record_span("llm.first_output", first_output)
+    usage["first_output_seconds"] = first_output
+
+
+# Statistik panggilan per-soal/ringkasan (pembanding mode batched)
+_single_call_stats = {"calls": 0, "seconds": 0.0}
+_single_call_lock = threading.Lock()
+
+
+def _record_single_call(usage):
+    if usage.get("cached"):
+        return
+    with _single_call_lock:
+        _single_call_stats["calls"] += 1
+        _single_call_stats["seconds"] += usage["seconds"]
+
+
+# Template prompt. Bagian statis (system prompt per role & blok soal+rubrik
+# per soal) dibangun sekali oleh CompiledPrompts sehingga prefix prompt
+# byte-identik antar panggilan (prompt caching di sisi provider); bagian
+# yang berubah (jawaban, WPM, nilai) selalu diletakkan di akhir.
+GRADING_SYSTEM_TEMPLATE = """You are a Senior Technical Assessor.
+Your task is to grade interview answers.
+You MUST output valid JSON.
+IMPORTANT: The 'reason' field must contain a DEEP, DETAILED ANALYSIS (3-5 sentences).
+Do not give short summaries. Explain the strengths, missing keywords, and logic gaps clearly in the 'reason'.
+
+### TASK:
+1. Score the answer ({min_score}-{max_score}) based strictly on the rubric.
+2. Write a detailed analysis for the 'reason' field. Explain WHY they got that score. Mention specific technical terms used or missed.
+
+### REQUIRED JSON OUTPUT:
+{{
+    "score": (integer {min_score}-{max_score}),
+    "reason": (string, detailed analysis paragraph)
+}}
+"""
+
+QUESTION_TEMPLATE = """### QUESTION:
+"{question}"
+
+### RUBRIC CRITERIA:
+{criteria_text}
+"""
+
+ANSWER_TEMPLATE = """
+### CANDIDATE ANSWER:
+"{transcript}"
+
+### METRICS:
+- Speaking Rate: {wpm} WPM.
+"""
+
+SUMMARY_SYSTEM_TEMPLATE = """You are a Lead Interviewer.
+You are provided with detailed grading notes from the technical interview questions of one candidate.
+Each question is scored from {min_score} to {max_score}.
+Your task is to write one cohesive 'Overall Note' (Conclusion).
+
+### INSTRUCTION:
+Write a professional summary paragraph (approx 50-80 words) concluding the candidate's overall competency, strengths, and areas for improvement based on the data provided.
+Do not use bullet points. Write it as a flowing paragraph for a final report.
+
+### REQUIRED JSON OUTPUT:
+{{
+    "overall_summary": "The candidate demonstrated..."
+}}
+"""
+
+SUMMARY_LINE_TEMPLATE = "Question {id} Score ({score}/{max_score}): {reason}\n\n"
+
+BATCHED_SYSTEM_TEMPLATE = """You are a Senior Technical Assessor and Lead Interviewer.
+Your task is to grade every interview answer of one candidate and write the final conclusion.
+You MUST output valid JSON.
+IMPORTANT: Each 'reason' field must contain a DEEP, DETAILED ANALYSIS (3-5 sentences).
+Do not give short summaries. Explain the strengths, missing keywords, and logic gaps clearly in the 'reason'.
+
+### TASK:
+1. Score each answer ({min_score}-{max_score}) based strictly on its own rubric.
+2. Write a detailed analysis for each 'reason' field. Explain WHY they got that score. Mention specific technical terms used or missed.
+3. Write 'overall_summary': a professional paragraph (approx 50-80 words) concluding the candidate's overall competency, strengths, and areas for improvement. Do not use bullet points.
+
+### REQUIRED JSON OUTPUT:
+{{
+    "grades": [
+        {{"id": (integer question id), "score": (integer {min_score}-{max_score}), "reason": (string, detailed analysis paragraph)}}
+    ],
+    "overall_summary": "The candidate demonstrated..."
+}}
+"""
+
+BATCHED_QUESTION_TEMPLATE = """
+### QUESTION {question_id}:
+"{question}"
+
+#### RUBRIC CRITERIA:
+{criteria_text}
+"""
+
+BATCHED_ANSWER_TEMPLATE = """
+#### CANDIDATE ANSWER:
+"{transcript}"
+
+#### METRICS:
+- Speaking Rate: {wpm} WPM.
+"""
+
+
+class CompiledPrompts:
+    """Bagian statis prompt satu role (dibangun sekali per versi role)."""
+
+    def __init__(self, role):
+        self.role = role
+        scale = {"min_score": role.min_score, "max_score": role.max_score}
+        self.grading_system = GRADING_SYSTEM_TEMPLATE.format(**scale)
+        self.summary_system = SUMMARY_SYSTEM_TEMPLATE.format(**scale)
+        self.batched_system = BATCHED_SYSTEM_TEMPLATE.format(**scale)
+        self.questions = {}
+        self.batched_questions = {}
+        for question_id, config in role.questions.items():
+            fields = {
+                "question_id": question_id,
+                "question": config["question"].strip(),
+                "criteria_text": textwrap.dedent(config["criteria_text"]).strip()
+                or "No criteria provided.",
+            }
+            self.questions[question_id] = QUESTION_TEMPLATE.format(**fields)
+            self.batched_questions[question_id] = BATCHED_QUESTION_TEMPLATE.format(
+                **fields
+            )
+
+
+_compiled_prompts = {}
+_compiled_prompts_lock = threading.Lock()
+
+
+def get_compiled_prompts(role_id=None):
+    """CompiledPrompts role `role_id` (None = role default bank soal)."""
+    role = get_role(role_id)
+    key = (role.role_id, role.version)
+    with _compiled_prompts_lock:
+        if key not in _compiled_prompts:
+            _compiled_prompts[key] = CompiledPrompts(role)
+        return _compiled_prompts[key]
+
+
+def build_grading_prompts(question_id, transcript, wpm, role_id=None):
+    """Prompt (system, user) penilaian satu soal."""
+    prompts = get_compiled_prompts(role_id)
+    user_prompt = prompts.questions[question_id] + ANSWER_TEMPLATE.format(
+        transcript=transcript, wpm=wpm
+    )
+    return prompts.grading_system, user_prompt
 
-    config = RUBRIC_CONFIG[question_id]
 
-    system_prompt = """
-    You are a Senior Technical Assessor.
-    Your task is to grade interview answers.
-    You MUST output valid JSON.
-    IMPORTANT: The 'reason' field must contain a DEEP, DETAILED ANALYSIS (3-5 sentences). 
-    Do not give short summaries. Explain the strengths, missing keywords, and logic gaps clearly in the 'reason'.
+def _is_complete_grade(result, role):
+    """
+    Respons penilaian valid (& layak di-cache): score bulat dalam skala role
+    dan reason berisi teks.
     """
+    if not isinstance(result, dict) or role.parse_score(result.get("score")) is None:
+        return False
+    reason = result.get("reason")
+    return isinstance(reason, str) and bool(reason.strip())
+
+
+def _is_complete_summary(result):
+    summary = result.get("overall_summary") if isinstance(result, dict) else None
+    return isinstance(summary, str) and bool(summary.strip())
 
-    user_prompt = f"""
-    ### QUESTION:
-    "{config['question']}"
-    
-    ### RUBRIC CRITERIA:
-    {config.get('criteria_text', 'No criteria provided.')}
-    
-    ### CANDIDATE ANSWER:
-    "{transcript}"
-    
-    ### METRICS:
-    - Speaking Rate: {wpm} WPM.
-    
-    ### TASK:
-    1. Score the answer (0-4) based strictly on the rubric.
-    2. Write a detailed analysis for the 'reason' field. Explain WHY they got that score. Mention specific technical terms used or missed.
-    
-    ### REQUIRED JSON OUTPUT:
-    {{
-        "score": (integer 0-4),
-        "reason": (string, detailed analysis paragraph)
-    }}
+
+def run_grading_agent(
+    question_id,
+    transcript,
+    wpm,
+    timeout=None,
+    signals=None,
+    on_partial=None,
+    role_id=None,
+):
+    """
+    Agent penilai per soal. Jawaban yang jelas bernilai minimum dinilai lokal
+    oleh pre-scoring (tanpa LLM); `signals` = sinyal Whisper (mis. metrik NLP).
+    `on_partial(dict)`: menerima score/reason parsial selama streaming.
+    `role_id`: role bank soal (None = role default).
     """
+    role = get_role(role_id)
+    if question_id not in role:
+        return role.min_score, "Question ID not found"
+
+    prescored = prescore_answer(question_id, transcript, signals, role.role_id)
+    if prescored is not None:
+        return prescored["score"], prescored["reason"]
+
+    # Cache hasil: jawaban + rubrik role + model yang sama -> nilai yang sama
+    cache = get_result_cache()
+    cache_key = (role.role_id, question_id, transcript, wpm, MODEL_NAME, role.version)
+    cached = cache.get("grade", cache_key)
+    if cached is not None and _is_complete_grade(cached, role):
+        return role.parse_score(cached["score"]), cached["reason"]
+
+    system_prompt, user_prompt = build_grading_prompts(
+        question_id, transcript, wpm, role.role_id
+    )
 
     try:
-        result = call_llm_with_fallback(system_prompt, user_prompt)
-        # Fallback nilai default jika JSON tidak lengkap key-nya
-        return result.get("score", 0), result.get("reason", "No analysis provided.")
+        result, usage = call_llm_with_fallback(
+            system_prompt,
+            user_prompt,
+            timeout=timeout,
+            return_usage=True,
+            on_partial=on_partial,
+            validate=lambda r: _is_complete_grade(r, role),
+        )
+        _record_single_call(usage)
+        if not _is_complete_grade(result, role):
+            # Skor di luar skala / bukan angka tidak boleh masuk interview_percent:
+            # dianggap error (tidak di-cache, job bisa diulang)
+            raise ValueError(
+                f"Respons LLM tidak valid: score harus bulat "
+                f"{role.min_score}-{role.max_score} & reason wajib ada "
+                f"(diterima score={result.get('score')!r})"
+            )
+        score = role.parse_score(result["score"])
+        reason = result["reason"].strip()
+        cache.set("grade", cache_key, {"score": score, "reason": reason})
+        return score, reason
     except Exception as e:
-        return 0, f"System Error: {str(e)}"
+        return role.min_score, f"{GRADING_ERROR_PREFIX} {str(e)}"
 
 
-def generate_overall_summary(assessment_results):
-    """
-    Agent pembuat kesimpulan akhir.
-    """
+def build_summary_prompts(assessment_results, role_id=None):
+    """Prompt (system, user) pembuatan kesimpulan akhir."""
+    prompts = get_compiled_prompts(role_id)
     # Gabungkan semua analisis menjadi satu teks konteks
-    combined_analysis = ""
-    for res in assessment_results:
-        combined_analysis += (
-            f"Question {res['id']} Score ({res['score']}/4): {res['reason']}\n\n"
-        )
+    combined_analysis = "".join(
+        SUMMARY_LINE_TEMPLATE.format(max_score=prompts.role.max_score, **res)
+        for res in assessment_results
+    )
+    user_prompt = (
+        f"### CANDIDATE PERFORMANCE DATA (questions graded: "
+        f"{len(assessment_results)}):\n"
+        f"{combined_analysis}"
+    )
+    return prompts.summary_system, user_prompt
 
-    system_prompt = """
-    You are a Lead Interviewer. 
-    You are provided with detailed grading notes from 5 technical interview questions.
-    Your task is to write one cohesive 'Overall Note' (Conclusion).
-    """
 
-    user_prompt = f"""
-    ### CANDIDATE PERFORMANCE DATA:
-    {combined_analysis}
-    
-    ### INSTRUCTION:
-    Write a professional summary paragraph (approx 50-80 words) concluding the candidate's overall competency, strengths, and areas for improvement based on the data above.
-    Do not use bullet points. Write it as a flowing paragraph for a final report.
-    
-    ### REQUIRED JSON OUTPUT:
-    {{
-        "overall_summary": "The candidate demonstrated..."
-    }}
+def generate_overall_summary(
+    assessment_results, timeout=None, on_partial=None, role_id=None
+):
+    """
+    Agent pembuat kesimpulan akhir. `on_partial(dict)`: menerima
+    overall_summary parsial selama streaming.
     """
+    system_prompt, user_prompt = build_summary_prompts(assessment_results, role_id)
 
     try:
-        result = call_llm_with_fallback(system_prompt, user_prompt)
+        result, usage = call_llm_with_fallback(
+            system_prompt,
+            user_prompt,
+            timeout=timeout,
+            return_usage=True,
+            on_partial=on_partial,
+            validate=_is_complete_summary,
+        )
+        _record_single_call(usage)
         return result.get("overall_summary", "Summary generation failed.")
     except Exception as e:
-        return f"Failed to generate summary: {str(e)}"
+        return f"{SUMMARY_ERROR_PREFIX} {str(e)}"
+
+
+async def _run_blocking(executor, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+async def agrade_answers(
+    answers, concurrency=5, timeout=60, with_summary=True, role_id=None
+):
+    """
+    Menilai banyak jawaban secara konkuren (asyncio).
+    `answers`: iterable (question_id, transcript, wpm[, signals]) satu role.
+    `timeout` (detik) = timeout client per percobaan key; percobaan yang
+    habis waktu gagal di thread-nya sendiri (tidak ada thread yatim).
+    Ringkasan akhir langsung dibuat begitu nilai terakhir masuk.
+    Mengembalikan (list hasil terurut per id, overall_summary atau None).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    # Panggilan LLM tetap sinkron (key pool), dijalankan di thread terpisah
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def grade_one(question_id, transcript, wpm, signals=None):
+        async with semaphore:
+            score, reason = await _run_blocking(
+                executor,
+                run_grading_agent,
+                question_id,
+                transcript,
+                wpm,
+                timeout=timeout,
+                signals=signals,
+                role_id=role_id,
+            )
+        return {"id": question_id, "score": score, "reason": reason}
+
+    try:
+        tasks = [asyncio.ensure_future(grade_one(*answer)) for answer in answers]
+        results = [await task for task in asyncio.as_completed(tasks)]
+        results.sort(key=lambda r: r["id"])
+
+        overall_summary = None
+        if with_summary and results:
+            overall_summary = await _run_blocking(
+                executor,
+                generate_overall_summary,
+                results,
+                timeout=timeout,
+                role_id=role_id,
+            )
+        return results, overall_summary
+    finally:
+        executor.shutdown(wait=False)
+
+
+def grade_answers_concurrently(
+    answers, concurrency=5, timeout=60, with_summary=True, role_id=None
+):
+    """Versi sinkron dari agrade_answers (untuk Streamlit / batch)."""
+    return asyncio.run(
+        agrade_answers(
+            answers,
+            concurrency=concurrency,
+            timeout=timeout,
+            with_summary=with_summary,
+            role_id=role_id,
+        )
+    )
+
+
+def build_batched_grading_prompts(answers, role_id=None):
+    """Prompt (system, user) penilaian semua jawaban + kesimpulan dalam satu panggilan."""
+    prompts = get_compiled_prompts(role_id)
+    user_prompt = "".join(
+        prompts.batched_questions[question_id]
+        + BATCHED_ANSWER_TEMPLATE.format(transcript=transcript, wpm=wpm)
+        for question_id, transcript, wpm in answers
+    )
+    return prompts.batched_system, user_prompt
+
+
+def _validate_batched_grades(result, expected_ids, role):
+    """Ambil nilai yang valid dari respons batched: {id: (score, reason)}."""
+    valid = {}
+    grades = result.get("grades") if isinstance(result, dict) else None
+    if not isinstance(grades, list):
+        return valid
+    for grade in grades:
+        if not isinstance(grade, dict):
+            continue
+        try:
+            question_id = int(grade.get("id"))
+        except (TypeError, ValueError):
+            continue
+        score = role.parse_score(grade.get("score"))
+        reason = grade.get("reason")
+        if (
+            question_id in expected_ids
+            and score is not None
+            and isinstance(reason, str)
+            and reason.strip()
+        ):
+            valid[question_id] = (score, reason.strip())
+    return valid
+
+
+def _is_complete_batch(result, expected_ids, role):
+    """Respons batched layak di-cache: semua nilai valid + ada kesimpulan."""
+    valid = _validate_batched_grades(result, expected_ids, role)
+    return len(valid) == len(expected_ids) and _is_complete_summary(result)
+
+
+def _estimate_tokens(text, tokens_per_char):
+    return int(round(len(text) * tokens_per_char))
+
+
+def run_batched_grading(answers, timeout=None, role_id=None):
+    """
+    Mode batched: semua jawaban kandidat + kesimpulan dinilai dalam SATU
+    panggilan LLM. Jawaban yang respons-nya tidak valid/hilang dinilai ulang
+    lewat jalur per-soal (run_grading_agent), begitu juga kesimpulannya.
+    Jawaban yang jelas bernilai minimum dinilai lokal (pre-scoring) dan tidak
+    ikut dikirim ke LLM.
+    `answers`: list (question_id, transcript, wpm[, signals]) role `role_id`.
+    Mengembalikan (results, overall_summary, report) dengan report berisi
+    token & waktu yang dihemat dibanding alur per-soal.
+    """
+    role = get_role(role_id)
+    prescored = {}
+    pending = []
+    for answer in answers:
+        if answer[0] not in role:
+            continue
+        signals = answer[3] if len(answer) > 3 else None
+        decision = prescore_answer(answer[0], answer[1], signals, role.role_id)
+        if decision is not None:
+            prescored[answer[0]] = (decision["score"], decision["reason"])
+        else:
+            pending.append(tuple(answer[:3]))
+    answers = pending
+    expected_ids = {a[0] for a in answers}
+    system_prompt, user_prompt = build_batched_grading_prompts(answers, role.role_id)
+
+    t0 = time.perf_counter()
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0}
+    result = {}
+    if answers:
+        try:
+            result, usage = call_llm_with_fallback(
+                system_prompt,
+                user_prompt,
+                timeout=timeout,
+                return_usage=True,
+                validate=lambda r: _is_complete_batch(r, expected_ids, role),
+            )
+        except Exception as e:
+            print(f"⚠️ Batched grading gagal, fallback per soal: {e}")
+            result = {}
+
+    valid = _validate_batched_grades(result, expected_ids, role)
+    valid.update(prescored)
+    overall_summary = result.get("overall_summary") if isinstance(result, dict) else None
+    batched_seconds = time.perf_counter() - t0
+
+    # Fallback per soal untuk nilai yang tidak valid
+    fallback_ids = sorted(expected_ids - set(valid))
+    for question_id, transcript, wpm in answers:
+        if question_id in fallback_ids:
+            valid[question_id] = run_grading_agent(
+                question_id, transcript, wpm, timeout=timeout, role_id=role.role_id
+            )
+    results = [
+        {"id": q_id, "score": valid[q_id][0], "reason": valid[q_id][1]}
+        for q_id in sorted(valid)
+    ]
+
+    summary_fallback = not (isinstance(overall_summary, str) and overall_summary.strip())
+    if summary_fallback:
+        overall_summary = generate_overall_summary(
+            results, timeout=timeout, role_id=role.role_id
+        )
+    total_seconds = time.perf_counter() - t0
+
+    # Estimasi biaya alur lama (N panggilan per soal + 1 ringkasan), token
+    # dikalibrasi dengan rasio token/karakter dari panggilan batched ini.
+    batched_chars = len(system_prompt) + len(user_prompt)
+    tokens_per_char = (
+        usage["prompt_tokens"] / batched_chars if usage["prompt_tokens"] else 0.25
+    )
+    legacy_prompts = [build_grading_prompts(*a, role.role_id) for a in answers]
+    legacy_prompts.append(build_summary_prompts(results, role.role_id))
+    legacy_prompt_tokens = sum(
+        _estimate_tokens(sys_p + user_p, tokens_per_char)
+        for sys_p, user_p in legacy_prompts
+    )
+    with _single_call_lock:
+        mean_single_seconds = (
+            _single_call_stats["seconds"] / _single_call_stats["calls"]
+            if _single_call_stats["calls"]
+            else None
+        )
+    legacy_seconds = (
+        mean_single_seconds * len(legacy_prompts) if mean_single_seconds else None
+    )
+
+    report = {
+        "batched": not fallback_ids and not summary_fallback,
+        "fallbackQuestionIds": fallback_ids,
+        "prescoredQuestionIds": sorted(prescored),
+        "summaryFallback": summary_fallback,
+        "promptTokens": usage["prompt_tokens"],
+        "completionTokens": usage["completion_tokens"],
+        "batchedCallSeconds": round(batched_seconds, 2),
+        "wallTimeSeconds": round(total_seconds, 2),
+        "estimatedLegacyPromptTokens": legacy_prompt_tokens,
+        "estimatedPromptTokensSaved": legacy_prompt_tokens - usage["prompt_tokens"],
+        "estimatedLegacyWallTimeSeconds": (
+            round(legacy_seconds, 2) if legacy_seconds is not None else None
+        ),
+        "estimatedWallTimeSavedSeconds": (
+            round(legacy_seconds - total_seconds, 2)
+            if legacy_seconds is not None
+            else None
+        ),
+    }
+    return results, overall_summary, report
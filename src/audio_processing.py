@@ -1,7 +1,120 @@
+import io
 import os
+import struct
 import subprocess
 import shutil
-import librosa
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import soundfile as sf
+from src.telemetry import increment, span
+
+SAMPLE_RATE = 16000
+
+# Target normalisasi gain (normalize_gain, dipakai semua jalur decode)
+TARGET_LOUDNESS_DB = -16.0
+TARGET_PEAK_DB = -1.5
+GAIN_FRAME_SECONDS = 0.1
+GAIN_ABSOLUTE_GATE_DB = -70.0
+GAIN_RELATIVE_GATE_DB = -10.0
+
+# Batas atas thread decode TranscodeWorker (default: jatah core proses)
+TRANSCODE_MAX_WORKERS = int(os.environ.get("REVIEW_TRANSCODE_WORKERS", "4"))
+
+# Input yang bisa dibaca langsung tanpa transcoding
+CONFORMANT_SUBTYPES = {"PCM_16", "PCM_24", "PCM_32", "FLOAT", "DOUBLE"}
+
+# Container ISO-BMFF yang bisa di-faststart (atom moov dipindah ke depan)
+FASTSTART_EXTENSIONS = {".mp4", ".m4v", ".mov"}
+
+# Encoder untuk upload cloud: (argumen output FFmpeg, ekstensi file)
+UPLOAD_ENCODERS = {
+    "flac": (["-c:a", "flac", "-compression_level", "5", "-f", "flac"], "flac"),
+    "opus": (
+        [
+            "-c:a", "libopus",
+            "-b:a", "24k",
+            "-application", "voip",
+            "-compression_level", "5",
+            "-f", "ogg",
+        ],
+        "ogg",
+    ),
+}
+
+
+class AudioBuffer:
+    """
+    Audio mono 16kHz (float32) hasil decode satu kali.
+    Dipakai bersama oleh durasi, deteksi jeda, dan transkripsi tanpa
+    membaca ulang file dari disk.
+    """
+
+    def __init__(self, samples, sample_rate=SAMPLE_RATE, source_path=None):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.source_path = source_path
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate if self.sample_rate else 0.0
+
+    def slice(self, start_seconds, end_seconds):
+        """Potongan buffer [start, end) detik (view, tanpa salin data)."""
+        start = max(0, int(start_seconds * self.sample_rate))
+        end = min(len(self.samples), int(end_seconds * self.sample_rate))
+        return AudioBuffer(self.samples[start:end], self.sample_rate, self.source_path)
+
+    def to_wav_bytes(self):
+        """Encode WAV 16-bit di memori (hanya untuk jalur upload Groq)."""
+        wav_io = io.BytesIO()
+        sf.write(wav_io, self.samples, self.sample_rate, format="WAV", subtype="PCM_16")
+        return wav_io.getvalue()
+
+    def encode(self, fmt):
+        """
+        Encode buffer di memori lewat pipe FFmpeg (tanpa file sementara).
+        `fmt`: "flac", "opus", atau "wav". Mengembalikan (bytes, nama file);
+        jatuh ke WAV jika encoder gagal.
+        """
+        if fmt in UPLOAD_ENCODERS:
+            codec_args, extension = UPLOAD_ENCODERS[fmt]
+            try:
+                command = [
+                    get_ffmpeg_path(),
+                    "-f", "f32le",
+                    "-ar", str(self.sample_rate),
+                    "-ac", "1",
+                    "-i", "pipe:0",
+                    *codec_args,
+                    "pipe:1",
+                ]
+                result = run_ffmpeg(
+                    f"encode_{fmt}",
+                    command,
+                    input=np.ascontiguousarray(self.samples, dtype=np.float32).tobytes(),
+                    check=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+                if result.stdout:
+                    return result.stdout, f"audio.{extension}"
+            except Exception as e:
+                print(f"Encode {fmt} gagal, fallback WAV: {e}")
+        return self.to_wav_bytes(), "audio.wav"
+
+    def to_wav(self, output_path):
+        """Tulis buffer ke file WAV 16-bit jika memang butuh file di disk."""
+        sf.write(output_path, self.samples, self.sample_rate, subtype="PCM_16")
+        return output_path
+
+
+def run_ffmpeg(operation, command, **kwargs):
+    """subprocess.run FFmpeg yang diukur sebagai span `ffmpeg.<operation>`."""
+    with span(f"ffmpeg.{operation}"):
+        return subprocess.run(command, **kwargs)
+
 
 def get_ffmpeg_path():
     ffmpeg_path = shutil.which("ffmpeg")
@@ -27,8 +140,9 @@ def fix_video_for_streaming(input_path, output_path):
         ]
         
         # Menjalankan sebagai Subprocess (System Call)
-        subprocess.run(
-            command, 
+        run_ffmpeg(
+            "faststart",
+            command,
             check=True, 
             stdout=subprocess.DEVNULL, 
             stderr=subprocess.DEVNULL
@@ -45,7 +159,10 @@ def fix_video_for_streaming(input_path, output_path):
         return False
 
 def extract_audio(video_path, output_audio_path):
-    """Ekstrak audio ke WAV 16kHz Mono."""
+    """
+    Ekstrak audio ke WAV 16kHz Mono (tanpa normalisasi; gain dinormalisasi
+    normalize_gain saat WAV dibaca decode_audio).
+    """
     try:
         ffmpeg_binary = get_ffmpeg_path()
         command = [
@@ -56,14 +173,14 @@ def extract_audio(video_path, output_audio_path):
             "-acodec", "pcm_s16le",
             "-ar", "16000",
             "-ac", "1",
-            "-af", "loudnorm=I=-16:TP=-1.5:LRA=11",
             output_audio_path,
         ]
         
-        subprocess.run(
-            command, 
-            check=True, 
-            stdout=subprocess.DEVNULL, 
+        run_ffmpeg(
+            "extract",
+            command,
+            check=True,
+            stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
         )
         
@@ -82,9 +199,299 @@ def extract_audio(video_path, output_audio_path):
         print(f"Error extract audio: {e}")
         return False
 
-def get_audio_duration(audio_path):
+def normalize_gain(samples):
+    """
+    Normalisasi gain vectorized, satu-satunya normalisasi di semua jalur
+    decode (langsung, PyAV, fallback FFmpeg) agar hasilnya konsisten.
+    Loudness diukur dari energi frame 100ms dengan gating ala BS.1770
+    (absolut -70 dB, relatif -10 dB) agar jeda tidak menurunkan estimasi,
+    lalu gain dibatasi supaya puncak tidak melewati TARGET_PEAK_DB.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    frame = int(SAMPLE_RATE * GAIN_FRAME_SECONDS)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return samples
+    frames = samples[: n_frames * frame].reshape(n_frames, frame)
+    power = np.einsum("ij,ij->i", frames, frames) / frame
+    power = power[power > 10 ** (GAIN_ABSOLUTE_GATE_DB / 10)]
+    if power.size == 0:
+        return samples
+    power = power[power > power.mean() * 10 ** (GAIN_RELATIVE_GATE_DB / 10)]
+    loudness_db = 10 * np.log10(power.mean())
+    gain = 10 ** ((TARGET_LOUDNESS_DB - loudness_db) / 20)
+    peak = np.abs(samples).max()
+    if peak > 0:
+        gain = min(gain, 10 ** (TARGET_PEAK_DB / 20) / peak)
+    return samples * np.float32(gain)
+
+def is_conformant_audio(input_path):
+    """True jika header file (dibaca soundfile) sudah PCM 16kHz mono."""
     try:
-        return librosa.get_duration(filename=audio_path)
+        info = sf.info(str(input_path))
+    except Exception:
+        return False
+    return (
+        info.samplerate == SAMPLE_RATE
+        and info.channels == 1
+        and info.subtype in CONFORMANT_SUBTYPES
+    )
+
+def _load_conformant(input_path):
+    samples, _ = sf.read(str(input_path), dtype="float32")
+    if samples.size == 0:
+        return None
+    return AudioBuffer(normalize_gain(samples), SAMPLE_RATE, source_path=str(input_path))
+
+def _decode_audio_ffmpeg(input_path):
+    """Decode lewat subprocess FFmpeg + normalize_gain (jalur fallback)."""
+    try:
+        ffmpeg_binary = get_ffmpeg_path()
+        command = [
+            ffmpeg_binary,
+            "-i", str(input_path),
+            "-vn",
+            "-ar", str(SAMPLE_RATE),
+            "-ac", "1",
+            "-f", "f32le",
+            "-acodec", "pcm_f32le",
+            "pipe:1",
+        ]
+
+        result = run_ffmpeg(
+            "decode",
+            command,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+        samples = np.frombuffer(result.stdout, dtype=np.float32)
+        if samples.size == 0:
+            return None
+        return AudioBuffer(
+            normalize_gain(samples), SAMPLE_RATE, source_path=str(input_path)
+        )
+
+    except FileNotFoundError as e:
+        print(f"System Error: {e}")
+        return None
+    except subprocess.CalledProcessError as e:
+        print(f"FFmpeg Error saat decode audio: {e}")
+        return None
+    except Exception as e:
+        print(f"Error decode audio: {e}")
+        return None
+
+
+def default_transcode_workers():
+    """Jumlah thread decode: jatah core proses, maks TRANSCODE_MAX_WORKERS."""
+    omp_threads = os.environ.get("OMP_NUM_THREADS", "")
+    cpu_budget = int(omp_threads) if omp_threads.isdigit() else os.cpu_count()
+    return max(1, min(TRANSCODE_MAX_WORKERS, cpu_budget or 1))
+
+
+class TranscodeWorker:
+    """
+    Worker transcoding persisten: decode + resample in-process dengan PyAV
+    (dependensi faster-whisper) di thread yang dipakai ulang, jadi tidak ada
+    spawn proses per file. Jatuh ke subprocess FFmpeg jika PyAV tidak
+    tersedia atau gagal membaca file. Jumlah thread default mengikuti jatah
+    core proses, jadi beberapa file bisa di-decode paralel.
+    """
+
+    def __init__(self, max_workers=None):
+        if max_workers is None:
+            max_workers = default_transcode_workers()
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="transcode"
+        )
+        try:
+            import av
+            self._av = av
+        except ImportError:
+            self._av = None
+
+    def _decode_pyav(self, input_path):
+        av = self._av
+        resampler = av.audio.resampler.AudioResampler(
+            format="flt", layout="mono", rate=SAMPLE_RATE
+        )
+        chunks = []
+        with av.open(str(input_path), mode="r", metadata_errors="ignore") as container:
+            for frame in container.decode(audio=0):
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+            for out in resampler.resample(None):
+                chunks.append(out.to_ndarray().reshape(-1))
+        if not chunks:
+            return None
+        samples = normalize_gain(np.concatenate(chunks))
+        return AudioBuffer(samples, SAMPLE_RATE, source_path=str(input_path))
+
+    def _transcode(self, input_path):
+        if self._av is not None:
+            try:
+                with span("decode.pyav"):
+                    audio = self._decode_pyav(input_path)
+                if audio is not None:
+                    return audio
+            except Exception as e:
+                print(f"PyAV gagal decode, fallback FFmpeg: {e}")
+        return _decode_audio_ffmpeg(input_path)
+
+    def submit(self, input_path):
+        return self._executor.submit(self._transcode, input_path)
+
+    def transcode(self, input_path):
+        return self.submit(input_path).result()
+
+
+_transcode_worker = None
+_transcode_worker_lock = threading.Lock()
+
+
+def get_transcode_worker():
+    """TranscodeWorker bersama (satu per proses)."""
+    global _transcode_worker
+    with _transcode_worker_lock:
+        if _transcode_worker is None:
+            _transcode_worker = TranscodeWorker()
+        return _transcode_worker
+
+def decode_audio(input_path):
+    """
+    Decode audio/video langsung ke AudioBuffer (16kHz Mono float32),
+    tanpa menulis WAV sementara:
+    - WAV/FLAC yang sudah PCM 16kHz mono dibaca langsung (cek header),
+    - format lain lewat TranscodeWorker persisten (PyAV, fallback FFmpeg).
+    """
+    if is_conformant_audio(input_path):
+        try:
+            with span("decode.direct"):
+                audio = _load_conformant(input_path)
+            if audio is not None:
+                return audio
+        except Exception as e:
+            print(f"Error baca audio langsung: {e}")
+    return get_transcode_worker().transcode(input_path)
+
+def needs_faststart(path):
+    """
+    Cek apakah video perlu di-remux agar seekable di browser, dengan membaca
+    header box top-level MP4 saja (tanpa FFmpeg): perlu jika atom `moov`
+    berada setelah `mdat`. Container lain (mkv, wav) tidak perlu.
+    """
+    if os.path.splitext(str(path))[1].lower() not in FASTSTART_EXTENSIONS:
+        return False
+    try:
+        file_size = os.path.getsize(path)
+        offset = 0
+        with open(path, "rb") as f:
+            while offset + 8 <= file_size:
+                f.seek(offset)
+                box_size, box_type = struct.unpack(">I4s", f.read(8))
+                if box_size == 1:
+                    box_size = struct.unpack(">Q", f.read(8))[0]
+                elif box_size == 0:
+                    box_size = file_size - offset
+                if box_type == b"moov":
+                    return False
+                if box_type == b"mdat":
+                    return True
+                if box_size < 8:
+                    break
+                offset += box_size
+    except (OSError, struct.error) as e:
+        print(f"Warning probe moov: {e}")
+    # Struktur tidak dikenali: remux saja agar aman
+    return True
+
+
+class MediaPreparation:
+    """
+    Persiapan preview di background thread: salinan faststart (remux tanpa
+    re-encode) bila atom moov belum di depan. Audio analisis tidak diambil
+    di sini: worker men-decode file upload di prosesnya sendiri (PyAV
+    in-process), jadi jalur satu-FFmpeg remux + pipe audio tidak dipakai lagi.
+    """
+
+    def __init__(self, input_path, preview_path=None):
+        self.input_path = str(input_path)
+        self.remux = preview_path is not None and needs_faststart(self.input_path)
+        self.preview_path = str(preview_path) if self.remux else self.input_path
+        self.seconds = None
+        # Pesan error remux terakhir (None jika berhasil / tidak perlu remux)
+        self.error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _remux(self):
+        # Tulis ke file sementara lalu rename, agar preview tidak pernah
+        # menyajikan file setengah jadi
+        stem, ext = os.path.splitext(self.preview_path)
+        partial_preview_path = f"{stem}.part{ext}"
+        succeeded = False
+        try:
+            command = [
+                get_ffmpeg_path(), "-y", "-i", self.input_path,
+                "-c", "copy", "-movflags", "+faststart", partial_preview_path,
+            ]
+            run_ffmpeg(
+                "remux",
+                command,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            os.replace(partial_preview_path, self.preview_path)
+            succeeded = True
+        except Exception as e:
+            self.error = str(e)
+            increment("media_preparation_failures", reason=type(e).__name__)
+        finally:
+            if os.path.exists(partial_preview_path):
+                os.remove(partial_preview_path)
+            if not succeeded:
+                # Remux gagal (termasuk sebelum FFmpeg menulis apa pun):
+                # preview pakai file asli
+                self.remux = False
+                self.preview_path = self.input_path
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            if self.remux:
+                self._remux()
+        finally:
+            self.seconds = time.perf_counter() - start
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Tunggu persiapan preview selesai (True jika selesai)."""
+        return self._done.wait(timeout)
+
+
+def prepare_media(input_path, preview_path=None):
+    """
+    Mulai persiapan preview di background. `preview_path` diisi untuk video:
+    salinan faststart hanya dibuat jika atom moov belum di depan.
+    """
+    return MediaPreparation(input_path, preview_path)
+
+def get_audio_duration(audio):
+    """Durasi (detik) dari AudioBuffer atau path file audio."""
+    try:
+        if isinstance(audio, AudioBuffer):
+            return audio.duration
+        import librosa
+
+        return librosa.get_duration(path=audio)
     except Exception as e:
         print(f"Error duration: {e}")
         return 0.0
\ No newline at end of file
@@ -0,0 +1,546 @@
+"""
+Batch assessment tanpa UI (headless).
+
+Menjalankan pipeline yang sama dengan tombol "Analysis Video" di app.py
+(extract_audio -> transcribe_with_words -> calculate_metrics -> run_grading_agent
+-> generate_final_json) untuk banyak kandidat sekaligus.
+
+Contoh:
+    python -m src.batch data/kandidat/ --output-dir reports/
+    python -m src.batch manifest.json --workers 4 --llm-concurrency 5
+    python -m src.batch data/kandidat_de/ --role data-engineer
+
+Format input:
+    - Folder: <folder>/<id_kandidat>/<file jawaban>, nomor soal diambil dari
+      angka terakhir pada nama file (q1.mp4, soal_2.wav, 3.mkv).
+    - Manifest JSON: {"kandidat_a": {"1": "path/q1.mp4", ...}, ...}
+      atau list [{"candidate": ..., "question_id": ..., "path": ...}].
+    - Manifest CSV: kolom candidate,question_id,path.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+
+MEDIA_EXTENSIONS = {".mp4", ".wav", ".mkv", ".mov"}
+
+# Model Whisper milik tiap worker process (dimuat sekali oleh _init_worker)
+_WORKER_MODEL = None
+
+
+def load_manifest(source):
+    """
+    Membaca daftar jawaban dari folder atau manifest (JSON/CSV).
+    Mengembalikan list job: {"candidate", "question_id", "path"}.
+    """
+    source = Path(source)
+    jobs = []
+
+    if source.is_dir():
+        for candidate_dir in sorted(p for p in source.iterdir() if p.is_dir()):
+            for media in sorted(candidate_dir.iterdir()):
+                if media.suffix.lower() not in MEDIA_EXTENSIONS:
+                    continue
+                numbers = re.findall(r"\d+", media.stem)
+                if not numbers:
+                    print(f"⚠️ Nomor soal tidak ditemukan di nama file: {media}")
+                    continue
+                jobs.append(
+                    {
+                        "candidate": candidate_dir.name,
+                        "question_id": int(numbers[-1]),
+                        "path": str(media),
+                    }
+                )
+        return jobs
+
+    base_dir = source.parent
+    if source.suffix.lower() == ".csv":
+        with open(source, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(source, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            rows = [
+                {"candidate": cand, "question_id": q_id, "path": path}
+                for cand, answers in data.items()
+                for q_id, path in answers.items()
+            ]
+        else:
+            rows = data
+
+    for row in rows:
+        path = Path(row["path"])
+        if not path.is_absolute():
+            path = base_dir / path
+        jobs.append(
+            {
+                "candidate": str(row["candidate"]),
+                "question_id": int(row["question_id"]),
+                "path": str(path),
+            }
+        )
+    return jobs
+
+
+def _init_worker(cpu_threads):
+    """Initializer worker process: batasi thread & muat model sekali."""
+    global _WORKER_MODEL
+    # Cegah oversubscription: tiap proses hanya memakai jatah core-nya
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+
+    from src.transcription import load_whisper_model
+
+    _WORKER_MODEL, device_name = load_whisper_model()
+    print(f"[worker {os.getpid()}] Model siap: {device_name}")
+
+
+def process_answer_audio(job):
+    """
+    Tahap CPU-bound untuk satu jawaban (dijalankan di process pool):
+    decode audio, transkripsi, dan metrik NLP. Hasil menyertakan snapshot
+    telemetri job ini (digabung di proses utama).
+    """
+    from src.telemetry import get_telemetry
+
+    # Satu proses pool hanya mengerjakan satu job sekaligus: reset agar
+    # snapshot berisi span job ini saja
+    telemetry = get_telemetry()
+    telemetry.reset()
+    result = _process_answer_audio(job)
+    result["telemetry"] = telemetry.snapshot()
+    return result
+
+
+def _process_answer_audio(job):
+    from src.audio_processing import decode_audio, get_audio_duration
+    from src.cache import get_result_cache, hash_file
+    from src.nlp_analysis import METRICS_VERSION, calculate_metrics
+    from src.telemetry import span
+    from src.transcription import (
+        TECHNICAL_PROMPT,
+        get_transcriber_id,
+        transcribe_with_words,
+    )
+
+    timings = {}
+    cache = get_result_cache()
+    audio_key = (
+        hash_file(job["path"]),
+        get_transcriber_id(_WORKER_MODEL),
+        TECHNICAL_PROMPT,
+    )
+    transcript = cache.get("transcript", audio_key)
+    metrics_key = audio_key + (METRICS_VERSION,)
+    nlp_metrics = cache.get("metrics", metrics_key)
+    if transcript is not None and nlp_metrics is not None:
+        return {
+            "transcript": transcript,
+            "metrics": nlp_metrics,
+            "timings": timings,
+            "cached": True,
+        }
+
+    with span("pipeline.extract") as timer:
+        audio = decode_audio(job["path"])
+        if audio is None:
+            raise RuntimeError(f"Gagal ekstrak audio: {job['path']}")
+    timings["extract"] = timer.seconds
+
+    upload_stats = {}
+    with span("pipeline.transcribe") as timer:
+        transcript, words, signals = transcribe_with_words(
+            _WORKER_MODEL, audio, stats=upload_stats
+        )
+    timings["transcribe"] = timer.seconds
+
+    with span("pipeline.metrics") as timer:
+        duration = get_audio_duration(audio)
+        nlp_metrics = calculate_metrics(transcript, words, duration, signals)
+    timings["metrics"] = timer.seconds
+
+    if transcript:
+        cache.set("transcript", audio_key, transcript)
+        cache.set("metrics", metrics_key, nlp_metrics)
+    return {
+        "transcript": transcript,
+        "metrics": nlp_metrics,
+        "timings": timings,
+        "cached": False,
+        "upload": upload_stats,
+    }
+
+
+def grade_candidate(
+    candidate,
+    answers,
+    output_dir,
+    llm_concurrency,
+    llm_timeout,
+    batched=False,
+    role_id=None,
+):
+    """
+    Tahap I/O-bound satu kandidat: semua jawaban dinilai konkuren (atau dalam
+    satu panggilan jika `batched`), ringkasan akhir dibuat begitu nilai
+    terakhir masuk, lalu laporan JSON ditulis.
+    `answers`: list (question_id, audio_result), question_id unik & ada di
+    role. Jawaban yang audionya gagal diproses tidak dinilai: dicatat di
+    laporan sebagai failedQuestions (incomplete, keputusan NEED REVIEW).
+    Mengembalikan (detik penilaian, report mode batched atau None, jumlah
+    jawaban yang berhasil dinilai).
+    """
+    from src.agent_engine import (
+        GRADING_ERROR_PREFIX,
+        grade_answers_concurrently,
+        run_batched_grading,
+    )
+    from src.grading_engine import generate_final_json
+
+    failed_ids = sorted(q_id for q_id, r in answers if r.get("failed"))
+    # Metrik ikut dikirim sebagai sinyal pre-scoring (no_speech_prob dll.)
+    grading_inputs = [
+        (q_id, r["transcript"], r["metrics"]["wpm"], r["metrics"])
+        for q_id, r in answers
+        if not r.get("failed")
+    ]
+    grades, overall_summary, batched_report = [], None, None
+    t0 = time.perf_counter()
+    if grading_inputs and batched:
+        grades, overall_summary, batched_report = run_batched_grading(
+            grading_inputs, timeout=llm_timeout, role_id=role_id
+        )
+    elif grading_inputs:
+        grades, overall_summary = grade_answers_concurrently(
+            grading_inputs,
+            concurrency=llm_concurrency,
+            timeout=llm_timeout,
+            role_id=role_id,
+        )
+    grading_seconds = time.perf_counter() - t0
+
+    audio_by_id = dict(answers)
+    results = [
+        dict(
+            grade,
+            transcript=audio_by_id[grade["id"]]["transcript"],
+            metrics=audio_by_id[grade["id"]]["metrics"],
+        )
+        for grade in grades
+    ]
+    payload = generate_final_json(
+        {}, results, ai_overall_notes=overall_summary, role_id=role_id
+    )
+    payload["incomplete"] = bool(failed_ids)
+    payload["reviewChecklistResult"]["interviews"]["failedQuestions"] = failed_ids
+    if failed_ids:
+        # Kegagalan server bukan jawaban kosong: jangan diputuskan otomatis
+        payload["decision"] = "NEED REVIEW"
+    report_path = Path(output_dir) / f"{candidate}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    # Penilaian yang berakhir error tidak dihitung
+    graded = sum(
+        1
+        for grade in grades
+        if not str(grade["reason"]).startswith(GRADING_ERROR_PREFIX)
+    )
+    return grading_seconds, batched_report, graded
+
+
+def run_batch(
+    jobs,
+    output_dir,
+    workers=None,
+    candidate_concurrency=4,
+    llm_concurrency=5,
+    llm_timeout=60,
+    batched_grading=False,
+    role_id=None,
+):
+    """
+    Menjalankan seluruh job. Tahap CPU-bound (ffmpeg, Whisper, librosa) di
+    process pool; begitu semua jawaban seorang kandidat selesai ditranskripsi,
+    penilaian LLM-nya berjalan konkuren di thread pool terpisah.
+    Semua kandidat dinilai dengan soal role `role_id` (None = role default).
+    """
+    from src.prescoring import prescoring_stats
+    from src.question_bank import get_role
+    from src.telemetry import (
+        get_telemetry,
+        merge_snapshots,
+        span_summary,
+        to_json,
+        to_prometheus,
+    )
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    errors = []
+    # Satu jawaban per (kandidat, soal): duplikat (mis. q1.mp4 & q1.wav)
+    # ditolak & dilaporkan, bukan ditimpa diam-diam
+    unique_jobs = {}
+    for job in jobs:
+        key = (job["candidate"], job["question_id"])
+        if key in unique_jobs:
+            errors.append(
+                {
+                    "candidate": job["candidate"],
+                    "question_id": job["question_id"],
+                    "path": job["path"],
+                    "error": (
+                        f"Jawaban ganda untuk soal {job['question_id']} "
+                        f"(dipakai: {unique_jobs[key]['path']})"
+                    ),
+                }
+            )
+            print(f"⚠️ {errors[-1]['candidate']}: {errors[-1]['error']}")
+            continue
+        unique_jobs[key] = job
+    duplicates = len(jobs) - len(unique_jobs)
+    jobs = list(unique_jobs.values())
+
+    role = get_role(role_id)
+    # Soal di luar role ditolak (tidak diproses & tidak dinilai)
+    unknown = [job for job in jobs if job["question_id"] not in role]
+    for job in unknown:
+        errors.append(
+            {
+                "candidate": job["candidate"],
+                "question_id": job["question_id"],
+                "path": job["path"],
+                "error": f"Soal {job['question_id']} tidak ada di role {role.role_id}",
+            }
+        )
+        print(f"⚠️ {job['candidate']}: {errors[-1]['error']}")
+    jobs = [job for job in jobs if job["question_id"] in role]
+
+    cores = os.cpu_count() or 1
+    workers = max(1, min(workers or cores, len(jobs) or 1))
+    cpu_threads = max(1, cores // workers)
+
+    expected = {}
+    for job in jobs:
+        expected[job["candidate"]] = expected.get(job["candidate"], 0) + 1
+    for candidate, count in expected.items():
+        if count != len(role.questions):
+            print(
+                f"⚠️ Kandidat {candidate} memiliki {count} jawaban "
+                f"(bukan {len(role.questions)})."
+            )
+
+    transcribed = {candidate: [] for candidate in expected}
+    stage_seconds = {"extract": 0.0, "transcribe": 0.0, "metrics": 0.0, "grading": 0.0}
+    audio_seconds = 0.0
+    cache_hits = 0
+    upload_totals = {"bytes": 0, "wavBytes": 0, "seconds": 0.0}
+    grading_futures = {}
+    graded_answers = 0
+    graded_candidates = 0
+    batched_totals = {}
+    audio_telemetry = []
+
+    started_at = datetime.now()
+    t_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=candidate_concurrency) as llm_pool:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(cpu_threads,),
+        ) as cpu_pool:
+            cpu_futures = {
+                cpu_pool.submit(process_answer_audio, job): job for job in jobs
+            }
+            for future in as_completed(cpu_futures):
+                job = cpu_futures[future]
+                try:
+                    audio_result = future.result()
+                except Exception as e:
+                    errors.append(
+                        {
+                            "candidate": job["candidate"],
+                            "question_id": job["question_id"],
+                            "path": job["path"],
+                            "error": str(e),
+                        }
+                    )
+                    print(f"❌ {job['candidate']} Q{job['question_id']}: {e}")
+                    audio_result = {
+                        "transcript": "",
+                        "metrics": {"wpm": 0, "long_pauses": 0, "duration": 0.0},
+                        "timings": {},
+                        "cached": False,
+                        "failed": True,
+                    }
+
+                for stage, seconds in audio_result["timings"].items():
+                    stage_seconds[stage] += seconds
+                audio_seconds += audio_result["metrics"].get("duration", 0.0)
+                cache_hits += 1 if audio_result["cached"] else 0
+                audio_telemetry.append(audio_result.get("telemetry"))
+                upload = audio_result.get("upload") or {}
+                upload_totals["bytes"] += upload.get("upload_bytes", 0)
+                upload_totals["wavBytes"] += upload.get("wav_bytes", 0)
+                upload_totals["seconds"] += upload.get("upload_seconds", 0.0)
+
+                answers = transcribed[job["candidate"]]
+                answers.append((job["question_id"], audio_result))
+                if len(answers) == expected[job["candidate"]]:
+                    grading_futures[
+                        llm_pool.submit(
+                            grade_candidate,
+                            job["candidate"],
+                            answers,
+                            output_dir,
+                            llm_concurrency,
+                            llm_timeout,
+                            batched_grading,
+                            role.role_id,
+                        )
+                    ] = job["candidate"]
+
+        for future in as_completed(grading_futures):
+            candidate = grading_futures[future]
+            try:
+                grading_seconds, batched_report, graded = future.result()
+            except Exception as e:
+                # Satu kandidat gagal tidak menggagalkan run (summary tetap ditulis)
+                errors.append({"candidate": candidate, "error": str(e)})
+                print(f"❌ Kandidat {candidate} gagal dinilai: {e}")
+                continue
+            graded_answers += graded
+            graded_candidates += 1
+            stage_seconds["grading"] += grading_seconds
+            for field, value in (batched_report or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    batched_totals[field] = batched_totals.get(field, 0) + value
+            print(f"✅ Kandidat {candidate} selesai dinilai.")
+
+    wall_time = time.perf_counter() - t_start
+
+    answers = len(jobs)
+    summary = {
+        "startedAt": started_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "wallTimeSeconds": round(wall_time, 2),
+        "workers": workers,
+        "cpuThreadsPerWorker": cpu_threads,
+        "candidateConcurrency": candidate_concurrency,
+        "role": role.role_id,
+        "llmConcurrency": llm_concurrency,
+        "candidates": len(expected),
+        "answers": answers,
+        "gradedAnswers": graded_answers,
+        "failedAnswers": answers - graded_answers,
+        "duplicateAnswers": duplicates,
+        "unknownQuestionAnswers": len(unknown),
+        "cachedAnswers": cache_hits,
+        "audioSeconds": round(audio_seconds, 2),
+        "throughput": {
+            # Hanya jawaban/kandidat yang berhasil dinilai
+            "answersPerMinute": (
+                round(graded_answers / wall_time * 60, 2) if wall_time else 0
+            ),
+            "candidatesPerHour": (
+                round(graded_candidates / wall_time * 3600, 2) if wall_time else 0
+            ),
+            "realtimeFactor": (
+                round(wall_time / audio_seconds, 3) if audio_seconds else None
+            ),
+        },
+        "stageSecondsTotal": {k: round(v, 2) for k, v in stage_seconds.items()},
+        "cloudUpload": {k: round(v, 2) for k, v in upload_totals.items()},
+        "errors": errors,
+    }
+    summary["prescoring"] = prescoring_stats()
+    # Span proses pool (audio) + proses utama (LLM, cache)
+    telemetry = merge_snapshots([get_telemetry().snapshot(), *audio_telemetry])
+    summary["latencyBreakdown"] = span_summary(telemetry)
+    (output_dir / "metrics.prom").write_text(to_prometheus(telemetry), encoding="utf-8")
+    (output_dir / "metrics.json").write_text(to_json(telemetry), encoding="utf-8")
+    if batched_grading:
+        summary["batchedGrading"] = {k: round(v, 2) for k, v in batched_totals.items()}
+    with open(output_dir / "run_summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.batch",
+        description="Penilaian wawancara batch tanpa UI Streamlit.",
+    )
+    parser.add_argument("source", help="Folder kandidat atau manifest JSON/CSV.")
+    parser.add_argument(
+        "--output-dir", default="reports", help="Folder laporan (default: reports)."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Jumlah process untuk tahap CPU (default: jumlah core).",
+    )
+    parser.add_argument(
+        "--candidate-concurrency",
+        type=int,
+        default=4,
+        help="Jumlah kandidat yang dinilai LLM bersamaan (default: 4).",
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=5,
+        help="Panggilan LLM paralel per kandidat (default: 5).",
+    )
+    parser.add_argument(
+        "--batched-grading",
+        action="store_true",
+        help="Nilai semua jawaban kandidat dalam satu panggilan LLM.",
+    )
+    parser.add_argument(
+        "--role",
+        default=None,
+        help="Role bank soal untuk semua kandidat (default: role default bank).",
+    )
+    parser.add_argument(
+        "--llm-timeout",
+        type=float,
+        default=60,
+        help="Timeout per panggilan LLM dalam detik (default: 60).",
+    )
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.source)
+    if not jobs:
+        print("Tidak ada jawaban yang ditemukan.")
+        return 1
+
+    print(f"Memproses {len(jobs)} jawaban...")
+    summary = run_batch(
+        jobs,
+        args.output_dir,
+        workers=args.workers,
+        candidate_concurrency=args.candidate_concurrency,
+        llm_concurrency=args.llm_concurrency,
+        llm_timeout=args.llm_timeout,
+        batched_grading=args.batched_grading,
+        role_id=args.role,
+    )
+    print(json.dumps(summary["throughput"], indent=2))
+    print(f"Laporan tersimpan di: {args.output_dir}")
+    return 0 if not summary["errors"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Cache hasil (transkrip, metrik, nilai) berbasis hash konten, disimpan di SQLite.
+
+Key dibentuk dari hash isi file upload + parameter yang memengaruhi hasil
+(model Whisper, prompt, model LLM, versi rubrik), sehingga analisis ulang
+video yang sama cukup membaca cache. Ukuran total dibatasi dengan eviksi LRU.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from src.telemetry import increment, span
+
+CACHE_DIR = Path(__file__).parent.parent / "temp" / "cache"
+CACHE_PATH = CACHE_DIR / "results.sqlite"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Label metrik cache_lookups per field statistik
+CACHE_RESULT_LABELS = {"hits": "hit", "misses": "miss"}
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def hash_file(path):
+    """SHA-256 dari isi file di disk, dibaca per chunk."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Cache key-value persisten (SQLite) dengan batas ukuran & eviksi LRU."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(namespace, key_parts):
+        raw = json.dumps([namespace, *key_parts], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, namespace, field):
+        with self._lock:
+            ns_stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            ns_stats[field] += 1
+        increment(
+            "cache_lookups", namespace=namespace, result=CACHE_RESULT_LABELS[field]
+        )
+
+    def get(self, namespace, key_parts):
+        """Ambil nilai dari cache (None jika tidak ada)."""
+        key = self.make_key(namespace, key_parts)
+        try:
+            with span(f"cache.get.{namespace}"), self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE entries SET last_access = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+        except sqlite3.Error as e:
+            print(f"Warning cache: {e}")
+            row = None
+
+        if row is None:
+            self._count(namespace, "misses")
+            return None
+        self._count(namespace, "hits")
+        return json.loads(row[0])
+
+    def set(self, namespace, key_parts, value):
+        """Simpan nilai (harus JSON-serializable), lalu eviksi LRU bila penuh."""
+        key = self.make_key(namespace, key_parts)
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        try:
+            with span(f"cache.set.{namespace}"), self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                    (key, namespace, payload, size, time.time()),
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"Warning cache: {e}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def stats(self):
+        """Statistik hit/miss per namespace (dalam proses ini)."""
+        with self._lock:
+            per_namespace = {ns: dict(s) for ns, s in self._stats.items()}
+        hits = sum(s["hits"] for s in per_namespace.values())
+        misses = sum(s["misses"] for s in per_namespace.values())
+        return {"hits": hits, "misses": misses, "namespaces": per_namespace}
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Instance ResultCache bersama (satu per proses)."""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+        return _result_cache
@@ -1,10 +1,15 @@
 from datetime import datetime
+from src.question_bank import get_role
 
-def generate_final_json(candidate_data, assessment_results, ai_overall_notes=None):
-    # Hitung skor total (Logika pembobotan)
-    raw_score_sum = sum([res["score"] for res in assessment_results])
-    # Skala 100: (Total / 20) * 100
-    interview_final_score = (raw_score_sum / 20) * 100
+def generate_final_json(
+    candidate_data, assessment_results, ai_overall_notes=None, role_id=None
+):
+    # Skala skor per soal (min/max) & ambang lulus diambil dari bank soal
+    role = get_role(role_id)
+    # Skala 100: (Total - min * n) / ((max - min) * N) * 100, N = jumlah soal role
+    interview_final_score = role.interview_percent(
+        res["score"] for res in assessment_results
+    )
 
     # Asumsi Project Score 100 (Placeholder)
     project_score = 100
@@ -27,7 +32,9 @@ def generate_final_json(candidate_data, assessment_results, ai_overall_notes=Non
     
     output_payload = {
         "assessorProfile": {"id": 1, "name": "xxx", "photoUrl": "xxx"},
-        "decision": "PASSED" if interview_final_score >= 70 else "NEED REVIEW",
+        "decision": (
+            "PASSED" if interview_final_score >= role.pass_percent else "NEED REVIEW"
+        ),
         "reviewedAt": current_time_str,
         "scoresOverview": {
             "project": project_score,
@@ -36,7 +43,12 @@ def generate_final_json(candidate_data, assessment_results, ai_overall_notes=Non
         },
         "reviewChecklistResult": {
             "project": [],
-            "interviews": {"minScore": 0, "maxScore": 4, "scores": scores_list},
+            "interviews": {
+                "role": role.role_id,
+                "minScore": role.min_score,
+                "maxScore": role.max_score,
+                "scores": scores_list,
+            },
         },
         "Overall notes": final_notes,
     }
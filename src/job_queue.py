@@ -0,0 +1,338 @@
+"""
+Antrian job assessment berbasis SQLite (tanpa broker eksternal).
+
+App men-submit job (satu jawaban: file upload + nomor soal), worker process
+(src/worker.py) mengambil job secara atomik, melaporkan progress, lalu
+menyimpan hasil. Status job ada di disk, jadi tetap bisa dipantau setelah
+browser di-refresh atau app restart. Job yang worker-nya mati (heartbeat
+basi) dikembalikan ke antrian.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+JOB_DIR = Path(__file__).parent.parent / "temp" / "jobs"
+JOB_DB_PATH = JOB_DIR / "jobs.sqlite"
+# Job running tanpa heartbeat selama ini dianggap yatim & diantrikan ulang
+JOB_STALE_SECONDS = 120
+JOB_MAX_ATTEMPTS = 3
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class JobQueue:
+    """Antrian job persisten (SQLite WAL), aman dipakai banyak proses."""
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    dedupe_key TEXT,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    stage TEXT,
+                    partial_text TEXT,
+                    worker TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_status_created ON jobs(status, created_at)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_dedupe ON jobs(dedupe_key)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS workers (
+                    id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    detail TEXT,
+                    load_seconds REAL,
+                    updated_at REAL NOT NULL,
+                    stats TEXT
+                )
+                """
+            )
+            try:
+                # Antrian lama (sebelum ada statistik model per worker)
+                conn.execute("ALTER TABLE workers ADD COLUMN stats TEXT")
+            except sqlite3.OperationalError:
+                pass
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE: kunci tulis diambil di awal agar claim antar
+        # worker tidak balapan
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, payload, dedupe_key=None):
+        """
+        Tambah job ke antrian, kembalikan id-nya. Jika `dedupe_key` diisi dan
+        job yang sama masih antri/berjalan, atau selesai tanpa error, id job
+        itu yang dipakai (job gagal selalu bisa di-submit ulang).
+        """
+        with self._transaction() as conn:
+            if dedupe_key is not None:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND ("
+                    "status IN (?, ?) OR (status = ? AND error IS NULL)) "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (dedupe_key, JOB_QUEUED, JOB_RUNNING, JOB_DONE),
+                ).fetchone()
+                if row is not None:
+                    return row["id"]
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, dedupe_key, status, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, dedupe_key, JOB_QUEUED, json.dumps(payload), time.time()),
+            )
+            return job_id
+
+    def claim(self, worker_id):
+        """Ambil job antrian tertua secara atomik (None jika kosong)."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, "
+                "started_at = ?, heartbeat_at = ?, progress = 0, stage = NULL "
+                "WHERE id = ?",
+                (JOB_RUNNING, worker_id, now, now, row["id"]),
+            )
+            return self._to_dict(
+                conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            )
+
+    def update_progress(self, job_id, progress, stage=None, partial_text=None):
+        """Laporkan progress (0..1) sekaligus heartbeat worker."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, stage = COALESCE(?, stage), "
+                "partial_text = COALESCE(?, partial_text), heartbeat_at = ? "
+                "WHERE id = ? AND status = ?",
+                (progress, stage, partial_text, time.time(), job_id, JOB_RUNNING),
+            )
+
+    def heartbeat(self, job_id):
+        """Tandai worker masih hidup (untuk tahap panjang tanpa progress)."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?",
+                (time.time(), job_id, JOB_RUNNING),
+            )
+
+    def complete(self, job_id, worker_id, result):
+        """
+        Simpan hasil job milik `worker_id`. False jika job sudah bukan miliknya
+        (diantrikan ulang karena heartbeat basi & diambil worker lain).
+        """
+        with self._connect() as conn:
+            return (
+                conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, progress = 1, "
+                    "finished_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                    (
+                        JOB_DONE,
+                        json.dumps(result, ensure_ascii=False),
+                        time.time(),
+                        job_id,
+                        JOB_RUNNING,
+                        worker_id,
+                    ),
+                ).rowcount
+                == 1
+            )
+
+    def fail(self, job_id, worker_id, error):
+        """Tandai job milik `worker_id` gagal (False jika sudah bukan miliknya)."""
+        with self._connect() as conn:
+            return (
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                    "WHERE id = ? AND status = ? AND worker = ?",
+                    (
+                        JOB_FAILED,
+                        str(error),
+                        time.time(),
+                        job_id,
+                        JOB_RUNNING,
+                        worker_id,
+                    ),
+                ).rowcount
+                == 1
+            )
+
+    def get(self, job_id):
+        """Status lengkap satu job (None jika tidak ada)."""
+        with self._connect() as conn:
+            return self._to_dict(
+                conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            )
+
+    def active_input_paths(self):
+        """Path input job yang masih antri/berjalan (jangan dihapus workspace)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT payload FROM jobs WHERE status IN (?, ?)",
+                (JOB_QUEUED, JOB_RUNNING),
+            ).fetchall()
+        payloads = (json.loads(row["payload"]) for row in rows)
+        return [p["input_path"] for p in payloads if p.get("input_path")]
+
+    def requeue_stale(self, stale_seconds=JOB_STALE_SECONDS):
+        """
+        Kembalikan job running yang heartbeat-nya basi ke antrian (worker
+        mati di tengah job); job yang sudah terlalu sering dicoba ditandai gagal.
+        """
+        cutoff = time.time() - stale_seconds
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+                (
+                    JOB_FAILED,
+                    "Worker berhenti di tengah job",
+                    time.time(),
+                    JOB_RUNNING,
+                    cutoff,
+                    JOB_MAX_ATTEMPTS,
+                ),
+            )
+            return conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL "
+                "WHERE status = ? AND heartbeat_at < ?",
+                (JOB_QUEUED, JOB_RUNNING, cutoff),
+            ).rowcount
+
+    def stats(self):
+        """Jumlah job per status + posisi antrian (untuk monitoring)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+            ).fetchall()
+            workers = conn.execute(
+                "SELECT COUNT(DISTINCT worker) FROM jobs WHERE status = ?",
+                (JOB_RUNNING,),
+            ).fetchone()[0]
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        counts["busyWorkers"] = workers
+        return counts
+
+    def set_worker_state(
+        self, worker_id, state, detail=None, load_seconds=None, stats=None
+    ):
+        """
+        Laporkan status worker (loading/ready/busy/error), sekaligus
+        heartbeat. `detail`/`load_seconds`/`stats` (dict statistik model)
+        yang None tidak menimpa nilai lama.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO workers (id, state, detail, load_seconds, updated_at, stats) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET state = excluded.state, "
+                "detail = COALESCE(excluded.detail, detail), "
+                "load_seconds = COALESCE(excluded.load_seconds, load_seconds), "
+                "stats = COALESCE(excluded.stats, stats), "
+                "updated_at = excluded.updated_at",
+                (
+                    worker_id,
+                    state,
+                    detail,
+                    load_seconds,
+                    time.time(),
+                    json.dumps(stats) if stats is not None else None,
+                ),
+            )
+
+    def worker_states(self, max_age_seconds=JOB_STALE_SECONDS):
+        """Status worker yang masih melapor dalam `max_age_seconds` terakhir."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM workers WHERE updated_at >= ? ORDER BY id",
+                (time.time() - max_age_seconds,),
+            ).fetchall()
+        states = [dict(row) for row in rows]
+        for state in states:
+            state["stats"] = json.loads(state["stats"]) if state["stats"] else None
+        return states
+
+    def queue_position(self, job_id):
+        """Jumlah job antri di depan job ini (0 = berikutnya)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT created_at FROM jobs WHERE id = ? AND status = ?",
+                (job_id, JOB_QUEUED),
+            ).fetchone()
+            if row is None:
+                return 0
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                (JOB_QUEUED, row["created_at"]),
+            ).fetchone()[0]
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Instance JobQueue bersama (satu per proses)."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
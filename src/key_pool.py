@@ -0,0 +1,195 @@
+"""
+Pool API key Groq dengan penjadwalan berbasis sisa rate limit.
+
+Setiap key punya satu client persisten. Sisa request/token dibaca dari header
+`x-ratelimit-*` setiap respons, lalu panggilan berikutnya diarahkan ke key
+dengan headroom terbesar. Key yang terkena 429 diistirahatkan (circuit open)
+dengan backoff eksponensial atau sesuai `retry-after`, dan tidak dipanggil
+sampai circuit-nya tertutup lagi.
+"""
+
+import re
+import threading
+import time
+
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+# Jika semua key istirahat, tunggu key tercepat pulih paling lama selama ini;
+# lebih lama dari itu panggilan langsung gagal (fail fast)
+KEY_WAIT_MAX_SECONDS = 10.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_seconds(value):
+    """Parse durasi reset Groq ("2m59.56s", "7.66s", "120ms") ke detik."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(str(value))
+    if not parts:
+        return None
+    return sum(float(num) * _DURATION_UNITS[unit] for num, unit in parts)
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class KeyState:
+    """Status satu API key: client, sisa kuota, dan circuit breaker."""
+
+    def __init__(self, index, api_key, client):
+        self.index = index
+        self.api_key = api_key
+        self.client = client
+        self.limit_requests = None
+        self.remaining_requests = None
+        self.limit_tokens = None
+        self.remaining_tokens = None
+        self.exhausted_until = 0.0
+        self.open_until = 0.0
+        self.consecutive_429 = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+
+    @property
+    def label(self):
+        return f"key-{self.index} (...{self.api_key[-4:]})"
+
+    def headroom(self, now):
+        """Skor 0..1: fraksi kuota tersisa (request & token), dikurangi beban aktif."""
+        if now < self.open_until or now < self.exhausted_until:
+            return -1.0
+        ratios = []
+        if self.limit_requests and self.remaining_requests is not None:
+            ratios.append(self.remaining_requests / self.limit_requests)
+        if self.limit_tokens and self.remaining_tokens is not None:
+            ratios.append(self.remaining_tokens / self.limit_tokens)
+        # Key yang belum pernah dipakai dianggap penuh
+        score = min(ratios) if ratios else 1.0
+        return score / (1 + self.in_flight)
+
+
+class GroqKeyPool:
+    """Penjadwal panggilan ke beberapa API key Groq (thread-safe)."""
+
+    def __init__(self, api_keys, client_factory):
+        self._lock = threading.Lock()
+        self._keys = [
+            KeyState(i, key, client_factory(key)) for i, key in enumerate(api_keys)
+        ]
+
+    def _ready_keys(self, now):
+        with self._lock:
+            ready = [k for k in self._keys if k.headroom(now) >= 0]
+            ready.sort(key=lambda k: k.headroom(now), reverse=True)
+            reset_at = min(
+                (max(k.open_until, k.exhausted_until) for k in self._keys),
+                default=now,
+            )
+        return ready, reset_at
+
+    def candidates(self, max_wait=KEY_WAIT_MAX_SECONDS):
+        """
+        Urutan key untuk satu panggilan: headroom terbesar lebih dulu. Key
+        yang circuit-open tidak ikut. Jika semua key istirahat, tunggu key
+        tercepat pulih (paling lama `max_wait` detik); jika lebih lama,
+        kembalikan list kosong.
+        """
+        ready, reset_at = self._ready_keys(time.monotonic())
+        if ready or not self._keys:
+            return ready
+        wait = reset_at - time.monotonic()
+        if wait > max_wait:
+            return []
+        time.sleep(max(0.0, wait))
+        return self._ready_keys(time.monotonic())[0]
+
+    def seconds_until_ready(self):
+        """Detik sampai ada key yang bisa dipakai (0 jika sudah ada)."""
+        now = time.monotonic()
+        ready, reset_at = self._ready_keys(now)
+        return 0.0 if ready else max(0.0, reset_at - now)
+
+    def acquire(self, state):
+        with self._lock:
+            state.in_flight += 1
+            state.calls += 1
+
+    def release(self, state):
+        with self._lock:
+            state.in_flight = max(0, state.in_flight - 1)
+
+    def record_success(self, state, headers):
+        """Update sisa kuota dari header rate limit & tutup circuit."""
+        with self._lock:
+            state.consecutive_429 = 0
+            state.open_until = 0.0
+            self._update_limits(state, headers)
+
+    def record_rate_limited(self, state, headers=None):
+        """Key kena 429: buka circuit dengan backoff eksponensial / retry-after."""
+        with self._lock:
+            state.rate_limited += 1
+            state.failures += 1
+            state.consecutive_429 += 1
+            backoff = min(
+                BACKOFF_MAX_SECONDS,
+                BACKOFF_BASE_SECONDS * (2 ** (state.consecutive_429 - 1)),
+            )
+            retry_after = parse_reset_seconds(headers.get("retry-after")) if headers else None
+            state.open_until = time.monotonic() + max(backoff, retry_after or 0.0)
+            if headers:
+                self._update_limits(state, headers)
+
+    def record_failure(self, state):
+        with self._lock:
+            state.failures += 1
+
+    def _update_limits(self, state, headers):
+        if not headers:
+            return
+        now = time.monotonic()
+        for field in ("limit_requests", "remaining_requests", "limit_tokens", "remaining_tokens"):
+            value = _to_int(headers.get("x-ratelimit-" + field.replace("_", "-")))
+            if value is not None:
+                setattr(state, field, value)
+
+        # Kuota habis: jangan pakai key ini sampai jendela rate limit reset
+        waits = []
+        if state.remaining_requests == 0:
+            waits.append(parse_reset_seconds(headers.get("x-ratelimit-reset-requests")))
+        if state.remaining_tokens == 0:
+            waits.append(parse_reset_seconds(headers.get("x-ratelimit-reset-tokens")))
+        waits = [w for w in waits if w]
+        state.exhausted_until = now + max(waits) if waits else 0.0
+
+    def stats(self):
+        """Ringkasan status tiap key (untuk monitoring)."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "key": k.label,
+                    "calls": k.calls,
+                    "failures": k.failures,
+                    "rateLimited": k.rate_limited,
+                    "inFlight": k.in_flight,
+                    "remainingRequests": k.remaining_requests,
+                    "remainingTokens": k.remaining_tokens,
+                    "circuitOpenSeconds": round(
+                        max(0.0, max(k.open_until, k.exhausted_until) - now), 1
+                    ),
+                }
+                for k in self._keys
+            ]
@@ -0,0 +1,185 @@
+"""
+Memoization respons LLM untuk call_llm_with_fallback.
+
+- Tier 1: LRU di memori (jumlah entri dibatasi) dengan TTL.
+- Tier 2 (opsional): ResultCache SQLite, agar tetap hit setelah restart.
+- Permintaan identik yang sedang berjalan digabung (in-flight dedup):
+  hanya satu panggilan ke Groq, pemanggil lain menunggu hasil yang sama
+  (dibatasi timeout).
+- Hanya respons yang lolos validasi pemanggil yang disimpan.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from src.cache import ResultCache, get_result_cache
+from src.telemetry import increment
+
+LLM_CACHE_MAX_ENTRIES = 512
+LLM_CACHE_TTL_SECONDS = 24 * 60 * 60
+LLM_CACHE_NAMESPACE = "llm"
+# Batas tunggu request identik yang sedang berjalan jika timeout tidak diberikan
+LLM_CACHE_JOIN_TIMEOUT_SECONDS = 120
+
+
+class LLMResponseCache:
+    """LRU + TTL + tier persisten opsional + penggabungan request in-flight."""
+
+    def __init__(
+        self,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds=LLM_CACHE_TTL_SECONDS,
+        persistent=None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._stats = {
+            "memoryHits": 0,
+            "persistentHits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expired": 0,
+            "rejected": 0,
+        }
+
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            self._stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _get_persistent(self, key):
+        if self.persistent is None:
+            return None
+        stored = self.persistent.get(LLM_CACHE_NAMESPACE, (key,))
+        if stored is None:
+            return None
+        if time.time() >= stored["expires_at"]:
+            with self._lock:
+                self._stats["expired"] += 1
+            return None
+        return stored
+
+    def get_or_call(self, key_parts, compute, timeout=None, validate=None):
+        """
+        Kembalikan nilai ter-cache untuk `key_parts`, atau jalankan
+        `compute()` sekali saja meskipun dipanggil bersamaan dari banyak thread.
+        Penunggu request yang sedang berjalan menunggu paling lama `timeout`
+        detik (None = LLM_CACHE_JOIN_TIMEOUT_SECONDS), lalu TimeoutError.
+        Exception dari `compute` diteruskan ke semua penunggu & tidak di-cache;
+        nilai yang `validate(value)`-nya False dikembalikan tapi tidak di-cache.
+        """
+        key = ResultCache.make_key(LLM_CACHE_NAMESPACE, key_parts)
+
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                self._stats["memoryHits"] += 1
+                increment("llm_cache_lookups", result="memory_hit")
+                return value
+            pending = self._in_flight.get(key)
+            owner = pending is None
+            if owner:
+                pending = Future()
+                self._in_flight[key] = pending
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            increment("llm_cache_lookups", result="coalesced")
+            wait_seconds = timeout
+            if wait_seconds is None:
+                wait_seconds = LLM_CACHE_JOIN_TIMEOUT_SECONDS
+            try:
+                return pending.result(wait_seconds)
+            except FutureTimeoutError as e:
+                raise TimeoutError(
+                    f"Menunggu respons LLM identik melebihi {wait_seconds} detik"
+                ) from e
+
+        try:
+            stored = self._get_persistent(key)
+            if stored is not None and validate is not None:
+                # Entri lama yang tersimpan sebelum ada validasi
+                stored = stored if validate(stored["value"]) else None
+            if stored is not None:
+                value = stored["value"]
+                expires_at = stored["expires_at"]
+                with self._lock:
+                    self._stats["persistentHits"] += 1
+                increment("llm_cache_lookups", result="persistent_hit")
+            else:
+                with self._lock:
+                    self._stats["misses"] += 1
+                increment("llm_cache_lookups", result="miss")
+                value = compute()
+                expires_at = time.time() + self.ttl_seconds
+                if validate is not None and not validate(value):
+                    # Respons tidak lengkap/tidak valid: jangan dipakai ulang
+                    expires_at = None
+                    with self._lock:
+                        self._stats["rejected"] += 1
+                    increment("llm_cache_rejected")
+                elif self.persistent is not None:
+                    self.persistent.set(
+                        LLM_CACHE_NAMESPACE,
+                        (key,),
+                        {"value": value, "expires_at": expires_at},
+                    )
+            if expires_at is not None:
+                with self._lock:
+                    self._put_memory(key, value, expires_at)
+            pending.set_result(value)
+            return value
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["inFlight"] = len(self._in_flight)
+        stats["hits"] = stats["memoryHits"] + stats["persistentHits"]
+        return stats
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Instance LLMResponseCache bersama, tier persisten memakai ResultCache."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache(persistent=get_result_cache())
+        return _llm_cache
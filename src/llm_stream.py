@@ -0,0 +1,202 @@
+"""
+Pembacaan respons LLM secara streaming (token demi token).
+
+PartialJSONObject mem-parse objek JSON datar secara inkremental: field yang
+sudah lengkap (mis. "score") tersedia begitu ditutup, dan string yang masih
+ditulis (mis. "reason") bisa ditampilkan sebagian. Teks di luar objek
+(mis. pagar ```json) diabaikan; validasi akhir tetap memakai json.loads.
+"""
+
+import json
+import time
+
+_WHITESPACE = " \t\r\n"
+
+
+def _decode_partial_string(raw):
+    """Decode isi string JSON yang mungkin terpotong di tengah escape."""
+    # Escape terpanjang "\\uXXXX" = 6 karakter: potong maksimal 5 karakter akhir
+    for cut in range(6):
+        try:
+            return json.loads(f'"{raw[: len(raw) - cut]}"', strict=False)
+        except json.JSONDecodeError:
+            continue
+    return raw
+
+
+class PartialJSONObject:
+    """Parser inkremental objek JSON top-level (state dipertahankan antar feed)."""
+
+    def __init__(self):
+        self.fields = {}
+        self._state = "start"
+        self._key = None
+        self._raw = []
+        self._escape = False
+        self._depth = 0
+        self._nested_string = False
+
+    def _finish_value(self, value):
+        self.fields[self._key] = value
+        self._raw = []
+
+    def _finish_scalar(self):
+        token = "".join(self._raw)
+        try:
+            self._finish_value(json.loads(token))
+        except json.JSONDecodeError:
+            self._finish_value(token)
+
+    def feed(self, text):
+        """Proses potongan teks berikutnya."""
+        for char in text:
+            state = self._state
+            if state == "start":
+                if char == "{":
+                    self._state = "key_or_end"
+            elif state == "key_or_end":
+                if char == '"':
+                    self._state = "key"
+                elif char == "}":
+                    self._state = "done"
+            elif state in ("key", "string"):
+                if self._escape:
+                    self._raw.append(char)
+                    self._escape = False
+                elif char == "\\":
+                    self._raw.append(char)
+                    self._escape = True
+                elif char == '"':
+                    raw = "".join(self._raw)
+                    if state == "key":
+                        self._key = _decode_partial_string(raw)
+                        self._raw = []
+                        self._state = "colon"
+                    else:
+                        self._finish_value(_decode_partial_string(raw))
+                        self._state = "comma"
+                else:
+                    self._raw.append(char)
+            elif state == "colon":
+                if char == ":":
+                    self._state = "value"
+            elif state == "value":
+                if char in _WHITESPACE:
+                    continue
+                if char == '"':
+                    self._state = "string"
+                elif char in "{[":
+                    self._raw = [char]
+                    self._depth = 1
+                    self._state = "nested"
+                else:
+                    self._raw = [char]
+                    self._state = "scalar"
+            elif state == "scalar":
+                if char in ",}" or char in _WHITESPACE:
+                    self._finish_scalar()
+                    self._state = {",": "key_or_end", "}": "done"}.get(char, "comma")
+                else:
+                    self._raw.append(char)
+            elif state == "nested":
+                self._raw.append(char)
+                if self._nested_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == "\\":
+                        self._escape = True
+                    elif char == '"':
+                        self._nested_string = False
+                elif char == '"':
+                    self._nested_string = True
+                elif char in "{[":
+                    self._depth += 1
+                elif char in "}]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._finish_scalar()
+                        self._state = "comma"
+            elif state == "comma":
+                if char == ",":
+                    self._state = "key_or_end"
+                elif char == "}":
+                    self._state = "done"
+
+    def snapshot(self):
+        """Field lengkap + string yang sedang ditulis (sebagian)."""
+        fields = dict(self.fields)
+        if self._state == "string":
+            fields[self._key] = _decode_partial_string("".join(self._raw))
+        return fields
+
+
+def parse_json_content(content):
+    """
+    Validasi akhir: json.loads pada objek terluar (teks pembungkus seperti
+    pagar markdown dibuang). Raise json.JSONDecodeError jika tidak valid.
+    """
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end < start:
+        raise json.JSONDecodeError("Objek JSON tidak ditemukan", content, 0)
+    return json.loads(content[start : end + 1], strict=False)
+
+
+def is_useful(partial):
+    """Output parsial sudah berguna: ada field lengkap/teks yang bisa ditampilkan."""
+    return any(
+        value is not None and (not isinstance(value, str) or value.strip())
+        for value in partial.values()
+    )
+
+
+def _usage_from_chunk(chunk):
+    """Usage dari chunk terakhir (stream_options) atau ekstensi x_groq."""
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        x_groq = getattr(chunk, "x_groq", None)
+        usage = x_groq.get("usage") if isinstance(x_groq, dict) else None
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+    return (
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+    )
+
+
+def read_stream(stream, on_partial, started_at):
+    """
+    Konsumsi stream chat completion. `on_partial(dict)` dipanggil setiap kali
+    isi parsial berubah. Mengembalikan (content, usage, timings) dengan timings
+    berisi firstTokenSeconds & firstOutputSeconds relatif terhadap
+    `started_at` (perf_counter).
+    """
+    parser = PartialJSONObject()
+    pieces = []
+    usage = None
+    timings = {"firstTokenSeconds": None, "firstOutputSeconds": None}
+    last_partial = None
+    for chunk in stream:
+        usage = _usage_from_chunk(chunk) or usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if timings["firstTokenSeconds"] is None:
+            timings["firstTokenSeconds"] = time.perf_counter() - started_at
+        pieces.append(delta)
+        parser.feed(delta)
+        partial = parser.snapshot()
+        if partial != last_partial and is_useful(partial):
+            if timings["firstOutputSeconds"] is None:
+                timings["firstOutputSeconds"] = time.perf_counter() - started_at
+            last_partial = partial
+            on_partial(partial)
+    prompt_tokens, completion_tokens = usage or (0, 0)
+    return (
+        "".join(pieces),
+        {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+        timings,
+    )
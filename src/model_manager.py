@@ -0,0 +1,390 @@
+"""
+Manajer model Whisper lokal (faster-whisper) untuk satu proses.
+
+- cpu_threads & num_workers dipilih dari jatah core proses (OMP_NUM_THREADS
+  yang diset worker pool, atau jumlah core) dan jumlah transkripsi paralel.
+- Total perkiraan memori model yang dimuat dibatasi MODEL_MEMORY_BUDGET_BYTES:
+  model idle yang paling lama tidak dipakai di-unload lebih dulu, dan model
+  yang idle lebih dari MODEL_IDLE_UNLOAD_SECONDS di-unload di background.
+- Opsional: klip pendek (<= SHORT_CLIP_SECONDS) dialihkan ke model kecil
+  (LOCAL_SMALL_MODEL_PATH) jika tersedia.
+- Statistik: waktu muat, RTF (detik proses / detik audio), RSS proses.
+"""
+
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+from src.telemetry import get_telemetry, increment, span
+
+LOCAL_MODEL_PATH = os.path.join("models", "whisper-large-v3-turbo-ct2-int8")
+LOCAL_SMALL_MODEL_PATH = os.environ.get(
+    "REVIEW_SMALL_MODEL_PATH", os.path.join("models", "whisper-small-ct2-int8")
+)
+DEFAULT_MODEL = "default"
+SMALL_MODEL = "small"
+
+# Klip sependek ini dialihkan ke model kecil (0 = nonaktif)
+SHORT_CLIP_SECONDS = float(os.environ.get("REVIEW_SHORT_CLIP_SECONDS", "0"))
+# Jumlah transkripsi paralel per proses (= num_workers faster-whisper)
+MODEL_CONCURRENCY = int(os.environ.get("REVIEW_MODEL_CONCURRENCY", "1"))
+MODEL_MEMORY_BUDGET_BYTES = int(
+    float(os.environ.get("REVIEW_MODEL_MEMORY_GB", "4")) * 1024 * 1024 * 1024
+)
+MODEL_IDLE_UNLOAD_SECONDS = 15 * 60
+MODEL_REAPER_INTERVAL_SECONDS = 60
+# Lama menunggu model lain selesai dipakai sebelum menyerah (budget penuh)
+MODEL_BUDGET_WAIT_SECONDS = 120
+
+
+def plan_cpu_threads(concurrency=MODEL_CONCURRENCY, cpu_budget=None):
+    """
+    Pilih (cpu_threads, num_workers) agar cpu_threads x num_workers tidak
+    melebihi jatah core proses ini (hindari oversubscription).
+    """
+    if cpu_budget is None:
+        omp_threads = os.environ.get("OMP_NUM_THREADS", "")
+        cpu_budget = int(omp_threads) if omp_threads.isdigit() else os.cpu_count()
+    cpu_budget = max(1, cpu_budget or 1)
+    num_workers = max(1, min(concurrency, cpu_budget))
+    return max(1, cpu_budget // num_workers), num_workers
+
+
+def get_process_rss():
+    """Resident memory proses ini (byte); puncak RSS jika /proc tidak ada."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: KB, macOS: byte
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+def estimate_model_bytes(path):
+    """Perkiraan memori model CTranslate2 = ukuran file bobot di disk."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+def detect_device():
+    """("cuda", "float16") jika ada GPU untuk ctranslate2, selain itu CPU int8."""
+    import ctranslate2
+
+    # Cek GPU lewat ctranslate2 (sudah dimuat faster-whisper), tanpa import torch
+    if os.environ.get("CUDA_VISIBLE_DEVICES", None) != "-1":
+        try:
+            if ctranslate2.get_cuda_device_count() > 0:
+                return "cuda", "float16"
+        except Exception:
+            pass
+    return "cpu", "int8"
+
+
+def _load_faster_whisper(path, cpu_threads, num_workers):
+    from faster_whisper import WhisperModel
+
+    device, compute_type = detect_device()
+    model = WhisperModel(
+        path,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+    )
+    return model, device
+
+
+class _ModelSlot:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.model = None
+        self.device = None
+        # True selama model dimuat: budget-nya sudah dipesan
+        self.loading = False
+        self.estimated_bytes = estimate_model_bytes(path)
+        self.in_use = 0
+        self.last_used = 0.0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = None
+        self.inferences = 0
+        self.audio_seconds = 0.0
+        self.process_seconds = 0.0
+
+
+class ModelManager:
+    """
+    Memuat model Whisper lokal sesuai kebutuhan dengan budget memori dan
+    unload model idle (thread-safe). Dipakai lewat `acquire`/`acquire_for`
+    agar model tidak di-unload selama sedang dipakai.
+    """
+
+    def __init__(
+        self,
+        model_paths=None,
+        concurrency=MODEL_CONCURRENCY,
+        memory_budget_bytes=MODEL_MEMORY_BUDGET_BYTES,
+        idle_unload_seconds=MODEL_IDLE_UNLOAD_SECONDS,
+        short_clip_seconds=SHORT_CLIP_SECONDS,
+        loader=_load_faster_whisper,
+    ):
+        if model_paths is None:
+            model_paths = {DEFAULT_MODEL: LOCAL_MODEL_PATH}
+            if short_clip_seconds > 0 and os.path.exists(LOCAL_SMALL_MODEL_PATH):
+                model_paths[SMALL_MODEL] = LOCAL_SMALL_MODEL_PATH
+        self.cpu_threads, self.num_workers = plan_cpu_threads(concurrency)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_unload_seconds = idle_unload_seconds
+        self.short_clip_seconds = short_clip_seconds
+        self._loader = loader
+        self._slots = {name: _ModelSlot(name, path) for name, path in model_paths.items()}
+        self._condition = threading.Condition()
+        # Satu proses load per model; load model berbeda tetap paralel
+        self._load_locks = {name: threading.Lock() for name in self._slots}
+        self._reaper = None
+
+    # --- routing -----------------------------------------------------------
+
+    def routes_short_clips(self):
+        return self.short_clip_seconds > 0 and SMALL_MODEL in self._slots
+
+    def select_model(self, duration=None):
+        """Nama model untuk audio berdurasi `duration` detik."""
+        if (
+            self.routes_short_clips()
+            and duration is not None
+            and duration <= self.short_clip_seconds
+        ):
+            return SMALL_MODEL
+        return DEFAULT_MODEL
+
+    def transcriber_id(self):
+        """Identitas konfigurasi model (bagian dari key cache transkrip)."""
+        transcriber = f"local:{self._slots[DEFAULT_MODEL].path}"
+        if self.routes_short_clips():
+            transcriber += (
+                f"|<={self.short_clip_seconds:g}s:{self._slots[SMALL_MODEL].path}"
+            )
+        return transcriber
+
+    # --- load / unload -----------------------------------------------------
+
+    def _loaded_bytes(self, exclude=None):
+        """Memori model yang dimuat + yang sedang dimuat (budget terpesan)."""
+        return sum(
+            slot.estimated_bytes
+            for slot in self._slots.values()
+            if (slot.model is not None or slot.loading) and slot.name != exclude
+        )
+
+    def _make_room(self, slot):
+        """
+        Unload model idle (LRU) sampai `slot` muat dalam budget. Dipanggil
+        dengan self._condition terkunci; menunggu model lain selesai dipakai
+        jika semua model yang dimuat sedang sibuk.
+        """
+        if slot.estimated_bytes > self.memory_budget_bytes:
+            print(
+                f"Warning model: {slot.name} (~{slot.estimated_bytes / 1e6:.0f} MB) "
+                f"melebihi budget {self.memory_budget_bytes / 1e6:.0f} MB"
+            )
+            return
+        deadline = time.monotonic() + MODEL_BUDGET_WAIT_SECONDS
+        while self._loaded_bytes(exclude=slot.name) + slot.estimated_bytes > self.memory_budget_bytes:
+            idle = sorted(
+                (
+                    s
+                    for s in self._slots.values()
+                    if s.model is not None and s.in_use == 0 and s is not slot
+                ),
+                key=lambda s: s.last_used,
+            )
+            if idle:
+                self._unload(idle[0])
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(
+                    f"Budget memori model penuh, {slot.name} tidak bisa dimuat"
+                )
+            self._condition.wait(remaining)
+
+    def _unload(self, slot):
+        slot.model = None
+        slot.evictions += 1
+        increment("model_unloads", model=slot.name)
+        gc.collect()
+        print(f"Model {slot.name} di-unload (idle)")
+
+    def _ensure_loaded(self, slot):
+        """
+        Muat model `slot` jika belum (di luar self._condition). Budget dipesan
+        (slot.loading) di critical section yang sama dengan pengecekannya,
+        jadi load model lain yang paralel tidak bisa melewati budget.
+        """
+        with self._load_locks[slot.name]:
+            with self._condition:
+                if slot.model is not None:
+                    return
+                self._make_room(slot)
+                slot.loading = True
+            t0 = time.perf_counter()
+            model = None
+            try:
+                with span(f"model.load.{slot.name}"):
+                    model, device = self._loader(
+                        slot.path, self.cpu_threads, self.num_workers
+                    )
+            finally:
+                with self._condition:
+                    slot.loading = False
+                    if model is not None:
+                        slot.model, slot.device = model, device
+                        slot.load_seconds = time.perf_counter() - t0
+                        slot.loads += 1
+                        slot.last_used = time.monotonic()
+                    self._condition.notify_all()
+            print(
+                f"Model {slot.name} dimuat ({device}, {self.cpu_threads} thread x "
+                f"{self.num_workers} worker) dalam {slot.load_seconds:.1f} detik"
+            )
+        self._start_reaper()
+
+    @contextmanager
+    def acquire(self, name=DEFAULT_MODEL):
+        """Pinjam model `name` (dimuat bila perlu); yield (model, name)."""
+        slot = self._slots[name]
+        while True:
+            self._ensure_loaded(slot)
+            with self._condition:
+                # Bisa saja di-unload di antara load & pinjam: ulangi
+                if slot.model is not None:
+                    slot.in_use += 1
+                    model = slot.model
+                    break
+        try:
+            yield model, name
+        finally:
+            with self._condition:
+                slot.in_use -= 1
+                slot.last_used = time.monotonic()
+                self._condition.notify_all()
+
+    def acquire_for(self, duration=None):
+        """Pinjam model yang sesuai untuk audio berdurasi `duration` detik."""
+        return self.acquire(self.select_model(duration))
+
+    def device_name(self, name=DEFAULT_MODEL):
+        device = self._slots[name].device or "cpu"
+        return f"LOCAL ({device.upper()})"
+
+    def unload_idle(self, max_idle_seconds=None):
+        """Unload model yang idle lebih lama dari `max_idle_seconds`."""
+        max_idle_seconds = (
+            self.idle_unload_seconds if max_idle_seconds is None else max_idle_seconds
+        )
+        cutoff = time.monotonic() - max_idle_seconds
+        unloaded = 0
+        with self._condition:
+            for slot in self._slots.values():
+                if slot.model is not None and slot.in_use == 0 and slot.last_used < cutoff:
+                    self._unload(slot)
+                    unloaded += 1
+        return unloaded
+
+    def _reaper_loop(self):
+        while True:
+            time.sleep(MODEL_REAPER_INTERVAL_SECONDS)
+            try:
+                self.unload_idle()
+            except Exception as e:
+                print(f"Warning unload model idle: {e}")
+
+    def _start_reaper(self):
+        with self._condition:
+            if self._reaper is None and self.idle_unload_seconds:
+                self._reaper = threading.Thread(target=self._reaper_loop, daemon=True)
+                self._reaper.start()
+
+    # --- statistik ---------------------------------------------------------
+
+    def record_inference(self, name, audio_seconds, process_seconds):
+        """Catat satu transkripsi untuk statistik RTF."""
+        with self._condition:
+            slot = self._slots[name]
+            slot.inferences += 1
+            slot.audio_seconds += audio_seconds
+            slot.process_seconds += process_seconds
+        get_telemetry().record_span(f"model.transcribe.{name}", process_seconds)
+
+    def warm_up(self, sample_rate=16000):
+        """Muat model default & jalankan satu inferensi kecil (1 detik hening)."""
+        import numpy as np
+
+        with self.acquire(DEFAULT_MODEL) as (model, _):
+            segments, _ = model.transcribe(
+                np.zeros(sample_rate, dtype=np.float32), language="en", beam_size=1
+            )
+            list(segments)
+        return self.device_name()
+
+    def stats(self):
+        """Statistik per model + RSS proses (untuk monitoring)."""
+        with self._condition:
+            models = {
+                slot.name: {
+                    "path": slot.path,
+                    "loaded": slot.model is not None,
+                    "device": slot.device,
+                    "estimatedBytes": slot.estimated_bytes,
+                    "loadSeconds": slot.load_seconds,
+                    "loads": slot.loads,
+                    "evictions": slot.evictions,
+                    "inferences": slot.inferences,
+                    "audioSeconds": round(slot.audio_seconds, 2),
+                    "rtf": (
+                        round(slot.process_seconds / slot.audio_seconds, 3)
+                        if slot.audio_seconds
+                        else None
+                    ),
+                }
+                for slot in self._slots.values()
+            }
+            loaded_bytes = self._loaded_bytes()
+        return {
+            "models": models,
+            "cpuThreads": self.cpu_threads,
+            "numWorkers": self.num_workers,
+            "loadedBytes": loaded_bytes,
+            "memoryBudgetBytes": self.memory_budget_bytes,
+            "rssBytes": get_process_rss(),
+        }
+
+
+_model_manager = None
+_model_manager_lock = threading.Lock()
+
+
+def get_model_manager():
+    """Instance ModelManager bersama (satu per proses)."""
+    global _model_manager
+    with _model_manager_lock:
+        if _model_manager is None:
+            _model_manager = ModelManager()
+        return _model_manager
@@ -1,46 +1,294 @@
-import nltk
-from nltk.tokenize import word_tokenize
-import librosa
+import re
 import numpy as np
+import soundfile as sf
+from src.audio_processing import SAMPLE_RATE, AudioBuffer
 
-# Download data NLTK jika belum ada
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt", quiet=True)
-try:
-    nltk.data.find("tokenizers/punkt_tab")
-except LookupError:
-    nltk.download("punkt_tab", quiet=True)
+# Parameter deteksi jeda (setara librosa.effects.split: frame 2048 / hop 512 @16kHz)
+FRAME_SECONDS = 0.128
+HOP_SECONDS = 0.032
+BLOCK_SECONDS = 30.0
+SILENCE_TOP_DB = 25
+MIN_PAUSE_SECONDS = 0.25
+LONG_PAUSE_SECONDS = 2.0
 
+EMPTY_PAUSE_STATS = {
+    "long_pauses": 0,
+    "pause_durations": [],
+    "longest_pause": 0.0,
+    "mean_pause": 0.0,
+    "total_pause": 0.0,
+    "speech_ratio": 0.0,
+    "pauses_per_minute": 0.0,
+}
 
-def calculate_metrics(transcript_text, audio_path, duration_seconds):
-    # Hitung Words Per Minute (WPM)
+
+def _iter_audio_blocks(audio, block_seconds):
+    """Yield (block, sample_rate) berukuran tetap dari AudioBuffer atau file."""
+    if isinstance(audio, AudioBuffer):
+        block_size = int(block_seconds * audio.sample_rate)
+        for start in range(0, len(audio.samples), block_size):
+            yield audio.samples[start : start + block_size], audio.sample_rate
+    else:
+        sr = sf.info(audio).samplerate
+        for block in sf.blocks(
+            audio, blocksize=int(block_seconds * sr), dtype="float32", always_2d=True
+        ):
+            yield block.mean(axis=1), sr
+
+
+def _frame_rms(audio, block_seconds=BLOCK_SECONDS):
+    """
+    RMS per frame, dihitung per blok tanpa loop per frame.
+    Energi dijumlah per hop (reshape), lalu frame = jendela geser beberapa hop.
+    Memori sampel konstan sebesar satu blok; yang disimpan hanya energi per
+    hop (1/hop dari panjang sinyal).
+    """
+    hop_energy = []
+    carry = np.zeros(0, dtype=np.float32)
+    hop_length = sr = None
+
+    for block, block_sr in _iter_audio_blocks(audio, block_seconds):
+        if sr is None:
+            sr = block_sr
+            hop_length = int(round(HOP_SECONDS * sr))
+        buf = np.concatenate([carry, block]) if len(carry) else block
+        n_hops = len(buf) // hop_length
+        hops = buf[: n_hops * hop_length].reshape(n_hops, hop_length)
+        hop_energy.append(np.einsum("ij,ij->i", hops, hops, dtype=np.float64))
+        carry = buf[n_hops * hop_length :]
+
+    if sr is None:
+        return np.zeros(0), SAMPLE_RATE, int(HOP_SECONDS * SAMPLE_RATE)
+
+    # Sisa sampel di akhir sinyal: satu hop terakhir (zero-padded)
+    if len(carry):
+        hop_energy.append(np.array([np.dot(carry, carry)], dtype=np.float64))
+
+    energy = np.concatenate(hop_energy)
+    hops_per_frame = max(1, int(round(FRAME_SECONDS / HOP_SECONDS)))
+    cumulative = np.concatenate([[0.0], np.cumsum(energy), np.zeros(hops_per_frame - 1)])
+    cumulative[len(energy) + 1 :] = cumulative[len(energy)]
+    frame_energy = cumulative[hops_per_frame:] - cumulative[: len(energy)]
+    rms = np.sqrt(np.maximum(frame_energy, 0.0) / (hops_per_frame * hop_length))
+    return rms, sr, hop_length
+
+
+def _inner_silences(rms, sr, hop_length, top_db):
+    """
+    Run hening di antara dua bagian bicara, dalam detik.
+    Mengembalikan (starts, ends, voiced) dengan `voiced` mask frame bicara.
+    """
+    # Frame bicara: energi di atas (max - top_db) dB, sama seperti librosa
+    voiced = rms > rms.max() * (10.0 ** (-top_db / 20.0))
+
+    # Batas run hening: +1 = mulai hening, -1 = selesai hening
+    edges = np.diff(np.concatenate([[0], (~voiced).astype(np.int8), [0]]))
+    silence_starts = np.flatnonzero(edges == 1)
+    silence_ends = np.flatnonzero(edges == -1)
+    # Buang hening di awal & akhir rekaman
+    inner = (silence_starts > 0) & (silence_ends < len(voiced))
+    frame_seconds = hop_length / sr
+    return (
+        silence_starts[inner] * frame_seconds,
+        silence_ends[inner] * frame_seconds,
+        voiced,
+    )
+
+
+def find_silences(
+    audio,
+    top_db=SILENCE_TOP_DB,
+    min_silence=MIN_PAUSE_SECONDS,
+    block_seconds=BLOCK_SECONDS,
+):
+    """Daftar (start, end) detik bagian hening di antara ucapan (untuk chunking)."""
+    rms, sr, hop_length = _frame_rms(audio, block_seconds)
+    if len(rms) == 0 or rms.max() <= 0:
+        return []
+    starts, ends, _ = _inner_silences(rms, sr, hop_length, top_db)
+    keep = (ends - starts) >= min_silence
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+def detect_pauses(
+    audio,
+    top_db=SILENCE_TOP_DB,
+    min_pause=MIN_PAUSE_SECONDS,
+    long_pause=LONG_PAUSE_SECONDS,
+    block_seconds=BLOCK_SECONDS,
+):
+    """
+    Deteksi jeda berbasis energi frame (vectorized NumPy, diproses per blok).
+    Jeda = bagian hening di antara dua bagian bicara (hening di awal/akhir
+    rekaman tidak dihitung). Mengembalikan distribusi jeda lengkap.
+    """
+    rms, sr, hop_length = _frame_rms(audio, block_seconds)
+    total_seconds = len(rms) * hop_length / sr if len(rms) else 0.0
+
+    result = dict(EMPTY_PAUSE_STATS, pause_durations=[])
+    if len(rms) == 0 or rms.max() <= 0:
+        return result
+
+    silence_starts, silence_ends, voiced = _inner_silences(rms, sr, hop_length, top_db)
+    result["speech_ratio"] = round(float(voiced.mean()), 3)
+
+    gaps = silence_ends - silence_starts
+    gaps = gaps[gaps >= min_pause]
+
+    if gaps.size:
+        result.update(
+            {
+                "long_pauses": int(np.count_nonzero(gaps > long_pause)),
+                "pause_durations": np.round(gaps, 2).tolist(),
+                "longest_pause": round(float(gaps.max()), 2),
+                "mean_pause": round(float(gaps.mean()), 2),
+                "total_pause": round(float(gaps.sum()), 2),
+                "pauses_per_minute": round(gaps.size / (total_seconds / 60.0), 2),
+            }
+        )
+    return result
+
+
+# Naikkan jika isi hasil calculate_metrics berubah (bagian dari key cache)
+METRICS_VERSION = 4
+
+# Kata pengisi (disfluency) yang dihitung sebagai filler
+FILLER_WORDS = ("um", "umm", "uh", "uhm", "uhh", "er", "erm", "ah", "eh", "hmm", "mm")
+
+# Rentang minimum penyebut WPM/articulation rate: satu-dua kata dengan
+# timestamp berdekatan tidak menghasilkan ribuan WPM
+MIN_RATE_SPAN_SECONDS = 1.0
+
+_WORD_PATTERN = re.compile(r"[^\w']+")
+
+
+def _normalize_words(words):
+    """Teks kata huruf kecil tanpa tanda baca; kata yang hanya tanda baca dibuang."""
+    return [_WORD_PATTERN.sub("", w.lower()) for w in words]
+
+
+def count_words(text):
+    """Jumlah kata (tanda baca tidak dihitung sebagai kata)."""
+    return sum(1 for w in _normalize_words(text.split()) if w)
+
+
+def content_words(text):
+    """Kata transkrip tanpa tanda baca & tanpa kata pengisi (um, uh, ...)."""
+    return [w for w in _normalize_words(text.split()) if w and w not in FILLER_WORDS]
+
+
+def timing_metrics(
+    words,
+    duration_seconds,
+    min_pause=MIN_PAUSE_SECONDS,
+    long_pause=LONG_PAUSE_SECONDS,
+):
+    """
+    Metrik kelancaran dari timestamp per kata (satu pass vectorized NumPy).
+    `words`: list {"start", "end", "word"} (detik absolut).
+    - wpm: kata per menit dihitung dari kata pertama s/d kata terakhir
+      (hening di awal/akhir rekaman tidak dihitung)
+    - articulation_rate: kata per menit waktu bicara saja (tanpa jeda)
+    - penyebut kedua rate minimal MIN_RATE_SPAN_SECONDS
+    - jeda = celah antar kata >= `min_pause`; jeda panjang > `long_pause`
+    - filler_rate: kata pengisi per 100 kata
+    """
+    texts = _normalize_words([w["word"] for w in words])
+    keep = np.array([bool(t) for t in texts], dtype=bool)
+    starts = np.array([w["start"] for w in words], dtype=np.float64)[keep]
+    ends = np.array([w["end"] for w in words], dtype=np.float64)[keep]
+    tokens = np.array(texts, dtype=object)[keep]
+
+    result = dict(
+        EMPTY_PAUSE_STATS,
+        pause_durations=[],
+        wpm=0.0,
+        overall_wpm=0.0,
+        articulation_rate=0.0,
+        speech_duration=0.0,
+        word_count=int(tokens.size),
+        median_pause=0.0,
+        filler_count=0,
+        filler_rate=0.0,
+    )
+    if tokens.size == 0:
+        return result
+
+    # Urutkan berdasarkan waktu (potongan paralel bisa sedikit tumpang tindih)
+    order = np.argsort(starts, kind="stable")
+    starts, ends, tokens = starts[order], ends[order], tokens[order]
+    ends = np.maximum(ends, starts)
+
+    span = float(ends.max() - starts[0])
+    gaps = np.clip(starts[1:] - np.maximum.accumulate(ends)[:-1], 0.0, None)
+    pauses = gaps[gaps >= min_pause]
+    articulation = max(span - float(pauses.sum()), 0.0)
+    rate_span = max(span, MIN_RATE_SPAN_SECONDS)
+    fillers = int(np.isin(tokens, FILLER_WORDS).sum())
+
+    result.update(
+        {
+            "wpm": round(tokens.size / rate_span * 60, 1),
+            "overall_wpm": (
+                round(tokens.size / duration_seconds * 60, 1)
+                if duration_seconds > 0
+                else 0.0
+            ),
+            "articulation_rate": round(
+                tokens.size / max(articulation, MIN_RATE_SPAN_SECONDS) * 60, 1
+            ),
+            "speech_duration": round(articulation, 2),
+            "speech_ratio": (
+                round(min(1.0, articulation / duration_seconds), 3)
+                if duration_seconds > 0
+                else 0.0
+            ),
+            "filler_count": fillers,
+            "filler_rate": round(fillers / tokens.size * 100, 2),
+        }
+    )
+    if pauses.size:
+        result.update(
+            {
+                "long_pauses": int(np.count_nonzero(pauses > long_pause)),
+                "pause_durations": np.round(pauses, 2).tolist(),
+                "longest_pause": round(float(pauses.max()), 2),
+                "mean_pause": round(float(pauses.mean()), 2),
+                "median_pause": round(float(np.median(pauses)), 2),
+                "total_pause": round(float(pauses.sum()), 2),
+                "pauses_per_minute": round(pauses.size / (rate_span / 60.0), 2),
+            }
+        )
+    return result
+
+
+def calculate_metrics(transcript_text, words, duration_seconds, signals=None):
+    """
+    Hitung WPM, articulation rate, statistik jeda & filler dari timestamp
+    per kata hasil transkripsi (tanpa membaca/menganalisis ulang audio).
+    Jika timestamp kata tidak tersedia, WPM dihitung dari jumlah kata per
+    durasi total dan statistik jeda dikosongkan. `signals` (no_speech_prob/
+    avg_logprob Whisper) ikut disimpan untuk pre-scoring.
+    """
     text = transcript_text.strip()
-    words = word_tokenize(text) if text else []
-    # Logika: (Jumlah kata / durasi detik) * 60
-    wpm = (len(words) / duration_seconds) * 60 if duration_seconds > 0 else 0
-
-    # 2. Deteksi Jeda Panjang (Silence Detection)
-    long_pauses = 0
-    try:
-        y, sr = librosa.load(audio_path, sr=16000)
-        non_silent_intervals = librosa.effects.split(y, top_db=25)
-        pause_threshold = 2.0
-        if len(non_silent_intervals) > 1:
-            for i in range(len(non_silent_intervals) - 1):
-                end_prev = non_silent_intervals[i][1]
-                start_next = non_silent_intervals[i + 1][0]
-
-                silence_seconds = (start_next - end_prev) / sr
-                if silence_seconds > pause_threshold:
-                    long_pauses += 1
-    except Exception as e:
-        print(f"Warning NLP: {e}")
+    words = words or []
+    if words:
+        metrics = timing_metrics(words, duration_seconds)
+        timing_source = "words"
+    else:
+        word_count = count_words(text)
+        wpm = (
+            round(word_count / duration_seconds * 60, 1) if duration_seconds > 0 else 0.0
+        )
+        metrics = timing_metrics([], duration_seconds)
+        metrics.update({"wpm": wpm, "overall_wpm": wpm, "word_count": word_count})
+        timing_source = "duration"
 
     return {
         "text": text,
-        "wpm": round(wpm, 1),
-        "long_pauses": long_pauses,
         "duration": round(duration_seconds, 2),
+        "timing_source": timing_source,
+        "no_speech_prob": (signals or {}).get("no_speech_prob"),
+        "avg_logprob": (signals or {}).get("avg_logprob"),
+        **metrics,
     }
@@ -0,0 +1,146 @@
+"""
+Pre-scoring lokal sebelum panggilan LLM penilai.
+
+Hanya jawaban yang jelas bukan jawaban dinilai langsung di sini (skor
+minimum rubrik, alasan deterministik, tanpa memanggil LLM):
+- transkrip kosong
+- rekaman hening/noise (no_speech_prob & avg_logprob segmen Whisper)
+- transkrip yang isinya hanya kata pengisi (um, uh, ...) atau satu kata
+
+Aturan sengaja konservatif: jawaban pendek (mis. "Dropout prevents
+overfitting.") tetap dinilai LLM karena bisa mendapat skor parsial, dan
+relevansi isi jawaban tidak dinilai lokal.
+"""
+
+import os
+import threading
+import numpy as np
+from src.nlp_analysis import content_words
+from src.question_bank import get_role
+
+PRESCORING_ENABLED = os.environ.get("REVIEW_PRESCORING", "1") != "0"
+PRESCORE_REASON_PREFIX = "Pre-scored locally:"
+
+# Transkrip dengan kata isi (selain kata pengisi) sebanyak ini atau kurang
+# dianggap bukan jawaban
+MAX_NON_ANSWER_WORDS = 1
+# Rekaman dianggap hening/noise jika kedua sinyal Whisper ini terlampaui
+NO_SPEECH_PROB_THRESHOLD = 0.8
+LOW_AVG_LOGPROB = -1.0
+# Aturan hening/noise hanya berlaku untuk transkrip sependek ini (transkrip
+# panjang kemungkinan besar berisi ucapan meski sinyal Whisper buruk)
+NO_SPEECH_MAX_WORDS = 60
+
+MIN_SCORE_RUBRIC = "Rubric Score {score} (Unanswered): no relevant answer."
+
+
+def speech_signals(segments):
+    """
+    Rata-rata berbobot durasi no_speech_prob & avg_logprob segmen Whisper
+    (None jika transkripsi tidak menyediakannya).
+    """
+    rows = [
+        (max(s["end"] - s["start"], 0.01), s["no_speech_prob"], s["avg_logprob"])
+        for s in segments
+        if s.get("no_speech_prob") is not None and s.get("avg_logprob") is not None
+    ]
+    if not rows:
+        return {"no_speech_prob": None, "avg_logprob": None}
+    weights, no_speech, logprob = np.array(rows).T
+    return {
+        "no_speech_prob": round(float(np.average(no_speech, weights=weights)), 3),
+        "avg_logprob": round(float(np.average(logprob, weights=weights)), 3),
+    }
+
+
+_gate_stats = {"checked": 0, "resolved": 0, "rules": {}}
+_gate_stats_lock = threading.Lock()
+
+
+def _record(rule):
+    with _gate_stats_lock:
+        _gate_stats["checked"] += 1
+        if rule is not None:
+            _gate_stats["resolved"] += 1
+            _gate_stats["rules"][rule] = _gate_stats["rules"].get(rule, 0) + 1
+
+
+def prescoring_stats():
+    """Jumlah jawaban yang dicek & yang dinilai lokal (panggilan LLM dihemat)."""
+    with _gate_stats_lock:
+        checked, resolved = _gate_stats["checked"], _gate_stats["resolved"]
+        return {
+            "checked": checked,
+            "resolved": resolved,
+            "llmCallsSavedShare": round(resolved / checked, 3) if checked else 0.0,
+            "rules": dict(_gate_stats["rules"]),
+        }
+
+
+def _quote(text, max_words=12):
+    words = text.split()
+    clipped = " ".join(words[:max_words]) + (" ..." if len(words) > max_words else "")
+    return f'"{clipped}"'
+
+
+def prescore_answer(question_id, transcript, signals=None, role_id=None):
+    """
+    Nilai jawaban secara lokal jika jelas bernilai minimum. Mengembalikan
+    {"score", "reason", "rule"}, atau None jika jawaban perlu dinilai LLM.
+    `signals`: dict berisi no_speech_prob/avg_logprob (mis. metrik NLP).
+    `role_id`: role bank soal (None = role default).
+    """
+    if not PRESCORING_ENABLED:
+        return None
+    role = get_role(role_id)
+    if question_id not in role:
+        return None
+
+    text = (transcript or "").strip()
+    word_count = len(text.split())
+    content_count = len(content_words(text))
+    signals = signals or {}
+    no_speech = signals.get("no_speech_prob")
+    logprob = signals.get("avg_logprob")
+    rule = reason = None
+
+    if word_count == 0:
+        rule = "empty"
+        reason = "the recording contains no transcribed speech, so no answer was given."
+    elif (
+        no_speech is not None
+        and logprob is not None
+        and no_speech >= NO_SPEECH_PROB_THRESHOLD
+        and logprob <= LOW_AVG_LOGPROB
+        and word_count <= NO_SPEECH_MAX_WORDS
+    ):
+        rule = "no_speech"
+        reason = (
+            f"the speech recognizer classified the recording as silence or noise "
+            f"(no-speech probability {no_speech:.2f}, average log-probability "
+            f"{logprob:.2f}), so the transcript {_quote(text)} is not a usable answer."
+        )
+    elif content_count == 0:
+        rule = "filler_only"
+        reason = (
+            f"the transcript {_quote(text)} contains only filler words, "
+            f"so no answer was given."
+        )
+    elif content_count <= MAX_NON_ANSWER_WORDS:
+        rule = "single_word"
+        reason = (
+            f"the answer {_quote(text)} is a single word, which does not "
+            f"address the question."
+        )
+
+    _record(rule)
+    if rule is None:
+        return None
+    return {
+        "score": role.min_score,
+        "reason": (
+            f"{PRESCORE_REASON_PREFIX} {reason} "
+            f"{MIN_SCORE_RUBRIC.format(score=role.min_score)}"
+        ),
+        "rule": rule,
+    }
@@ -0,0 +1,381 @@
+"""
+Bank soal per role (posisi) dengan backend yang bisa diganti.
+
+- bawaan: RUBRIC_CONFIG di src/rubric_data.py (role "default")
+- folder file: satu file per role, <role>.json / <role>.yaml / <role>.yml
+- SQLite: tabel roles & questions ter-index (role_id, question_id)
+
+Backend dipilih lewat env REVIEW_QUESTION_BANK (path folder, atau file
+.sqlite/.db; kosong = bawaan). Role dimuat saat pertama dipakai lalu
+disimpan di memori, jadi bank dengan banyak role & ratusan soal tidak
+dibaca semua di awal. Skala skor (min/max/lulus) didefinisikan per role.
+
+Format file role (JSON; YAML memakai key yang sama):
+    {
+      "title": "Machine Learning Engineer",
+      "scoreScale": {"min": 0, "max": 4, "pass": 3},
+      "passPercent": 70,
+      "questions": [{"id": 1, "question": "...", "criteria_text": "..."}]
+    }
+
+Impor folder role ke SQLite:
+    python -m src.question_bank import data/roles/ temp/question_bank.sqlite
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+QUESTION_BANK_SOURCE = os.environ.get("REVIEW_QUESTION_BANK", "")
+# Role yang dipakai jika tidak dipilih (kosong = role pertama di bank)
+DEFAULT_ROLE = os.environ.get("REVIEW_DEFAULT_ROLE", "")
+BUILTIN_ROLE = "default"
+BUILTIN_ROLE_TITLE = "Machine Learning (TensorFlow)"
+
+DEFAULT_SCORE_SCALE = {"min": 0, "max": 4, "pass": 3}
+# Persentase skor interview minimal untuk keputusan PASSED
+DEFAULT_PASS_PERCENT = 70.0
+
+ROLE_FILE_EXTENSIONS = (".json", ".yaml", ".yml")
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+
+class Role:
+    """Satu set soal interview + rubrik + skala skor."""
+
+    def __init__(
+        self,
+        role_id,
+        questions,
+        title=None,
+        score_scale=None,
+        pass_percent=DEFAULT_PASS_PERCENT,
+    ):
+        self.role_id = role_id
+        self.title = title or role_id
+        # Urutan soal mengikuti urutan di sumber
+        self.questions = {
+            int(q["id"]): {
+                "question": q["question"],
+                "criteria_text": q.get("criteria_text") or "",
+            }
+            for q in questions
+        }
+        scale = dict(DEFAULT_SCORE_SCALE, **(score_scale or {}))
+        self.min_score = int(scale["min"])
+        self.max_score = int(scale["max"])
+        self.pass_score = int(scale["pass"])
+        self.pass_percent = float(pass_percent)
+        if not self.min_score < self.max_score:
+            raise ValueError(f"Skala skor role '{role_id}' tidak valid: {scale}")
+        raw = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False)
+        # Hash isi role: bagian key cache hasil penilaian
+        self.version = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def question_ids(self):
+        return list(self.questions)
+
+    def __contains__(self, question_id):
+        return question_id in self.questions
+
+    def question(self, question_id):
+        """Dict {"question", "criteria_text"}; KeyError jika tidak ada."""
+        return self.questions[question_id]
+
+    def parse_score(self, value):
+        """
+        Skor (mis. dari LLM) sebagai int dalam skala role; None jika bukan
+        bilangan bulat atau di luar min..max.
+        """
+        if isinstance(value, bool):
+            return None
+        try:
+            score = float(value)
+        except (TypeError, ValueError):
+            return None
+        if not score.is_integer() or not self.min_score <= score <= self.max_score:
+            return None
+        return int(score)
+
+    def interview_percent(self, scores):
+        """
+        Skor interview 0-100 dari skor per soal yang dijawab. Pembagi = semua
+        soal role, jadi soal yang tidak dijawab bernilai skor minimum.
+        """
+        scores = list(scores)
+        count = max(len(self.questions), len(scores))
+        span = (self.max_score - self.min_score) * count
+        return (sum(scores) - self.min_score * len(scores)) / span * 100
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "scoreScale": {
+                "min": self.min_score,
+                "max": self.max_score,
+                "pass": self.pass_score,
+            },
+            "passPercent": self.pass_percent,
+            "questions": [{"id": q_id, **q} for q_id, q in self.questions.items()],
+        }
+
+
+def role_from_dict(role_id, data):
+    if not data.get("questions"):
+        raise ValueError(f"Role '{role_id}' tidak memiliki soal.")
+    return Role(
+        role_id,
+        data["questions"],
+        title=data.get("title"),
+        score_scale=data.get("scoreScale"),
+        pass_percent=data.get("passPercent", DEFAULT_PASS_PERCENT),
+    )
+
+
+class BuiltinBackend:
+    """Role tunggal dari RUBRIC_CONFIG (perilaku lama)."""
+
+    def role_ids(self):
+        return [BUILTIN_ROLE]
+
+    def load_role(self, role_id):
+        if role_id != BUILTIN_ROLE:
+            raise KeyError(role_id)
+        from src.rubric_data import RUBRIC_CONFIG
+
+        questions = [{"id": q_id, **q} for q_id, q in RUBRIC_CONFIG.items()]
+        return Role(BUILTIN_ROLE, questions, title=BUILTIN_ROLE_TITLE)
+
+
+class FileBackend:
+    """Satu file JSON/YAML per role di sebuah folder (nama file = id role)."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _files(self):
+        return {
+            path.stem: path
+            for path in sorted(self.directory.iterdir())
+            if path.suffix.lower() in ROLE_FILE_EXTENSIONS
+        }
+
+    def role_ids(self):
+        return list(self._files())
+
+    def load_role(self, role_id):
+        path = self._files()[role_id]
+        with open(path, encoding="utf-8") as f:
+            if path.suffix.lower() == ".json":
+                data = json.load(f)
+            else:
+                try:
+                    import yaml
+                except ImportError as e:
+                    raise ValueError(
+                        f"PyYAML diperlukan untuk membaca {path.name} "
+                        "(pip install pyyaml)."
+                    ) from e
+                data = yaml.safe_load(f)
+        return role_from_dict(role_id, data)
+
+
+class SQLiteBackend:
+    """Role & soal di SQLite, dibaca per role lewat index (role_id, question_id)."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS roles (
+                    id TEXT PRIMARY KEY,
+                    title TEXT,
+                    min_score INTEGER NOT NULL,
+                    max_score INTEGER NOT NULL,
+                    pass_score INTEGER NOT NULL,
+                    pass_percent REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS questions (
+                    role_id TEXT NOT NULL,
+                    question_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    question TEXT NOT NULL,
+                    criteria_text TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (role_id, question_id)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def role_ids(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT id FROM roles ORDER BY id")]
+
+    def load_role(self, role_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT title, min_score, max_score, pass_score, pass_percent "
+                "FROM roles WHERE id = ?",
+                (role_id,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(role_id)
+            questions = conn.execute(
+                "SELECT question_id, question, criteria_text FROM questions "
+                "WHERE role_id = ? ORDER BY position",
+                (role_id,),
+            ).fetchall()
+        title, min_score, max_score, pass_score, pass_percent = row
+        return Role(
+            role_id,
+            [
+                {"id": q_id, "question": q, "criteria_text": c}
+                for q_id, q, c in questions
+            ],
+            title=title,
+            score_scale={"min": min_score, "max": max_score, "pass": pass_score},
+            pass_percent=pass_percent,
+        )
+
+    def save_role(self, role):
+        """Simpan (replace) satu role beserta soalnya."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO roles VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    role.role_id,
+                    role.title,
+                    role.min_score,
+                    role.max_score,
+                    role.pass_score,
+                    role.pass_percent,
+                ),
+            )
+            conn.execute("DELETE FROM questions WHERE role_id = ?", (role.role_id,))
+            conn.executemany(
+                "INSERT INTO questions VALUES (?, ?, ?, ?, ?)",
+                [
+                    (role.role_id, q_id, position, q["question"], q["criteria_text"])
+                    for position, (q_id, q) in enumerate(role.questions.items())
+                ],
+            )
+
+
+def open_backend(source):
+    """Backend dari path sumber (kosong = bawaan)."""
+    if not source:
+        return BuiltinBackend()
+    if os.path.isdir(source):
+        return FileBackend(source)
+    if source.lower().endswith(SQLITE_EXTENSIONS):
+        return SQLiteBackend(source)
+    raise ValueError(
+        f"REVIEW_QUESTION_BANK harus folder JSON/YAML atau file SQLite: {source}"
+    )
+
+
+class QuestionBank:
+    """Akses role dari backend, dimuat lazy & disimpan di memori (thread-safe)."""
+
+    def __init__(self, backend, default_role=None):
+        self.backend = backend
+        self._default_role = default_role or None
+        self._roles = {}
+        self._lock = threading.Lock()
+
+    def role_ids(self):
+        return self.backend.role_ids()
+
+    @property
+    def default_role(self):
+        if self._default_role is None:
+            role_ids = self.role_ids()
+            if not role_ids:
+                raise ValueError("Bank soal tidak memiliki role.")
+            self._default_role = role_ids[0]
+        return self._default_role
+
+    def get_role(self, role_id=None):
+        """Role `role_id` (None = role default). KeyError jika tidak ada."""
+        role_id = role_id or self.default_role
+        with self._lock:
+            role = self._roles.get(role_id)
+            if role is None:
+                role = self.backend.load_role(role_id)
+                self._roles[role_id] = role
+            return role
+
+
+_question_bank = None
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """QuestionBank bersama (satu per proses) sesuai REVIEW_QUESTION_BANK."""
+    global _question_bank
+    with _question_bank_lock:
+        if _question_bank is None:
+            _question_bank = QuestionBank(
+                open_backend(QUESTION_BANK_SOURCE), DEFAULT_ROLE
+            )
+        return _question_bank
+
+
+def get_role(role_id=None):
+    """Shortcut get_question_bank().get_role(role_id)."""
+    return get_question_bank().get_role(role_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.question_bank", description="Kelola bank soal."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser(
+        "import", help="Impor semua role dari folder/SQLite ke file SQLite."
+    )
+    import_parser.add_argument("source", help="Folder JSON/YAML atau file SQLite.")
+    import_parser.add_argument("destination", help="File SQLite tujuan.")
+    list_parser = commands.add_parser("list", help="Tampilkan role & jumlah soal.")
+    list_parser.add_argument("source", nargs="?", default=QUESTION_BANK_SOURCE)
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        source = open_backend(args.source)
+        destination = SQLiteBackend(args.destination)
+        for role_id in source.role_ids():
+            role = source.load_role(role_id)
+            destination.save_role(role)
+            print(f"{role_id}: {len(role.questions)} soal")
+    else:
+        backend = open_backend(args.source)
+        for role_id in backend.role_ids():
+            role = backend.load_role(role_id)
+            print(
+                f"{role_id}: {role.title} · {len(role.questions)} soal · "
+                f"skor {role.min_score}-{role.max_score}"
+            )
+
+
+if __name__ == "__main__":
+    main()
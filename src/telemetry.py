@@ -0,0 +1,301 @@
+"""
+Telemetri pipeline ringan (in-process, tanpa dependensi tambahan).
+
+- span: durasi tiap tahap pipeline / subprocess FFmpeg / panggilan LLM /
+  akses cache / muat model, disimpan sebagai histogram bucket tetap
+- counter: token LLM (response.usage), percobaan & kegagalan per API key,
+  hit/miss cache
+
+Snapshot berbentuk dict JSON sehingga bisa dikirim antar proses (worker
+menyimpannya di kolom stats antrian job) lalu digabung dengan
+merge_snapshots. Ekspor: JSON (snapshot) dan teks Prometheus
+(to_prometheus), opsional lewat HTTP /metrics (start_metrics_server).
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = "review"
+# Batas atas bucket histogram span (detik); bucket sama di semua proses
+# agar snapshot bisa dijumlahkan
+SPAN_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+class SpanTimer:
+    """Hasil span: `seconds` terisi setelah blok `with` selesai."""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = None
+
+
+def _new_span():
+    return {
+        "count": 0,
+        "errors": 0,
+        "sum": 0.0,
+        "max": 0.0,
+        # bucket[i] = jumlah sampel <= SPAN_BUCKETS[i]; elemen terakhir = +Inf
+        "buckets": [0] * (len(SPAN_BUCKETS) + 1),
+    }
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Telemetry:
+    """Registry span & counter satu proses (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._spans = {}
+            self._counters = {}
+            self._started = time.time()
+
+    def record_span(self, name, seconds, error=False):
+        index = next(
+            (i for i, bound in enumerate(SPAN_BUCKETS) if seconds <= bound),
+            len(SPAN_BUCKETS),
+        )
+        with self._lock:
+            span = self._spans.setdefault(name, _new_span())
+            span["count"] += 1
+            span["errors"] += int(error)
+            span["sum"] += seconds
+            span["max"] = max(span["max"], seconds)
+            span["buckets"][index] += 1
+
+    @contextmanager
+    def span(self, name):
+        """Ukur durasi blok; exception dicatat sebagai error lalu diteruskan."""
+        timer = SpanTimer(name)
+        t0 = time.perf_counter()
+        error = False
+        try:
+            yield timer
+        except BaseException:
+            error = True
+            raise
+        finally:
+            timer.seconds = time.perf_counter() - t0
+            self.record_span(name, timer.seconds, error)
+
+    def increment(self, name, value=1, **labels):
+        """Tambah counter `name` dengan label (mis. key="key-0", kind="prompt")."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """Salinan state (JSON-serializable) untuk ekspor / dikirim antar proses."""
+        with self._lock:
+            return {
+                "startedAt": self._started,
+                "spans": {
+                    name: dict(span, buckets=list(span["buckets"]))
+                    for name, span in self._spans.items()
+                },
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+            }
+
+
+def merge_snapshots(snapshots):
+    """Gabungkan snapshot beberapa proses (app + worker) menjadi satu."""
+    spans = {}
+    counters = {}
+    started = []
+    for snapshot in snapshots:
+        if not snapshot:
+            continue
+        started.append(snapshot.get("startedAt") or time.time())
+        for name, span in snapshot.get("spans", {}).items():
+            merged = spans.setdefault(name, _new_span())
+            merged["count"] += span["count"]
+            merged["errors"] += span["errors"]
+            merged["sum"] += span["sum"]
+            merged["max"] = max(merged["max"], span["max"])
+            merged["buckets"] = [
+                a + b for a, b in zip(merged["buckets"], span["buckets"])
+            ]
+        for counter in snapshot.get("counters", []):
+            key = (counter["name"], _label_key(counter["labels"]))
+            counters[key] = counters.get(key, 0) + counter["value"]
+    return {
+        "startedAt": min(started) if started else time.time(),
+        "spans": spans,
+        "counters": [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(counters.items())
+        ],
+    }
+
+
+def span_quantile(span, q):
+    """
+    Estimasi kuantil dari bucket histogram (interpolasi linear di dalam
+    bucket, seperti histogram_quantile Prometheus).
+    """
+    count = span["count"]
+    if not count:
+        return None
+    rank = q * count
+    cumulative = 0
+    lower = 0.0
+    for index, in_bucket in enumerate(span["buckets"]):
+        upper = SPAN_BUCKETS[index] if index < len(SPAN_BUCKETS) else span["max"]
+        if in_bucket and cumulative + in_bucket >= rank:
+            upper = min(upper, span["max"])
+            return lower + (upper - lower) * (rank - cumulative) / in_bucket
+        cumulative += in_bucket
+        lower = upper
+    return span["max"]
+
+
+def span_summary(snapshot):
+    """
+    Ringkasan latency per span untuk UI: list dict terurut total waktu
+    terbesar (hot path di atas).
+    """
+    spans = snapshot.get("spans", {})
+    total = sum(s["sum"] for s in spans.values()) or 1.0
+    rows = [
+        {
+            "span": name,
+            "count": span["count"],
+            "errors": span["errors"],
+            "p50Ms": round(span_quantile(span, 0.5) * 1000, 1),
+            "p95Ms": round(span_quantile(span, 0.95) * 1000, 1),
+            "maxMs": round(span["max"] * 1000, 1),
+            "totalSeconds": round(span["sum"], 2),
+            "share": round(span["sum"] / total, 3),
+        }
+        for name, span in spans.items()
+        if span["count"]
+    ]
+    rows.sort(key=lambda r: r["totalSeconds"], reverse=True)
+    return rows
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def to_prometheus(snapshot):
+    """Snapshot ke format teks eksposisi Prometheus (v0.0.4)."""
+    histogram = f"{METRIC_PREFIX}_span_seconds"
+    lines = [
+        f"# HELP {histogram} Durasi span pipeline (detik).",
+        f"# TYPE {histogram} histogram",
+    ]
+    for name, span in sorted(snapshot.get("spans", {}).items()):
+        cumulative = 0
+        for index, in_bucket in enumerate(span["buckets"]):
+            cumulative += in_bucket
+            bound = SPAN_BUCKETS[index] if index < len(SPAN_BUCKETS) else "+Inf"
+            labels = _format_labels({"span": name, "le": bound})
+            lines.append(f"{histogram}_bucket{labels} {cumulative}")
+        labels = _format_labels({"span": name})
+        lines.append(f"{histogram}_sum{labels} {span['sum']:.6f}")
+        lines.append(f"{histogram}_count{labels} {span['count']}")
+
+    errors = f"{METRIC_PREFIX}_span_errors_total"
+    lines += [
+        f"# HELP {errors} Span yang berakhir dengan exception.",
+        f"# TYPE {errors} counter",
+    ]
+    for name, span in sorted(snapshot.get("spans", {}).items()):
+        lines.append(f"{errors}{_format_labels({'span': name})} {span['errors']}")
+
+    by_name = {}
+    for counter in snapshot.get("counters", []):
+        by_name.setdefault(counter["name"], []).append(counter)
+    for name, counters in sorted(by_name.items()):
+        metric = f"{METRIC_PREFIX}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for counter in counters:
+            labels = _format_labels(counter["labels"])
+            lines.append(f"{metric}{labels} {counter['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json(snapshot):
+    """Snapshot + ringkasan latency per span sebagai teks JSON."""
+    return json.dumps(
+        dict(snapshot, summary=span_summary(snapshot)), indent=2, ensure_ascii=False
+    )
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Registry telemetri bersama (satu per proses)."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry()
+        return _telemetry
+
+
+def span(name):
+    """Shortcut `with span("pipeline.extract") as timer:` ke registry proses."""
+    return get_telemetry().span(name)
+
+
+def increment(name, value=1, **labels):
+    get_telemetry().increment(name, value, **labels)
+
+
+def start_metrics_server(port, collect=None, host="0.0.0.0"):
+    """
+    Sajikan GET /metrics (Prometheus) dan /metrics.json di thread daemon.
+    `collect()` mengembalikan snapshot yang diekspor (default: proses ini).
+    """
+    collect = collect or (lambda: get_telemetry().snapshot())
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/metrics":
+                body = to_prometheus(collect()).encode()
+                content_type = "text/plain; version=0.0.4"
+            elif path == "/metrics.json":
+                body = to_json(collect()).encode()
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("content-type", content_type)
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
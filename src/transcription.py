@@ -1,17 +1,37 @@
+import bisect
 import os
+import re
+import threading
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-from faster_whisper import WhisperModel
-from openai import OpenAI
+from src.audio_processing import SAMPLE_RATE, AudioBuffer
+from src.model_manager import LOCAL_MODEL_PATH, ModelManager, get_model_manager
+from src.nlp_analysis import find_silences
+from src.prescoring import speech_signals
+from src.telemetry import get_telemetry, increment, span
 
 warnings.filterwarnings("ignore")
 
-# KONFIGURASI
-LOCAL_MODEL_PATH = os.path.join("models", "whisper-large-v3-turbo-ct2-int8")
+# KONFIGURASI (path model lokal & tuning CPU/memori: src/model_manager.py)
 GROQ_MODEL_ID = "whisper-large-v3-turbo"
 
 TECHNICAL_PROMPT = "Technical interview regarding Machine Learning, Data Science, TensorFlow, Keras, CNN, transfer learning, dropout, overfitting, Python programming, and model optimization."
 
+# Chunking jawaban panjang (dipotong di bagian hening)
+CLOUD_CHUNK_SECONDS = 120.0
+CLOUD_CHUNK_WORKERS = 4
+CHUNK_OVERLAP_SECONDS = 1.0
+LOCAL_CHUNK_SECONDS = 30.0
+LOCAL_BATCH_MIN_SECONDS = 60.0
+LOCAL_BATCH_SIZE = 8
+
+# Format upload ke Groq. FLAC: lossless (akurasi = WAV) dengan ukuran ~40-60%
+# dari WAV 16-bit; Opus jauh lebih kecil tapi lossy dan encode-nya lebih berat. Lihat
+# benchmarks/bench_upload_encoding.py untuk perbandingan ukuran & akurasi.
+CLOUD_UPLOAD_FORMAT = "flac"
+
 
 def get_groq_api_key():
     """Mengambil API Key Groq dari secrets.toml"""
@@ -23,31 +43,37 @@ def get_groq_api_key():
     return None
 
 
+def _is_cloud_client(model_or_client):
+    if isinstance(model_or_client, ModelManager):
+        return False
+    from openai import OpenAI
+
+    return isinstance(model_or_client, OpenAI)
+
+
 @st.cache_resource(show_spinner=False)
 def load_whisper_model():
+    """
+    Model transkripsi aktif: ModelManager (model lokal, dimuat & di-unload
+    sesuai budget memori) jika model lokal ada, selain itu client Groq.
+    """
+    # faster_whisper/ctranslate2/openai baru di-import saat model dimuat
     if os.path.exists(LOCAL_MODEL_PATH):
         print(f"Local model found at: {LOCAL_MODEL_PATH}")
-        device = (
-            "cuda" if os.environ.get("CUDA_VISIBLE_DEVICES", None) != "-1" else "cpu"
-        )
-        try:
-            import torch
-
-            if torch.cuda.is_available():
-                device = "cuda"
-        except ImportError:
-            pass
-        print(f"DEVICE: {device.upper()}")
-        compute_type = "float16" if device == "cuda" else "int8"
+        manager = get_model_manager()
         try:
-            model = WhisperModel(
-                LOCAL_MODEL_PATH, device=device, compute_type=compute_type
-            )
-            return model, f"LOCAL ({device.upper()})"
+            with manager.acquire():
+                pass
+            print(f"DEVICE: {manager.device_name()}")
+            return manager, manager.device_name()
         except Exception as e:
             st.error(f"Gagal memuat model lokal: {e}")
             return None, "ERROR"
     else:
+        from openai import OpenAI
+
+        from src.agent_engine import GROQ_BASE_URL
+
         print("Local model not found. Switching to Groq API...")
         api_key = get_groq_api_key()
         if not api_key:
@@ -56,47 +82,423 @@ def load_whisper_model():
             )
             return None, "MISSING CONFIG"
         try:
-            client = OpenAI(base_url="https://api.groq.com/openai/v1", api_key=api_key)
+            client = OpenAI(base_url=GROQ_BASE_URL, api_key=api_key)
             return client, "GROQ CLOUD API"
         except Exception as e:
             st.error(f"Gagal inisialisasi Groq: {e}")
             return None, "ERROR"
 
 
-def transcribe_audio(model_or_client, audio_path):
+class ModelWarmup:
     """
-    Fungsi Transkripsi Sederhana (Tanpa Confidence Score).
-    Hanya mengembalikan teks string.
+    Memuat model Whisper di background thread, lalu menjalankan satu
+    inferensi kecil (1 detik hening) agar alokasi memori & kernel pertama
+    tidak dibayar oleh job pertama. Status bisa dipantau tanpa menunggu.
     """
-    if model_or_client is None:
-        return ""
 
-    try:
-        final_text = ""
-        if isinstance(model_or_client, OpenAI):
-            with open(audio_path, "rb") as file:
-                transcription = model_or_client.audio.transcriptions.create(
-                    file=(os.path.basename(audio_path), file.read()),
-                    model=GROQ_MODEL_ID,
-                    language="en",
-                    prompt=TECHNICAL_PROMPT,
-                    temperature=0.0,
+    def __init__(self):
+        self.state = "loading"
+        self.model = None
+        self.device_name = None
+        self.seconds = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        t0 = time.perf_counter()
+        try:
+            model, device_name = load_whisper_model()
+            if isinstance(model, ModelManager):
+                model.warm_up(SAMPLE_RATE)
+            self.model, self.device_name = model, device_name
+            self.state = "ready" if model is not None else "error"
+        except Exception as e:
+            print(f"Error warm-up model: {e}")
+            self.device_name = str(e)
+            self.state = "error"
+        finally:
+            self.seconds = time.perf_counter() - t0
+            get_telemetry().record_span(
+                "model.warmup", self.seconds, error=self.state != "ready"
+            )
+            self._done.set()
+
+    def ready(self):
+        return self._done.is_set() and self.model is not None
+
+    def wait(self, timeout=None):
+        """Tunggu warm-up selesai; kembalikan (model, device_name)."""
+        self._done.wait(timeout)
+        return self.model, self.device_name
+
+    def status(self):
+        return {
+            "state": self.state,
+            "device": self.device_name,
+            "seconds": self.seconds,
+        }
+
+
+_model_warmup = None
+_model_warmup_lock = threading.Lock()
+
+
+def warm_up_model():
+    """Mulai (sekali per proses) warm-up model di background."""
+    global _model_warmup
+    with _model_warmup_lock:
+        if _model_warmup is None:
+            _model_warmup = ModelWarmup()
+        return _model_warmup
+
+
+def get_transcriber_id(model_or_client):
+    """Identitas model transkripsi yang aktif (bagian dari key cache)."""
+    if isinstance(model_or_client, ModelManager):
+        return model_or_client.transcriber_id()
+    if _is_cloud_client(model_or_client):
+        return f"groq:{GROQ_MODEL_ID}"
+    return f"local:{LOCAL_MODEL_PATH}"
+
+
+VAD_PARAMETERS = {"min_silence_duration_ms": 500}
+
+
+def _segment_field(segment, name):
+    """Ambil field segmen (objek SDK atau dict)."""
+    if isinstance(segment, dict):
+        return segment.get(name)
+    return getattr(segment, name, None)
+
+
+def plan_chunks(audio, max_chunk_seconds, overlap_seconds=CHUNK_OVERLAP_SECONDS):
+    """
+    Bagi AudioBuffer menjadi potongan <= max_chunk_seconds, dipotong di tengah
+    bagian hening terakhir yang tersedia. Jika tidak ada hening di jendela
+    tersebut, dipotong paksa dengan overlap `overlap_seconds`.
+    Mengembalikan list {"start", "end", "overlap"} (detik).
+    """
+    duration = audio.duration
+    if duration <= max_chunk_seconds:
+        return [{"start": 0.0, "end": duration, "overlap": False}]
+
+    cut_points = [(start + end) / 2 for start, end in find_silences(audio)]
+    chunks = []
+    start, overlap = 0.0, False
+    while duration - start > max_chunk_seconds:
+        limit = start + max_chunk_seconds
+        candidates = [c for c in cut_points if start + max_chunk_seconds / 2 <= c <= limit]
+        if candidates:
+            cut = max(candidates)
+            chunks.append({"start": start, "end": cut, "overlap": overlap})
+            start, overlap = cut, False
+        else:
+            chunks.append({"start": start, "end": limit, "overlap": overlap})
+            start, overlap = limit - overlap_seconds, overlap_seconds > 0
+    chunks.append({"start": start, "end": duration, "overlap": overlap})
+    return chunks
+
+
+def _word_dict(word, offset=0.0):
+    """Timestamp satu kata (objek faster-whisper/SDK atau dict) -> dict."""
+    return {
+        "start": offset + float(_segment_field(word, "start") or 0.0),
+        "end": offset + float(_segment_field(word, "end") or 0.0),
+        "word": (_segment_field(word, "word") or "").strip(),
+    }
+
+
+def _attach_words(segments, words, offset=0.0):
+    """
+    Respons Groq memuat timestamp kata di level atas (bukan per segmen):
+    bagi ke segmen yang memuat awal kata. `offset` = posisi awal potongan.
+    """
+    for segment in segments:
+        segment["words"] = []
+    if not segments:
+        return segments
+    segment_starts = [segment["start"] for segment in segments]
+    for word in words or []:
+        word = _word_dict(word, offset)
+        index = max(0, bisect.bisect_right(segment_starts, word["start"]) - 1)
+        segments[index]["words"].append(word)
+    return segments
+
+
+def _normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def strip_overlap(previous_text, text, max_words=12):
+    """
+    Buang kata di awal `text` yang mengulang ekor `previous_text`
+    (akibat overlap potongan audio).
+    """
+    prev_words = [_normalize_word(w) for w in previous_text.split()][-max_words:]
+    words = text.split()
+    head = [_normalize_word(w) for w in words[:max_words]]
+    for size in range(min(len(prev_words), len(head)), 0, -1):
+        if prev_words[-size:] == head[:size]:
+            return " ".join(words[size:])
+    return text
+
+
+def _transcribe_cloud_chunk(client, audio, chunk):
+    """
+    Transkripsi satu potongan lewat Groq, timestamp digeser ke posisi absolut.
+    Mengembalikan (segments, upload_stats).
+    """
+    piece = audio.slice(chunk["start"], chunk["end"])
+    t0 = time.perf_counter()
+    payload, filename = piece.encode(CLOUD_UPLOAD_FORMAT)
+    encode_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with span("transcribe.groq_request"):
+        transcription = client.audio.transcriptions.create(
+            file=(filename, payload),
+            model=GROQ_MODEL_ID,
+            language="en",
+            prompt=TECHNICAL_PROMPT,
+            temperature=0.0,
+            response_format="verbose_json",
+            timestamp_granularities=["word", "segment"],
+        )
+    upload_format = filename.rsplit(".", 1)[-1]
+    increment("transcribe_upload_bytes", len(payload), format=upload_format)
+    upload_stats = {
+        "format": upload_format,
+        "upload_bytes": len(payload),
+        "wav_bytes": 44 + 2 * len(piece.samples),
+        "encode_seconds": encode_seconds,
+        "upload_seconds": time.perf_counter() - t0,
+    }
+
+    segments = getattr(transcription, "segments", None) or []
+    words = getattr(transcription, "words", None)
+    if not segments:
+        text = (transcription.text or "").strip()
+        segments = (
+            [{"start": chunk["start"], "end": chunk["end"], "text": text}] if text else []
+        )
+        return _attach_words(segments, words, chunk["start"]), upload_stats
+    segments = [
+        {
+            "start": chunk["start"] + float(_segment_field(seg, "start") or 0.0),
+            "end": chunk["start"] + float(_segment_field(seg, "end") or 0.0),
+            "text": (_segment_field(seg, "text") or "").strip(),
+            "no_speech_prob": _segment_field(seg, "no_speech_prob"),
+            "avg_logprob": _segment_field(seg, "avg_logprob"),
+        }
+        for seg in segments
+    ]
+    return _attach_words(segments, words, chunk["start"]), upload_stats
+
+
+def _stream_cloud_chunks(
+    client, audio, max_chunk_seconds=CLOUD_CHUNK_SECONDS, stats=None
+):
+    """
+    Jalur Groq: potongan ditranskripsi paralel, lalu di-yield berurutan
+    begitu potongan sebelumnya selesai (overlap di sambungan dibuang).
+    Jika satu potongan gagal, RuntimeError diteruskan ke pemanggil.
+    Jika `stats` (dict) diberikan, diisi total byte upload & latency.
+    """
+    chunks = plan_chunks(audio, max_chunk_seconds)
+    duration = audio.duration
+    previous_text = ""
+    previous_word_end = 0.0
+    with ThreadPoolExecutor(max_workers=min(CLOUD_CHUNK_WORKERS, len(chunks))) as pool:
+        futures = [
+            pool.submit(_transcribe_cloud_chunk, client, audio, chunk) for chunk in chunks
+        ]
+        for index, (chunk, future) in enumerate(zip(chunks, futures)):
+            try:
+                segments, upload_stats = future.result()
+            except Exception as e:
+                # Transkrip tanpa potongan ini tidak lengkap: batalkan sisa
+                # potongan & teruskan error (jangan kembalikan transkrip terpotong)
+                for pending in futures[index + 1 :]:
+                    pending.cancel()
+                raise RuntimeError(
+                    f"Transkripsi potongan {index + 1}/{len(chunks)} "
+                    f"({chunk['start']:.0f}-{chunk['end']:.0f} detik) gagal: {e}"
+                ) from e
+            if stats is not None:
+                stats["format"] = upload_stats["format"]
+                stats["chunks"] = stats.get("chunks", 0) + 1
+                for field in (
+                    "upload_bytes",
+                    "wav_bytes",
+                    "encode_seconds",
+                    "upload_seconds",
+                ):
+                    stats[field] = stats.get(field, 0) + upload_stats[field]
+            if chunk["overlap"] and segments:
+                segments[0]["text"] = strip_overlap(previous_text, segments[0]["text"])
+                for segment in segments:
+                    # Kata di area overlap sudah dihitung di potongan sebelumnya
+                    segment["words"] = [
+                        w for w in segment["words"] if w["start"] >= previous_word_end
+                    ]
+            for segment in segments:
+                if segment["words"]:
+                    previous_word_end = segment["words"][-1]["end"]
+                segment["progress"] = (
+                    min(1.0, segment["end"] / duration) if duration else 1.0
                 )
-            final_text = transcription.text.strip()
+                if segment["text"]:
+                    previous_text = segment["text"]
+                yield segment
+
+
+def _stream_local(model, audio, vad_filter=True):
+    """Transkripsi faster-whisper untuk satu WhisperModel (generator segmen)."""
+    samples = audio.samples if isinstance(audio, AudioBuffer) else audio
+    if (
+        isinstance(audio, AudioBuffer)
+        and audio.duration > LOCAL_BATCH_MIN_SECONDS
+    ):
+        # Potongan <= 30 detik (batas Whisper) di-decode per batch
+        from faster_whisper import BatchedInferencePipeline
+
+        if vad_filter:
+            # Potongan dibentuk dari timestamp ucapan Silero VAD (bagian hening
+            # tidak dikirim ke Whisper); clip_timestamps membuat vad_filter
+            # diabaikan, jadi hanya dipakai saat VAD dimatikan
+            clips = {"vad_filter": True, "vad_parameters": VAD_PARAMETERS}
         else:
-            segments, info = model_or_client.transcribe(
-                audio_path,
-                beam_size=5,
-                language="en",
-                task="transcribe",
-                initial_prompt=TECHNICAL_PROMPT,
+            chunks = plan_chunks(audio, LOCAL_CHUNK_SECONDS, overlap_seconds=0.0)
+            clips = {
+                "vad_filter": False,
+                "clip_timestamps": [
+                    {"start": c["start"], "end": c["end"]} for c in chunks
+                ],
+            }
+        segments, info = BatchedInferencePipeline(model).transcribe(
+            samples,
+            beam_size=5,
+            language="en",
+            task="transcribe",
+            initial_prompt=TECHNICAL_PROMPT,
+            word_timestamps=True,
+            batch_size=LOCAL_BATCH_SIZE,
+            **clips,
+        )
+    else:
+        segments, info = model.transcribe(
+            samples,
+            beam_size=5,
+            language="en",
+            task="transcribe",
+            initial_prompt=TECHNICAL_PROMPT,
+            word_timestamps=True,
+            vad_filter=vad_filter,
+            vad_parameters=VAD_PARAMETERS,
+        )
+    # `segments` adalah generator: decoding berjalan saat diiterasi
+    for segment in segments:
+        yield {
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text.strip(),
+            "words": [_word_dict(word) for word in segment.words or []],
+            "no_speech_prob": segment.no_speech_prob,
+            "avg_logprob": segment.avg_logprob,
+            "progress": (
+                min(1.0, segment.end / info.duration) if info.duration else 1.0
+            ),
+        }
+
+
+def stream_transcription(model_or_client, audio, vad_filter=True, stats=None):
+    """
+    Transkripsi bertahap: yield tiap segmen begitu selesai di-decode.
+    Setiap item: {"start", "end", "text", "words", "progress"} dengan progress
+    0..1 berdasarkan posisi segmen terhadap durasi audio; "words" berisi
+    timestamp per kata {"start", "end", "word"} untuk metrik kelancaran,
+    "no_speech_prob"/"avg_logprob" sinyal Whisper untuk pre-scoring.
+    Jalur lokal memakai Silero VAD (vad_filter) untuk melewati bagian hening;
+    audio panjang dipotong di bagian hening dan di-decode secara batched.
+    Jalur Groq memotong audio panjang di bagian hening dan mengirim
+    potongan-potongannya secara paralel, di-encode CLOUD_UPLOAD_FORMAT di memori.
+    `stats` (dict opsional) diisi statistik upload jalur Groq.
+    ModelManager memilih model sesuai durasi audio & mencatat RTF-nya.
+    Error transkripsi diteruskan ke pemanggil: transkrip parsial tidak boleh
+    dinilai/di-cache seolah lengkap (job ditandai gagal & bisa diulang).
+    """
+    if model_or_client is None:
+        raise RuntimeError("Model transkripsi tidak tersedia")
+
+    if _is_cloud_client(model_or_client):
+        if isinstance(audio, AudioBuffer):
+            # Audio hanya di-encode (di memori) saat jalur Groq membutuhkannya
+            yield from _stream_cloud_chunks(model_or_client, audio, stats=stats)
+            return
+        with open(audio, "rb") as file:
+            upload = (os.path.basename(audio), file.read())
+        transcription = model_or_client.audio.transcriptions.create(
+            file=upload,
+            model=GROQ_MODEL_ID,
+            language="en",
+            prompt=TECHNICAL_PROMPT,
+            temperature=0.0,
+            response_format="verbose_json",
+            timestamp_granularities=["word", "segment"],
+        )
+        duration = getattr(transcription, "duration", None) or 0.0
+        segments = [
+            {
+                "start": float(_segment_field(segment, "start") or 0.0),
+                "end": float(_segment_field(segment, "end") or 0.0),
+                "text": (_segment_field(segment, "text") or "").strip(),
+                "no_speech_prob": _segment_field(segment, "no_speech_prob"),
+                "avg_logprob": _segment_field(segment, "avg_logprob"),
+            }
+            for segment in getattr(transcription, "segments", None) or []
+        ]
+        if not segments:
+            text = (transcription.text or "").strip()
+            segments = [{"start": 0.0, "end": duration, "text": text}] if text else []
+        for segment in _attach_words(segments, getattr(transcription, "words", None)):
+            segment["progress"] = (
+                min(1.0, segment["end"] / duration) if duration else 1.0
             )
-            # Gabungkan semua segmen teks
-            final_text = " ".join([s.text for s in segments]).strip()
+            yield segment
+    elif isinstance(model_or_client, ModelManager):
+        duration = audio.duration if isinstance(audio, AudioBuffer) else None
+        with model_or_client.acquire_for(duration) as (model, name):
+            t0 = time.perf_counter()
+            last_end = 0.0
+            for segment in _stream_local(model, audio, vad_filter):
+                last_end = segment["end"]
+                yield segment
+            model_or_client.record_inference(
+                name, duration or last_end, time.perf_counter() - t0
+            )
+    else:
+        yield from _stream_local(model_or_client, audio, vad_filter)
+
+
+def transcribe_with_words(model_or_client, audio, stats=None):
+    """
+    Transkripsi lengkap beserta timestamp per kata & sinyal Whisper.
+    Mengembalikan (teks, words, signals) untuk calculate_metrics.
+    """
+    texts, words, segments = [], [], []
+    for segment in stream_transcription(model_or_client, audio, stats=stats):
+        if segment["text"]:
+            texts.append(segment["text"])
+        words.extend(segment.get("words", []))
+        segments.append(segment)
+    return " ".join(texts).strip(), words, speech_signals(segments)
 
-        return final_text
 
-    except Exception as e:
-        print(f"Error transkripsi: {e}")
-        st.error(f"Gagal transkripsi: {str(e)}")
-        return ""
+def transcribe_audio(model_or_client, audio, stats=None):
+    """
+    Fungsi Transkripsi Sederhana (Tanpa Confidence Score).
+    Hanya mengembalikan teks string.
+    `audio` bisa berupa AudioBuffer (dipakai langsung) atau path file.
+    """
+    return transcribe_with_words(model_or_client, audio, stats=stats)[0]
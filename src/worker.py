@@ -0,0 +1,319 @@
+"""
+Worker process untuk antrian job assessment (src/job_queue.py).
+
+Setiap worker memuat model Whisper sekali (tetap "hangat", kecuali di-unload
+ModelManager setelah lama idle / budget memori penuh) lalu mengambil
+job satu per satu: extract -> transcribe -> metrics -> grade, sambil
+melaporkan progress ke antrian. Throughput diskalakan dengan menambah
+worker (jatah thread CPU dibagi rata antar worker).
+
+Contoh (terpisah dari app, mis. di node yang sama):
+    python -m src.worker --workers 2
+"""
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from multiprocessing import get_context
+
+WORKER_POLL_SECONDS = 0.5
+HEARTBEAT_SECONDS = 10
+# Tulis progress ke SQLite paling sering tiap interval ini
+PROGRESS_MIN_INTERVAL_SECONDS = 0.5
+# Tahap yang mengirim teks parsial berkali-kali (throttled)
+STREAMING_STAGES = ("transcribe", "grade")
+
+
+def grade_partial_text(partial):
+    """Score/reason parsial tahap grade sebagai partial_text job (JSON)."""
+    return json.dumps(
+        {"score": partial.get("score"), "reason": partial.get("reason") or ""},
+        ensure_ascii=False,
+    )
+
+
+def run_job(model, payload, report):
+    """
+    Pipeline satu jawaban. `payload`: {"input_path", "question_id",
+    "upload_hash", "role"}; `report(progress, stage, partial_text=None,
+    force=False)` dipanggil di tiap tahap (tahap grade: partial_text =
+    grade_partial_text). "role" opsional (None = role default bank soal).
+    Mengembalikan dict hasil untuk session state app.
+    """
+    from src.agent_engine import GRADING_ERROR_PREFIX, run_grading_agent
+    from src.audio_processing import decode_audio, get_audio_duration
+    from src.cache import get_result_cache
+    from src.nlp_analysis import METRICS_VERSION, calculate_metrics
+    from src.prescoring import speech_signals
+    from src.telemetry import get_telemetry, span
+    from src.transcription import (
+        TECHNICAL_PROMPT,
+        get_transcriber_id,
+        stream_transcription,
+    )
+
+    timings = {}
+    upload_stats = {}
+    cache = get_result_cache()
+    audio_key = (payload["upload_hash"], get_transcriber_id(model), TECHNICAL_PROMPT)
+    transcript = cache.get("transcript", audio_key)
+    metrics_key = audio_key + (METRICS_VERSION,)
+    nlp_metrics = cache.get("metrics", metrics_key)
+
+    if transcript is None or nlp_metrics is None:
+        report(0.0, "extract")
+        with span("pipeline.extract") as timer:
+            audio = decode_audio(payload["input_path"])
+            if audio is None:
+                raise RuntimeError("Gagal ekstrak audio")
+        timings["extract"] = timer.seconds
+
+        report(0.1, "transcribe")
+        partial_texts = []
+        words, segments = [], []
+        with span("pipeline.transcribe") as timer:
+            for segment in stream_transcription(model, audio, stats=upload_stats):
+                if segment["text"]:
+                    partial_texts.append(segment["text"])
+                words.extend(segment.get("words", []))
+                segments.append(segment)
+                report(
+                    0.1 + segment["progress"] * 0.6,
+                    "transcribe",
+                    " ".join(partial_texts),
+                )
+        transcript = " ".join(partial_texts).strip()
+        timings["transcribe"] = timer.seconds
+
+        with span("pipeline.metrics") as timer:
+            nlp_metrics = calculate_metrics(
+                transcript, words, get_audio_duration(audio), speech_signals(segments)
+            )
+        timings["metrics"] = timer.seconds
+        if transcript:
+            cache.set("transcript", audio_key, transcript)
+            cache.set("metrics", metrics_key, nlp_metrics)
+
+    report(0.7, "grade", grade_partial_text({}))
+    grade_started = time.perf_counter()
+    score_reported = []
+
+    def on_grade_partial(partial):
+        # Time-to-first-useful-output: skor/alasan pertama yang bisa ditampilkan
+        timings.setdefault("grade_first_output", time.perf_counter() - grade_started)
+        score_ready = partial.get("score") is not None
+        report(
+            0.85 if score_ready else 0.7,
+            "grade",
+            grade_partial_text(partial),
+            # Skor pertama langsung ditulis, tidak ikut throttle
+            force=score_ready and not score_reported,
+        )
+        if score_ready:
+            score_reported.append(True)
+
+    with span("pipeline.grade") as timer:
+        score, reason = run_grading_agent(
+            payload["question_id"],
+            transcript,
+            nlp_metrics["wpm"],
+            signals=nlp_metrics,
+            on_partial=on_grade_partial,
+            role_id=payload.get("role"),
+        )
+        if reason.startswith(GRADING_ERROR_PREFIX):
+            # Jangan simpan sebagai hasil final: job gagal & bisa di-submit ulang
+            raise RuntimeError(reason)
+    timings["grade"] = timer.seconds
+    # Tanpa streaming (pre-scoring / cache): output pertama = hasil akhir
+    timings.setdefault("grade_first_output", timings["grade"])
+    get_telemetry().record_span(
+        "pipeline.grade_first_output", timings["grade_first_output"]
+    )
+
+    return {
+        "id": payload["question_id"],
+        "score": score,
+        "reason": reason,
+        "transcript": transcript,
+        "metrics": nlp_metrics,
+        "upload_stats": upload_stats,
+        "timings": timings,
+    }
+
+
+def _heartbeat_loop(queue, job_id, worker_id, stop_event):
+    while not stop_event.wait(HEARTBEAT_SECONDS):
+        queue.heartbeat(job_id)
+        queue.set_worker_state(worker_id, "busy")
+
+
+def _preload_pipeline():
+    """
+    Import & inisialisasi modul pipeline selain model (client LLM,
+    transcoder) selagi model dimuat di background. Mengembalikan pesan
+    error konfigurasi, atau None jika siap.
+    """
+    from src.agent_engine import get_groq_api_keys
+    from src.audio_processing import get_transcode_worker
+
+    get_transcode_worker()
+    try:
+        get_groq_api_keys()
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _model_stats(model):
+    """
+    Statistik model untuk sidebar (jalur Groq: hanya RSS proses) + snapshot
+    telemetri proses worker ini.
+    """
+    from src.model_manager import ModelManager, get_process_rss
+    from src.telemetry import get_telemetry
+
+    if isinstance(model, ModelManager):
+        stats = model.stats()
+    else:
+        stats = {"rssBytes": get_process_rss()}
+    stats["telemetry"] = get_telemetry().snapshot()
+    return stats
+
+
+def worker_loop(worker_index=0, cpu_threads=None, queue_path=None, max_jobs=None):
+    """Loop satu worker process: muat model sekali, lalu proses job terus-menerus."""
+    if cpu_threads:
+        # Cegah oversubscription: tiap proses hanya memakai jatah core-nya
+        os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+
+    from src.job_queue import JobQueue, get_job_queue
+    from src.telemetry import span
+    from src.transcription import warm_up_model
+
+    queue = JobQueue(queue_path) if queue_path else get_job_queue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{worker_index}"
+
+    # Model dimuat di background thread; sementara itu modul lain disiapkan
+    queue.set_worker_state(worker_id, "loading")
+    warmup = warm_up_model()
+    config_error = _preload_pipeline()
+    model, device_name = warmup.wait()
+    if config_error:
+        print(f"[worker {worker_id}] {config_error}")
+        queue.set_worker_state(worker_id, "config_error", config_error)
+        return
+    if model is None:
+        print(f"[worker {worker_id}] Model gagal dimuat: {device_name}")
+        queue.set_worker_state(worker_id, "error", f"Model gagal dimuat: {device_name}")
+        return
+    print(f"[worker {worker_id}] Model siap: {device_name} ({warmup.seconds:.1f} detik)")
+    queue.set_worker_state(
+        worker_id, "ready", device_name, warmup.seconds, _model_stats(model)
+    )
+
+    processed = 0
+    last_state_report = time.monotonic()
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker_id)
+        if job is None:
+            queue.requeue_stale()
+            if time.monotonic() - last_state_report >= HEARTBEAT_SECONDS:
+                queue.set_worker_state(
+                    worker_id, "ready", device_name, warmup.seconds, _model_stats(model)
+                )
+                last_state_report = time.monotonic()
+            time.sleep(WORKER_POLL_SECONDS)
+            continue
+        queue.set_worker_state(worker_id, "busy", device_name, warmup.seconds)
+
+        last_report = [0.0]
+
+        def report(progress, stage, partial_text=None, force=False):
+            now = time.monotonic()
+            if (
+                not force
+                and now - last_report[0] < PROGRESS_MIN_INTERVAL_SECONDS
+                and stage in STREAMING_STAGES
+            ):
+                return
+            last_report[0] = now
+            queue.update_progress(job["id"], progress, stage, partial_text)
+
+        stop_heartbeat = threading.Event()
+        threading.Thread(
+            target=_heartbeat_loop,
+            args=(queue, job["id"], worker_id, stop_heartbeat),
+            daemon=True,
+        ).start()
+        try:
+            with span("pipeline.job"):
+                result = run_job(model, job["payload"], report)
+            owned = queue.complete(job["id"], worker_id, result)
+        except Exception as e:
+            print(f"[worker {worker_id}] Job {job['id']} gagal: {e}")
+            owned = queue.fail(job["id"], worker_id, e)
+        finally:
+            stop_heartbeat.set()
+        if not owned:
+            # Job diantrikan ulang (heartbeat basi) & kini milik worker lain
+            print(f"[worker {worker_id}] Job {job['id']} diambil alih, hasil dibuang.")
+        queue.set_worker_state(
+            worker_id, "ready", device_name, warmup.seconds, _model_stats(model)
+        )
+        last_state_report = time.monotonic()
+        processed += 1
+
+
+def start_worker_pool(workers=1, cpu_threads=None, queue_path=None):
+    """
+    Jalankan `workers` worker process (daemon, spawn). Jatah thread CPU
+    default dibagi rata dari jumlah core.
+    """
+    cores = os.cpu_count() or 1
+    cpu_threads = cpu_threads or max(1, cores // max(1, workers))
+    context = get_context("spawn")
+    processes = []
+    for index in range(workers):
+        process = context.Process(
+            target=worker_loop,
+            args=(index, cpu_threads, queue_path),
+            name=f"review-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.worker",
+        description="Worker antrian assessment (model Whisper tetap dimuat).",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Jumlah worker process (default: 1)."
+    )
+    parser.add_argument(
+        "--cpu-threads",
+        type=int,
+        default=None,
+        help="Thread CPU per worker (default: jumlah core / workers).",
+    )
+    parser.add_argument("--queue", default=None, help="Path SQLite antrian job.")
+    args = parser.parse_args(argv)
+
+    processes = start_worker_pool(args.workers, args.cpu_threads, args.queue)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Workspace per sesi Streamlit untuk file upload & artefak (preview faststart).
+
+Setiap sesi punya direktori sendiri di bawah WORKSPACE_ROOT sehingga upload
+dengan nama sama dari sesi berbeda tidak saling menimpa. Upload ditulis ke
+disk per chunk (tanpa getbuffer), dan total isi semua workspace dibatasi
+kuota global: file yang paling lama tidak dipakai (mtime, di-"touch" setiap
+dipakai) dihapus lebih dulu. File yang sedang ditulis (.part) dan input job
+yang masih antri/berjalan tidak pernah dihapus.
+"""
+
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+WORKSPACE_ROOT = Path(__file__).parent.parent / "temp" / "sessions"
+WORKSPACE_QUOTA_BYTES = 2 * 1024 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 4 * 1024 * 1024
+# Penanda file yang sedang ditulis (upload: x.mp4.part, remux preview:
+# x.part.mp4), tidak dieviksi
+PARTIAL_SUFFIX = ".part"
+# Direktori sesi kosong baru dihapus setelah idle selama ini (hindari balapan
+# dengan sesi yang baru membuat direktori & belum menulis file)
+EMPTY_DIR_GRACE_SECONDS = 60 * 60
+# stats() di-cache selama ini (dipanggil di setiap rerun sidebar)
+WORKSPACE_STATS_TTL_SECONDS = 10.0
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def is_partial_file(path):
+    """True untuk file yang masih ditulis (.part sebelum/sesudah ekstensi)."""
+    name = os.path.basename(path)
+    return name.endswith(PARTIAL_SUFFIX) or os.path.splitext(name)[0].endswith(
+        PARTIAL_SUFFIX
+    )
+
+
+def safe_filename(name):
+    """Nama file tanpa path & karakter aneh (dari nama upload user)."""
+    name = _UNSAFE_CHARS.sub("_", os.path.basename(name)).strip("._")
+    return name or "upload"
+
+
+class WorkspaceManager:
+    """Direktori per sesi + kuota disk global dengan eviksi LRU (thread-safe)."""
+
+    def __init__(
+        self, root=WORKSPACE_ROOT, quota_bytes=WORKSPACE_QUOTA_BYTES, pinned=None
+    ):
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        # pinned(): path yang sedang dipakai proses lain (mis. input job)
+        self.pinned = pinned
+        self._lock = threading.Lock()
+        self._evicted_files = 0
+        self._evicted_bytes = 0
+        self._stats_cache = None
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def new_session_id():
+        return uuid.uuid4().hex
+
+    def session_dir(self, session_id):
+        path = self.root / safe_filename(session_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def artifact_path(self, session_id, name):
+        """Path artefak di workspace sesi (belum tentu sudah ada)."""
+        return self.session_dir(session_id) / safe_filename(name)
+
+    def touch(self, *paths):
+        """Tandai file sedang dipakai agar tidak jadi korban eviksi berikutnya."""
+        now = time.time()
+        for path in paths:
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+
+    def save_upload(self, session_id, uploaded_file, name=None):
+        """
+        Tulis file upload (file-like, mis. UploadedFile Streamlit) ke
+        workspace sesi per chunk. Kuota ditegakkan lebih dulu dengan ukuran
+        upload sebagai ruang yang dibutuhkan.
+        """
+        target = self.artifact_path(session_id, name or uploaded_file.name)
+        size = getattr(uploaded_file, "size", 0) or 0
+        self.enforce_quota(extra_bytes=size, protect=(target,))
+
+        partial = target.with_name(target.name + PARTIAL_SUFFIX)
+        uploaded_file.seek(0)
+        with open(partial, "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, UPLOAD_CHUNK_BYTES)
+        os.replace(partial, target)
+        self._stats_cache = None
+        return target
+
+    def _list_files(self):
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def enforce_quota(self, extra_bytes=0, protect=()):
+        """
+        Hapus file paling lama tidak dipakai sampai total + `extra_bytes`
+        muat dalam kuota. File di `protect`, file yang dikembalikan
+        `pinned()`, dan file .part yang sedang ditulis tidak dihapus.
+        """
+        protected = {os.path.abspath(p) for p in protect}
+        with self._lock:
+            files = self._list_files()
+            total = sum(size for _, size, _ in files)
+            if total + extra_bytes <= self.quota_bytes:
+                return 0
+            protected.update(os.path.abspath(p) for p in self._pinned_paths())
+            evicted = 0
+            for _, size, path in sorted(files):
+                if total + extra_bytes <= self.quota_bytes:
+                    break
+                if is_partial_file(path) or os.path.abspath(path) in protected:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+                self._evicted_files += 1
+                self._evicted_bytes += size
+            self._remove_empty_dirs()
+            self._stats_cache = None
+            if total + extra_bytes > self.quota_bytes:
+                print(
+                    f"Warning workspace: kuota {self.quota_bytes / 1e6:.0f} MB "
+                    f"terlampaui ({(total + extra_bytes) / 1e6:.0f} MB)"
+                )
+            return evicted
+
+    def _pinned_paths(self):
+        if self.pinned is None:
+            return []
+        try:
+            return self.pinned()
+        except Exception as e:
+            # Tanpa daftar file yang dipakai, eviksi tidak aman: lewati semua
+            print(f"Warning workspace: daftar file aktif gagal dibaca: {e}")
+            return [path for _, _, path in self._list_files()]
+
+    def _remove_empty_dirs(self):
+        cutoff = time.time() - EMPTY_DIR_GRACE_SECONDS
+        for entry in os.scandir(self.root):
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    os.rmdir(entry.path)
+            except OSError:
+                pass
+
+    def cleanup_session(self, session_id):
+        """
+        Hapus file workspace satu sesi (mis. saat sesi di-reset). Input job
+        yang masih antri/berjalan & file yang sedang ditulis tetap disimpan.
+        Mengembalikan jumlah file yang dihapus.
+        """
+        session_dir = self.root / safe_filename(session_id)
+        if not session_dir.is_dir():
+            return 0
+        with self._lock:
+            pinned = {os.path.abspath(p) for p in self._pinned_paths()}
+            removed = 0
+            for entry in os.scandir(session_dir):
+                path = os.path.abspath(entry.path)
+                if not entry.is_file() or is_partial_file(path) or path in pinned:
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+            try:
+                os.rmdir(session_dir)
+            except OSError:
+                # Masih ada file yang dipakai job
+                pass
+            self._stats_cache = None
+            return removed
+
+    def stats(self):
+        """
+        Pemakaian disk semua workspace (untuk monitoring), di-cache selama
+        WORKSPACE_STATS_TTL_SECONDS agar tidak menelusuri folder tiap rerun.
+        """
+        with self._lock:
+            cached = self._stats_cache
+            now = time.monotonic()
+            if cached is not None and now - cached[0] < WORKSPACE_STATS_TTL_SECONDS:
+                return dict(cached[1])
+            files = self._list_files()
+            sessions = sum(1 for entry in os.scandir(self.root) if entry.is_dir())
+            stats = {
+                "sessions": sessions,
+                "files": len(files),
+                "usedBytes": sum(size for _, size, _ in files),
+                "quotaBytes": self.quota_bytes,
+                "evictedFiles": self._evicted_files,
+                "evictedBytes": self._evicted_bytes,
+            }
+            self._stats_cache = (now, stats)
+            return dict(stats)
+
+
+def _active_job_paths():
+    from src.job_queue import get_job_queue
+
+    return get_job_queue().active_input_paths()
+
+
+_workspace_manager = None
+_workspace_manager_lock = threading.Lock()
+
+
+def get_workspace_manager():
+    """Instance WorkspaceManager bersama (satu per proses)."""
+    global _workspace_manager
+    with _workspace_manager_lock:
+        if _workspace_manager is None:
+            _workspace_manager = WorkspaceManager(pinned=_active_job_paths)
+        return _workspace_manager